@@ -0,0 +1,197 @@
+"""
+Pre-generated image renditions for uploaded media.
+
+Every uploaded image (``Product.image``, ``User.avatar``) gets a set of resized
+copies stored next to the original, e.g. ``products/shirt.jpg`` produces
+``products/shirt_jpg.thumbnail.jpg``, ``products/shirt_jpg.medium.jpg`` and
+``products/shirt_jpg.medium.webp``. Serializers expose their URLs once they have
+been generated, so clients never have to download the full-size original to
+draw a grid. Renditions are generated when an image is uploaded or replaced,
+and those of a replaced image are deleted (``track_image``/``image_saved``).
+"""
+import io
+import logging
+import os
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# name -> (max width, max height, Pillow format, file suffix, save options)
+RENDITIONS = {
+    'thumbnail': (200, 200, 'JPEG', 'thumbnail.jpg', {'quality': 80, 'optimize': True, 'progressive': True}),
+    'medium': (800, 800, 'JPEG', 'medium.jpg', {'quality': 85, 'optimize': True, 'progressive': True}),
+    'webp': (800, 800, 'WEBP', 'medium.webp', {'quality': 80, 'method': 4}),
+}
+# Written last by ``generate_renditions``: when it exists, all of them do.
+LAST_RENDITION = list(RENDITIONS)[-1]
+# Seconds a missing rendition is remembered before storage is checked again.
+MISSING_RENDITIONS_TIMEOUT = 60
+
+
+def is_remote(name):
+    """Images whose name is an absolute URL live outside our storage."""
+    return name.startswith('http://') or name.startswith('https://')
+
+
+def rendition_name(name, rendition):
+    """
+    Storage name of ``rendition`` for the original image ``name``. The
+    original extension is kept in it, so ``shirt.png`` and ``shirt.jpg`` do
+    not share renditions.
+    """
+    suffix = RENDITIONS[rendition][3]
+    stem, extension = os.path.splitext(name)
+    return f"{stem}_{extension.lstrip('.')}.{suffix}"
+
+
+def renditions_cache_key(name):
+    return f'images:renditions:{name}'
+
+
+def render(source, rendition):
+    """Resize an opened Pillow image and return the encoded bytes."""
+    width, height, image_format, _, options = RENDITIONS[rendition]
+    image = source.copy()
+    image.thumbnail((width, height), Image.Resampling.LANCZOS)
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **options)
+    return buffer.getvalue()
+
+
+def generate_renditions(name, storage=None, force=False):
+    """
+    Build every rendition of the stored image ``name``.
+
+    Existing renditions are kept unless ``force`` is set. Returns the list of
+    rendition names that were written.
+    """
+    storage = storage or default_storage
+    if not name or is_remote(name):
+        return []
+
+    pending = [
+        rendition for rendition in RENDITIONS
+        if force or not storage.exists(rendition_name(name, rendition))
+    ]
+    if not pending:
+        return []
+
+    with storage.open(name, 'rb') as fp:
+        source = Image.open(fp)
+        source = ImageOps.exif_transpose(source)
+        source.load()
+
+    written = []
+    for rendition in pending:
+        target = rendition_name(name, rendition)
+        if storage.exists(target):
+            storage.delete(target)
+        storage.save(target, ContentFile(render(source, rendition)))
+        written.append(target)
+    cache.set(renditions_cache_key(name), True, None)
+    return written
+
+
+def delete_renditions(name, storage=None):
+    storage = storage or default_storage
+    if not name or is_remote(name):
+        return
+    cache.delete(renditions_cache_key(name))
+    for rendition in RENDITIONS:
+        target = rendition_name(name, rendition)
+        if storage.exists(target):
+            storage.delete(target)
+
+
+def has_renditions(name, storage=None):
+    """
+    Whether the renditions of ``name`` were generated. The answer is cached,
+    so storage is checked at most once per image (and once a minute while
+    they are missing).
+    """
+    key = renditions_cache_key(name)
+    generated = cache.get(key)
+    if generated is None:
+        generated = (storage or default_storage).exists(rendition_name(name, LAST_RENDITION))
+        cache.set(key, generated, None if generated else MISSING_RENDITIONS_TIMEOUT)
+    return generated
+
+
+def rendition_urls(field_file, request=None):
+    """
+    Map of rendition name to URL for an ``ImageField`` value, or None while
+    they have not been generated.
+
+    Apart from ``url()``, storage is only checked through the cached
+    ``has_renditions``, so this is safe to use per row in list serializers.
+    """
+    if not field_file:
+        return None
+    name = field_file.name
+    if is_remote(name):
+        return {rendition: name for rendition in RENDITIONS}
+    if not has_renditions(name, field_file.storage):
+        return None
+    urls = {}
+    for rendition in RENDITIONS:
+        url = field_file.storage.url(rendition_name(name, rendition))
+        urls[rendition] = request.build_absolute_uri(url) if request else url
+    return urls
+
+
+def schedule_renditions(name):
+    """Generate renditions once the surrounding transaction commits."""
+    def _generate():
+        try:
+            generate_renditions(name)
+        except Exception:
+            logger.exception("Could not generate renditions for %s", name)
+
+    transaction.on_commit(_generate)
+
+
+def _stored_name(instance, field):
+    value = instance.__dict__.get(field)
+    return getattr(value, 'name', value) or ''
+
+
+def track_image(instance, field):
+    """
+    Remember the stored name of image ``field`` when ``instance`` is loaded
+    (``post_init``). Nothing is recorded while the field is deferred.
+    """
+    if field in instance.__dict__:
+        instance.__dict__.setdefault('_loaded_images', {})[field] = _stored_name(instance, field)
+
+
+def image_saved(instance, field, created, update_fields=None):
+    """
+    ``post_save`` handling of image ``field``: generate renditions when the
+    image is new or was replaced, and delete those of the replaced image
+    unless another row of the model still uses it.
+    """
+    if update_fields is not None and field not in update_fields:
+        return
+    loaded = instance.__dict__.setdefault('_loaded_images', {})
+    previous = None if created else loaded.get(field)
+    name = _stored_name(instance, field)
+    if previous == name:
+        return
+    loaded[field] = name
+    if previous and not is_remote(previous):
+        model = type(instance)
+
+        def _delete():
+            if not model._default_manager.filter(**{field: previous}).exists():
+                delete_renditions(previous)
+
+        transaction.on_commit(_delete)
+    if name:
+        schedule_renditions(name)
@@ -0,0 +1,165 @@
+"""
+Serving of uploaded media from ``MEDIA_ROOT``.
+
+Supports single-range ``Range`` requests, strong ETags with
+``If-None-Match``/``If-Range`` and long-lived cache headers. When
+``MEDIA_SENDFILE_BACKEND`` is set, the response carries only headers and the
+front-end web server streams the file itself (``X-Accel-Redirect`` for nginx,
+``X-Sendfile`` for Apache/lighttpd), so Python workers never push image bytes.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+CHUNK_SIZE = 64 * 1024
+
+
+def make_etag(stat):
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def parse_range(header, size):
+    """
+    Parse a single-range ``Range`` header into an inclusive ``(start, end)``.
+
+    Returns ``None`` when the header should be ignored (absent, malformed or
+    multi-range) and raises ``ValueError`` when the range cannot be satisfied.
+    """
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the final N bytes.
+        length = int(last)
+        if length == 0:
+            raise ValueError('Empty suffix range')
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError('Range not satisfiable')
+    return start, min(end, size - 1)
+
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return etag in [tag.strip() for tag in header.split(',')]
+
+
+class RangeFileWrapper:
+    """Iterates over ``length`` bytes of ``fp`` starting at ``offset``."""
+
+    def __init__(self, fp, offset, length):
+        self.fp = fp
+        self.fp.seek(offset)
+        self.remaining = length
+
+    def __iter__(self):
+        try:
+            while self.remaining > 0:
+                data = self.fp.read(min(CHUNK_SIZE, self.remaining))
+                if not data:
+                    break
+                self.remaining -= len(data)
+                yield data
+        finally:
+            self.fp.close()
+
+    def close(self):
+        self.fp.close()
+
+
+def _sendfile_response(relative_path, full_path):
+    backend = settings.MEDIA_SENDFILE_BACKEND
+    response = HttpResponse()
+    if backend == 'nginx':
+        prefix = settings.MEDIA_SENDFILE_URL_PREFIX.rstrip('/')
+        response['X-Accel-Redirect'] = f"{prefix}/{quote(relative_path)}"
+    else:
+        response['X-Sendfile'] = full_path
+    # Let the web server fill in the real type, length and range handling.
+    del response['Content-Type']
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Invalid path')
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404('File not found')
+    if not os.path.isfile(full_path):
+        raise Http404('File not found')
+
+    etag = make_etag(stat)
+    cache_headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}',
+        'Accept-Ranges': 'bytes',
+    }
+
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        response = HttpResponseNotModified()
+        for header, value in cache_headers.items():
+            response[header] = value
+        return response
+
+    if settings.MEDIA_SENDFILE_BACKEND:
+        response = _sendfile_response(path, full_path)
+        for header, value in cache_headers.items():
+            response[header] = value
+        return response
+
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    size = stat.st_size
+
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if not if_range or if_range.strip() == etag:
+        try:
+            byte_range = parse_range(request.headers.get('Range'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            for header, value in cache_headers.items():
+                response[header] = value
+            return response
+
+    fp = open(full_path, 'rb')
+    if byte_range is None:
+        # FileResponse hands the file object to wsgi.file_wrapper, which lets
+        # the server use os.sendfile() when it supports it.
+        response = FileResponse(fp, content_type=content_type)
+        response['Content-Length'] = str(size)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(RangeFileWrapper(fp, start, length), status=206, content_type=content_type)
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    for header, value in cache_headers.items():
+        response[header] = value
+    return response
@@ -1,11 +1,24 @@
+"""
+Authentication of WebSocket connections.
+
+Clients pass their access token as ``?token=``. ``TokenAuthMiddleware`` is
+async from end to end: the token is checked in memory and the user comes
+from ``users.cache`` (one cache read, a query only on a miss), so a burst of
+reconnections does not queue on the database thread. Sockets with a token
+skip the session middleware altogether; the others keep the session scope
+and stay anonymous, as before.
+"""
+import logging
+from urllib.parse import parse_qs
+
 from channels.auth import AuthMiddlewareStack
-from rest_framework_simplejwt.tokens import AccessToken
 from django.contrib.auth.models import AnonymousUser
-from django.db import close_old_connections
-from urllib.parse import parse_qs
-from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+
+from users.authentication import aauthenticate_token
+
+logger = logging.getLogger(__name__)
 
-User = get_user_model()
 
 class TokenAuthMiddleware:
     """
@@ -14,22 +27,19 @@ class TokenAuthMiddleware:
 
     def __init__(self, inner):
         self.inner = inner
+        self.session_inner = AuthMiddlewareStack(inner)
 
     async def __call__(self, scope, receive, send):
-        close_old_connections()
         query_string = parse_qs(scope["query_string"].decode("utf8"))
         token = query_string.get("token")
-        if token:
-            try:
-                access_token = AccessToken(token[0])
-                user = await User.objects.aget(id=access_token["user_id"])
-                scope["user"] = user
-            except Exception as e:
-                print(f"WebSocket authentication failed: {type(e).__name__}: {e}")
-                scope["user"] = AnonymousUser()
-        else:
-            scope["user"] = AnonymousUser()
-        return await self.inner(scope, receive, send)
+        if not token:
+            return await self.session_inner(dict(scope, user=AnonymousUser()), receive, send)
+        try:
+            user = await aauthenticate_token(token[0])
+        except (TokenError, AuthenticationFailed) as e:
+            logger.warning("WebSocket authentication failed: %s: %s", type(e).__name__, e)
+            user = AnonymousUser()
+        return await self.inner(dict(scope, user=user), receive, send)
 
 def TokenAuthMiddlewareStack(inner):
-    return TokenAuthMiddleware(AuthMiddlewareStack(inner))
+    return TokenAuthMiddleware(inner)
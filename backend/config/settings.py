@@ -141,6 +141,17 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Uploaded media (product images, avatars and their renditions)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = Path(os.getenv('MEDIA_ROOT', BASE_DIR / 'media'))
+# Uploaded names are unique and renditions derive from them, so media can be
+# cached for a long time.
+MEDIA_CACHE_MAX_AGE = int(os.getenv('MEDIA_CACHE_MAX_AGE', 60 * 60 * 24 * 30))
+# '' (Django streams the file), 'nginx' (X-Accel-Redirect) or 'xsendfile'.
+MEDIA_SENDFILE_BACKEND = os.getenv('MEDIA_SENDFILE_BACKEND', '')
+# Internal nginx location that aliases MEDIA_ROOT, used with 'nginx'.
+MEDIA_SENDFILE_URL_PREFIX = os.getenv('MEDIA_SENDFILE_URL_PREFIX', '/protected-media/')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -148,14 +159,110 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Django Channels
 ASGI_APPLICATION = 'config.asgi.application'
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer',
-    },
-}
+# 'memory' works within one process only; 'postgres' (notifications.layers)
+# shares groups between processes through LISTEN/NOTIFY on the database.
+if os.getenv('CHANNEL_LAYER_BACKEND', 'memory') == 'postgres':
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'notifications.layers.PostgresChannelLayer',
+            'CONFIG': {
+                'alias': 'default',
+                'expiry': int(os.getenv('CHANNEL_LAYER_EXPIRY', 60)),
+                'capacity': int(os.getenv('CHANNEL_LAYER_CAPACITY', 100)),
+            },
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        },
+    }
 
 # Firebase Admin SDK
 FIREBASE_SERVICE_ACCOUNT_KEY_PATH = os.path.join(BASE_DIR, 'firebase_service_account.json')
+# Seconds the list of admin notification recipients stays cached.
+NOTIFICATION_STAFF_CACHE_TIMEOUT = 300
+# Seconds a per-user unread notification counter stays cached (notifications.unread).
+NOTIFICATION_UNREAD_CACHE_TIMEOUT = 60 * 60
+# "Mark all as read" without the client's newest ids only moves the read
+# watermarks over notifications older than this many seconds; ids of newer
+# ones may still have gaps that later commits fill (notifications.feed).
+NOTIFICATION_READ_MARGIN = 60
+# Days read notifications (and broadcasts) are kept; unread ones are kept
+# NOTIFICATION_UNREAD_RETENTION_DAYS (0: forever). See prune_notifications.
+NOTIFICATION_RETENTION_DAYS = int(os.getenv('NOTIFICATION_RETENTION_DAYS', 90))
+NOTIFICATION_UNREAD_RETENTION_DAYS = int(os.getenv('NOTIFICATION_UNREAD_RETENTION_DAYS', 365))
+NOTIFICATION_PRUNE_BATCH_SIZE = 1000
+# Realtime events kept for WebSocket clients reconnecting with ?since=<event_id>
+# (notifications.eventlog), and the most replayed to one client.
+EVENT_LOG_RETENTION_HOURS = int(os.getenv('EVENT_LOG_RETENTION_HOURS', 24))
+EVENT_REPLAY_LIMIT = 100
+# Ids are taken at insert but events become visible at commit, so an event
+# with a lower id than the client's last one may still have been missed:
+# replay also goes back this many seconds before it.
+EVENT_REPLAY_OVERLAP_SECONDS = 30
+# Push transport; 'notifications.push.FakeTransport' records messages in memory.
+PUSH_TRANSPORT = os.getenv('PUSH_TRANSPORT', 'notifications.push.FirebaseTransport')
+
+# Channel and push messages are delivered after commit through the outbox
+# (notifications.outbox). With OUTBOX_AUTO_DISPATCH each process dispatches in
+# a background thread; otherwise run `manage.py dispatch_outbox --loop`.
+OUTBOX_AUTO_DISPATCH = os.getenv('OUTBOX_AUTO_DISPATCH', 'True') == 'True'
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 8))
+# Retries wait 2, 4, 8... seconds, at most this many.
+OUTBOX_MAX_BACKOFF = 300
+OUTBOX_POLL_INTERVAL = float(os.getenv('OUTBOX_POLL_INTERVAL', 5))
+# Seconds a claimed batch stays reserved for its dispatcher while it is sent;
+# rows of a dispatcher that died are picked up again after this.
+OUTBOX_LEASE = int(os.getenv('OUTBOX_LEASE', 60))
+# Minimum seconds between two dispatch rounds of the worker: events of a burst
+# go out together. Events to these groups (group: batch event type) are
+# serialized once and coalesced per round.
+OUTBOX_COALESCE_WINDOW = float(os.getenv('OUTBOX_COALESCE_WINDOW', 0.25))
+CHANNEL_COALESCED_GROUPS = {'admin_orders': 'order.batch', 'dashboard': 'dashboard.batch'}
+# Frames waiting for one WebSocket client; beyond this the socket is closed
+# and the client reconnects with ?since= (notifications.sendqueue).
+WS_SEND_QUEUE_SIZE = int(os.getenv('WS_SEND_QUEUE_SIZE', 256))
+
+# Caches
+# Local memory by default (per process, bounded by MAX_ENTRIES); set REDIS_URL
+# to share the cache between workers.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 10000))},
+        },
+    }
+
+# Always per process, for state that must not cost a network round trip.
+CACHES['local'] = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'local',
+}
+
+# Authenticated users are cached by id for token authentication (users.cache).
+AUTH_USER_CACHE_ALIAS = 'default'
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', 300))
+
+# Login password hashing runs in a dedicated pool (users.login); logins that
+# find it and its queue full are rejected with 429.
+LOGIN_HASH_WORKERS = int(os.getenv('LOGIN_HASH_WORKERS', 2))
+LOGIN_QUEUE_SIZE = int(os.getenv('LOGIN_QUEUE_SIZE', 16))
+LOGIN_THROTTLE_CACHE_ALIAS = 'local'
+
+# last_login timestamps are buffered and written in batches (users.last_login).
+LAST_LOGIN_FLUSH_INTERVAL = float(os.getenv('LAST_LOGIN_FLUSH_INTERVAL', 5))
+LAST_LOGIN_BATCH_SIZE = 500
 
 # Custom User Model
 AUTH_USER_MODEL = 'users.User'
@@ -163,11 +270,15 @@ AUTH_USER_MODEL = 'users.User'
 # Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': os.getenv('LOGIN_IP_RATE', '30/min'),
+        'login_user': os.getenv('LOGIN_USER_RATE', '10/min'),
+    },
 }
 
 # JWT Settings
@@ -178,9 +289,12 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
+    # Logins record last_login through users.last_login instead.
+    'UPDATE_LAST_LOGIN': False,
     'ALGORITHM': 'HS256',
     'AUTH_HEADER_TYPES': ('Bearer',),
+    # Checks the blacklist through users.tokens.blacklist_cache.
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.CachedTokenRefreshSerializer',
 }
 
 # CORS Settings
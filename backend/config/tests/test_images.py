@@ -0,0 +1,105 @@
+import io
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from config.images import generate_renditions, rendition_name, rendition_urls
+from products.models import Product
+
+
+def jpeg(size=(1200, 900)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, format='JPEG')
+    return ContentFile(buffer.getvalue())
+
+
+class RenditionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def stored(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.media_root)
+            for root, _, names in os.walk(self.media_root) for name in names
+        )
+
+    def create_product(self, **kwargs):
+        product = Product(name='Camisa', sku='CAM-1', price=Decimal('10.00'), stock=1, **kwargs)
+        with self.captureOnCommitCallbacks(execute=True):
+            product.image.save('shirt.jpg', jpeg())
+        return product
+
+    def test_names(self):
+        self.assertEqual(rendition_name('products/shirt.png', 'thumbnail'), 'products/shirt_png.thumbnail.jpg')
+        self.assertEqual(rendition_name('products/shirt.png', 'webp'), 'products/shirt_png.medium.webp')
+        self.assertNotEqual(rendition_name('products/shirt.jpg', 'medium'), rendition_name('products/shirt.png', 'medium'))
+
+    def test_generate_resizes_and_keeps_existing(self):
+        name = default_storage.save('products/shirt.jpg', jpeg())
+        self.assertEqual(len(generate_renditions(name)), 3)
+        with default_storage.open(rendition_name(name, 'thumbnail')) as fp:
+            self.assertEqual(Image.open(fp).size, (200, 150))
+        with default_storage.open(rendition_name(name, 'webp')) as fp:
+            self.assertEqual(Image.open(fp).format, 'WEBP')
+        self.assertEqual(generate_renditions(name), [])
+        self.assertEqual(len(generate_renditions(name, force=True)), 3)
+
+    def test_urls_only_once_generated(self):
+        name = default_storage.save('products/shirt.jpg', jpeg())
+        product = Product(image=name)
+        self.assertIsNone(rendition_urls(product.image))
+        generate_renditions(name)
+        self.assertEqual(rendition_urls(product.image), {
+            'thumbnail': '/media/products/shirt_jpg.thumbnail.jpg',
+            'medium': '/media/products/shirt_jpg.medium.jpg',
+            'webp': '/media/products/shirt_jpg.medium.webp',
+        })
+        remote = Product(image='https://cdn.example.com/shirt.jpg')
+        self.assertEqual(rendition_urls(remote.image)['medium'], 'https://cdn.example.com/shirt.jpg')
+
+    def test_saved_image_gets_renditions(self):
+        product = self.create_product()
+        self.assertEqual(self.stored(), [
+            'products/shirt.jpg', 'products/shirt_jpg.medium.jpg',
+            'products/shirt_jpg.medium.webp', 'products/shirt_jpg.thumbnail.jpg',
+        ])
+        self.assertIsNotNone(rendition_urls(product.image))
+
+    def test_other_saves_do_not_reschedule(self):
+        product = self.create_product()
+        product = Product.objects.get(pk=product.pk)
+        product.stock = 5
+        with self.captureOnCommitCallbacks() as callbacks:
+            product.save()
+            product.save(update_fields=['stock'])
+        self.assertEqual(callbacks, [])
+
+    def test_replaced_image_renditions_are_deleted(self):
+        product = Product.objects.get(pk=self.create_product().pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            product.image.save('cap.jpg', jpeg())
+        self.assertEqual(self.stored(), [
+            'products/cap.jpg', 'products/cap_jpg.medium.jpg', 'products/cap_jpg.medium.webp',
+            'products/cap_jpg.thumbnail.jpg', 'products/shirt.jpg',
+        ])
+
+    def test_shared_image_renditions_are_kept(self):
+        product = self.create_product()
+        Product.objects.create(name='Copia', sku='CAM-2', price=Decimal('10.00'), stock=1, image=product.image.name)
+        product = Product.objects.get(pk=product.pk)
+        product.image = None
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        self.assertIn('products/shirt_jpg.thumbnail.jpg', self.stored())
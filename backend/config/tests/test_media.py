@@ -0,0 +1,74 @@
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+
+from config.media import parse_range
+
+
+class ParseRangeTest(SimpleTestCase):
+    def test_ignored_headers(self):
+        self.assertIsNone(parse_range('', 100))
+        self.assertIsNone(parse_range('items=0-10', 100))
+        self.assertIsNone(parse_range('bytes=0-1,5-6', 100))
+
+    def test_ranges(self):
+        self.assertEqual(parse_range('bytes=0-9', 100), (0, 9))
+        self.assertEqual(parse_range('bytes=90-', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=-10', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=50-500', 100), (50, 99))
+
+    def test_unsatisfiable(self):
+        with self.assertRaises(ValueError):
+            parse_range('bytes=100-', 100)
+        with self.assertRaises(ValueError):
+            parse_range('bytes=-0', 100)
+
+
+class ServeMediaTest(SimpleTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        with open(f'{self.media_root}/photo.jpg', 'wb') as fp:
+            fp.write(bytes(range(256)) * 4)
+        override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_SENDFILE_BACKEND='')
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_full_response_has_cache_headers(self):
+        response = self.client.get('/media/photo.jpg')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Length'], '1024')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('max-age=', response['Cache-Control'])
+        self.assertTrue(response['ETag'].startswith('"'))
+
+    def test_if_none_match_returns_304(self):
+        etag = self.client.get('/media/photo.jpg')['ETag']
+        response = self.client.get('/media/photo.jpg', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_range_request(self):
+        response = self.client.get('/media/photo.jpg', HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/1024')
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(10, 20)))
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get('/media/photo.jpg', HTTP_RANGE='bytes=4096-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */1024')
+
+    def test_stale_if_range_sends_full_file(self):
+        response = self.client.get('/media/photo.jpg', HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"old"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_path_traversal_is_rejected(self):
+        response = self.client.get('/media/../settings.py')
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(MEDIA_SENDFILE_BACKEND='nginx', MEDIA_SENDFILE_URL_PREFIX='/protected-media/')
+    def test_nginx_offload(self):
+        response = self.client.get('/media/photo.jpg')
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/photo.jpg')
+        self.assertEqual(response.content, b'')
@@ -0,0 +1,62 @@
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from config.middleware import TokenAuthMiddleware
+
+User = get_user_model()
+
+
+class ScopeApp:
+    """Inner application that records the scope it was called with."""
+    scope = None
+
+    async def __call__(self, scope, receive, send):
+        ScopeApp.scope = scope
+
+
+def connect(query_string):
+    scope = {'type': 'websocket', 'path': '/ws/orders/', 'query_string': query_string.encode(), 'headers': []}
+    async_to_sync(TokenAuthMiddleware(ScopeApp()))(scope, None, None)
+    return ScopeApp.scope
+
+
+class TokenAuthMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='cliente', password='password123')
+
+    def connect(self, query_string):
+        return connect(query_string)
+
+    def test_token_user_without_session(self):
+        token = AccessToken.for_user(self.user)
+        self.assertEqual(self.connect(f'token={token}')['user'], self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            scope = self.connect(f'token={token}')
+        self.assertEqual(scope['user'], self.user)
+        self.assertNotIn('session', scope)
+        self.assertEqual(queries.captured_queries, [])
+
+    def test_invalid_or_inactive_is_anonymous_and_logged(self):
+        with self.assertLogs('config.middleware', 'WARNING') as logs:
+            self.assertTrue(self.connect('token=nope')['user'].is_anonymous)
+            User.objects.filter(pk=self.user.pk).update(is_active=False)
+            self.assertTrue(self.connect(f'token={AccessToken.for_user(self.user)}')['user'].is_anonymous)
+        self.assertIn('TokenError', logs.output[0])
+        self.assertIn('User is inactive', logs.output[1])
+
+
+
+class SessionScopeTest(TransactionTestCase):
+    # The session stack closes old connections around its database calls,
+    # which would close the connection of a TestCase transaction.
+    def test_no_token_keeps_session_scope(self):
+        scope = connect('')
+        self.assertTrue(scope['user'].is_anonymous)
+        self.assertIn('session', scope)
@@ -0,0 +1,228 @@
+"""
+Query-count regression tests for every router-registered API action.
+
+Every action found in the URLconf is requested once with 1 row per model
+and once with 50. Writes (create, update, destroy and POST actions) send the
+body from ``ACTION_PAYLOADS``, which must list every one of them; destroy
+requests delete a fresh row from ``DISPOSABLE``. The number of queries must
+be the same; otherwise the test reports the statements that repeat, which is
+how an N+1 shows up.
+"""
+import itertools
+import re
+from collections import Counter
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from notifications.models import Notification
+from orders.benchmarks import QueryRecorder
+from orders.models import Order, OrderItem
+from orders.sales import rebuild_sales_counters
+from products.models import Category, InventoryMovement, Product
+
+User = get_user_model()
+
+# Query parameters some actions need to do real work.
+ACTION_PARAMS = {
+    'product-stock-at': {'date': str(timezone.localdate())},
+    'product-stock-levels-at': {'date': str(timezone.localdate())},
+}
+
+# Unique suffix for rows created by the requests.
+sequence = itertools.count()
+
+# Bodies of the write actions, by ``(url_name, method)``. Detail writes target
+# the first row of the model (see ``detail_pk``). Callables get the test case
+# and are evaluated before the queries are recorded.
+ACTION_PAYLOADS = {
+    ('user-list', 'post'): lambda test: {'username': f'nuevo{next(sequence)}', 'password': 'password123'},
+    ('user-detail', 'put'): {'username': 'cliente0', 'first_name': 'Ana', 'role': 'user'},
+    ('user-detail', 'patch'): {'first_name': 'Ana'},
+    ('user-change-password', 'post'): {'new_password': 'password456'},
+    ('user-toggle-active', 'post'): {},
+    ('user-update-fcm-token', 'post'): {'fcm_token': 'token-admin', 'platform': 'android'},
+    ('category-list', 'post'): lambda test: {'name': f'Nueva {next(sequence)}'},
+    ('category-detail', 'put'): {'name': 'Categoría 0', 'description': 'Editada'},
+    ('category-detail', 'patch'): {'description': 'Editada'},
+    ('product-list', 'post'): lambda test: {'name': 'Nuevo', 'sku': f'NEW-{next(sequence)}', 'price': '10.00', 'stock': 5},
+    ('product-detail', 'put'): lambda test: {'name': 'Producto 0', 'sku': 'SKU-0', 'price': '11.00', 'category': test.first_pk(Category)},
+    ('product-detail', 'patch'): {'price': '12.00'},
+    ('product-import-products', 'post'): lambda test: {
+        'file': SimpleUploadedFile('catalog.csv', b'sku,name,price\nSKU-0,Producto 0,11\nIMP-1,Importado,5\n'),
+    },
+    ('inventorymovement-list', 'post'): lambda test: test.movement(),
+    ('inventorymovement-bulk', 'post'): lambda test: [test.movement(), test.movement()],
+    ('inventorymovement-detail', 'put'): lambda test: test.movement(),
+    ('inventorymovement-detail', 'patch'): {'notes': 'Revisado'},
+    ('order-list', 'post'): lambda test: {
+        'customer_name': 'Cliente',
+        'status': 'completed',
+        'items': [{'product': test.first_pk(Product), 'quantity': 1, 'unit_price': '10.00'}],
+    },
+    # Switches between two sale statuses, so both runs take the same path.
+    ('order-detail', 'patch'): lambda test: {
+        'status': 'shipped' if Order.objects.get(pk=test.first_pk(Order)).status == 'completed' else 'completed',
+    },
+    ('order-voice-command', 'post'): {'command_text': 'productos mas vendidos'},
+    ('notification-mark-read', 'post'): lambda test: {
+        'ids': [Notification.objects.create(recipient=test.admin, message='Nuevo', notification_type='new_order').pk],
+    },
+    ('notification-mark-all-as-read', 'post'): {},
+}
+
+ACTION_FORMATS = {
+    ('product-import-products', 'post'): 'multipart',
+}
+
+# Rows deleted by destroy requests, created anew for each one.
+DISPOSABLE = {
+    'user': lambda test: User.objects.create(username=f'baja{next(sequence)}'),
+    'category': lambda test: Category.objects.create(name=f'Baja {next(sequence)}'),
+    'product': lambda test: Product.objects.create(name='Baja', sku=f'BAJA-{next(sequence)}', price=Decimal('1.00')),
+    'inventorymovement': lambda test: InventoryMovement.objects.create(
+        product_id=test.first_pk(Product), movement_type='entrada', quantity=1, reason='compra',
+        stock_before=20, stock_after=21,
+    ),
+}
+
+# Actions whose work legitimately grows with the data.
+EXCLUDED_ACTIONS = set()
+
+
+def iter_patterns(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_patterns(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            yield pattern
+
+
+def viewset_actions():
+    """
+    ``(url_name, method, detail)`` for every viewset route the viewset
+    accepts, skipping the ``.json``-style format suffix duplicates.
+    """
+    actions = {}
+    for pattern in iter_patterns(get_resolver().url_patterns):
+        view_actions = getattr(pattern.callback, 'actions', None)
+        if not view_actions or not pattern.name or 'format' in pattern.pattern.regex.groupindex:
+            continue
+        detail = 'pk' in pattern.pattern.regex.groupindex
+        for method in view_actions:
+            if method in pattern.callback.cls.http_method_names:
+                actions[pattern.name, method] = detail
+    return sorted(
+        (name, method, detail) for (name, method), detail in actions.items()
+        if name not in EXCLUDED_ACTIONS
+    )
+
+
+def normalize(sql):
+    """Replace literals so repeated statements with different ids compare equal."""
+    sql = re.sub(r"'[^']*'", '?', sql)
+    return re.sub(r'\b\d+\b', '?', sql)
+
+
+class QueryCountTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create(username='admin', role='admin', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.rows = 0
+
+    def first_pk(self, model):
+        queryset = model.objects.all()
+        if model is User:
+            # Writes to the requesting user would change how it authenticates.
+            queryset = queryset.exclude(pk=self.admin.pk)
+        elif model is Notification:
+            queryset = queryset.filter(recipient=self.admin)
+        return queryset.order_by('pk').values_list('pk', flat=True).first()
+
+    def movement(self):
+        return {'product': self.first_pk(Product), 'movement_type': 'entrada', 'quantity': 1, 'reason': 'compra'}
+
+    def populate(self, count):
+        """Grow every table to ``count`` rows (besides the admin user)."""
+        for index in range(self.rows, count):
+            category = Category.objects.create(name=f'Categoría {index}')
+            product = Product.objects.create(
+                name=f'Producto {index}', sku=f'SKU-{index}', price=Decimal('10.00'),
+                stock=20, category=category,
+            )
+            customer = User.objects.create(username=f'cliente{index}')
+            order = Order.objects.create(
+                customer_name=f'Cliente {index}', status=Order.Status.COMPLETED, created_by=self.admin
+            )
+            OrderItem.objects.create(order=order, product=product, quantity=1, unit_price=product.price)
+            order.recalculate_totals()
+            InventoryMovement.objects.create(
+                product=product, movement_type='entrada', quantity=5, reason='compra',
+                created_by=self.admin, stock_before=15, stock_after=20,
+            )
+            Notification.objects.create(recipient=self.admin, message=f'Aviso {index}', notification_type='new_order')
+            Notification.objects.create(recipient=customer, message=f'Aviso {index}', notification_type='new_order')
+        rebuild_sales_counters()
+        self.rows = count
+
+    def detail_pk(self, name, method):
+        basename = name.split('-')[0]
+        if method == 'delete':
+            return DISPOSABLE[basename](self).pk
+        model = {
+            'user': User,
+            'category': Category,
+            'product': Product,
+            'inventorymovement': InventoryMovement,
+            'order': Order,
+            'notification': Notification,
+        }[basename]
+        return self.first_pk(model)
+
+    def run_action(self, name, method, detail):
+        url = reverse(name, kwargs={'pk': self.detail_pk(name, method)} if detail else None)
+        payload = ACTION_PAYLOADS.get((name, method))
+        if callable(payload):
+            payload = payload(self)
+        queries = []
+        with connection.execute_wrapper(QueryRecorder(queries)):
+            if method == 'get':
+                response = self.client.get(url, ACTION_PARAMS.get(name))
+            else:
+                request_format = ACTION_FORMATS.get((name, method), 'json')
+                response = getattr(self.client, method)(url, payload, format=request_format)
+        self.assertLess(
+            response.status_code, 400,
+            f"{method.upper()} {url}: {response.status_code} {getattr(response, 'data', '')}",
+        )
+        return queries
+
+    def test_query_count_does_not_grow_with_rows(self):
+        actions = viewset_actions()
+        self.assertTrue(actions)
+        writes = {(name, method) for name, method, _ in actions if method not in ('get', 'delete')}
+        self.assertEqual(writes - set(ACTION_PAYLOADS), set(), 'Add a payload for these actions')
+
+        self.populate(1)
+        small = {action: self.run_action(*action) for action in actions}
+        self.populate(50)
+        large = {action: self.run_action(*action) for action in actions}
+
+        for action in actions:
+            with self.subTest(action=f'{action[1].upper()} {action[0]}'):
+                if len(large[action]) > len(small[action]):
+                    repeated = Counter(normalize(sql) for sql in large[action])
+                    offenders = '\n'.join(
+                        f'  {count}x {sql}' for sql, count in repeated.most_common() if count > 1
+                    )
+                    self.fail(
+                        f'{len(small[action])} queries with 1 row, {len(large[action])} with 50. '
+                        f'Repeated statements:\n{offenders}'
+                    )
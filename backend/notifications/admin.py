@@ -1,3 +1,31 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import BroadcastNotification, DeviceToken, EventLogEntry, OutboxMessage
+
+
+@admin.register(DeviceToken)
+class DeviceTokenAdmin(admin.ModelAdmin):
+    list_display = ('user', 'platform', 'is_invalid', 'last_seen_at', 'created_at')
+    list_filter = ('platform', 'is_invalid')
+    search_fields = ('user__username', 'token')
+    raw_id_fields = ('user',)
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'attempts', 'failed', 'available_at', 'created_at')
+    list_filter = ('kind', 'failed')
+    readonly_fields = ('created_at',)
+
+
+@admin.register(BroadcastNotification)
+class BroadcastNotificationAdmin(admin.ModelAdmin):
+    list_display = ('id', 'audience', 'notification_type', 'created_at')
+    list_filter = ('audience', 'notification_type')
+    search_fields = ('message',)
+
+
+@admin.register(EventLogEntry)
+class EventLogEntryAdmin(admin.ModelAdmin):
+    list_display = ('id', 'stream', 'created_at')
+    search_fields = ('stream',)
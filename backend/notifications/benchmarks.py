@@ -0,0 +1,221 @@
+"""
+Benchmarks of the realtime stack.
+
+``run_layer_benchmark`` measures the throughput of the configured channel
+layer. Two rounds are run: ``group_send`` to a group of ``receivers``
+channels, and ``send`` to a single channel. Receivers live in this process
+or, with ``processes``, in forked worker processes, which is what exercises
+a layer shared between Daphne processes. For every round we record the
+messages delivered per second and the p50/p95/max delivery latency.
+
+``run_connect_benchmark`` opens ``connections`` WebSockets with a token
+each through the ASGI application, ``concurrency`` at a time, like clients
+reconnecting after a deploy. It measures the handshake (authentication and
+the consumer's ``connect``) with a cold and then a warm user cache.
+"""
+import asyncio
+import multiprocessing
+import time
+
+from channels.exceptions import ChannelFull
+from channels.layers import channel_layers
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.db import connections
+from rest_framework_simplejwt.tokens import AccessToken
+
+from orders.benchmarks import percentile
+from users.cache import invalidate_users
+
+GROUP = 'bench_layer'
+
+DEFAULT_MESSAGES = 1000
+DEFAULT_RECEIVERS = 10
+DEFAULT_PAYLOAD_BYTES = 200
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_CONNECTIONS = 200
+DEFAULT_CONCURRENCY = 50
+DEFAULT_PATH = '/ws/notifications/'
+
+
+async def _receive(layer, channel, count, timeout):
+    """Receive up to ``count`` messages; returns their latencies and the time of the last one."""
+    latencies = []
+    last = [None]
+
+    async def receive_all():
+        while len(latencies) < count:
+            message = await layer.receive(channel)
+            last[0] = time.time()
+            latencies.append((last[0] - message['sent']) * 1000)
+
+    try:
+        await asyncio.wait_for(receive_all(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    return latencies, last[0]
+
+
+async def _join(layer, group):
+    channel = await layer.new_channel()
+    if group:
+        await layer.group_add(group, channel)
+    return channel
+
+
+def _process_receiver(alias, group, receivers, count, timeout, queue):
+    layer = channel_layers.make_backend(alias)
+
+    async def main():
+        channels = [await _join(layer, group) for _ in range(receivers)]
+        queue.put(('ready', channels))
+        results = await asyncio.gather(*(_receive(layer, channel, count, timeout) for channel in channels))
+        queue.put(('done', results))
+        await layer.close()
+
+    asyncio.run(main())
+
+
+async def _send_all(layer, target, group, messages, payload_bytes):
+    body = 'x' * payload_bytes
+    started = time.time()
+    for seq in range(messages):
+        message = {'type': 'bench.message', 'seq': seq, 'sent': time.time(), 'body': body}
+        if group:
+            await layer.group_send(target, message)
+        else:
+            while True:
+                try:
+                    await layer.send(target, message)
+                    break
+                except ChannelFull:
+                    await asyncio.sleep(0.001)
+        # Let in-process receivers drain their queues between sends.
+        await asyncio.sleep(0)
+    return started, time.time()
+
+
+def _summarize(results, started, sent_at, messages, expected):
+    latencies = [latency for values, _ in results for latency in values]
+    finished = [last for _, last in results if last is not None]
+    elapsed = (max(finished) if finished else time.time()) - started
+    return {
+        'messages': messages,
+        'expected': expected,
+        'delivered': len(latencies),
+        'send_per_s': round(messages / max(sent_at - started, 1e-9)),
+        'delivered_per_s': round(len(latencies) / max(elapsed, 1e-9)),
+        'p50_ms': round(percentile(latencies, 0.50), 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 0.95), 2) if latencies else None,
+        'max_ms': round(max(latencies), 2) if latencies else None,
+    }
+
+
+async def _round_in_process(alias, group, receivers, messages, payload_bytes, timeout):
+    layer = channel_layers.make_backend(alias)
+    try:
+        channels = [await _join(layer, group) for _ in range(receivers)]
+        tasks = [asyncio.ensure_future(_receive(layer, channel, messages, timeout)) for channel in channels]
+        started, sent_at = await _send_all(layer, group or channels[0], group, messages, payload_bytes)
+        results = await asyncio.gather(*tasks)
+    finally:
+        await layer.close()
+    return _summarize(results, started, sent_at, messages, messages * receivers)
+
+
+def _round_in_processes(alias, group, receivers, processes, messages, payload_bytes, timeout):
+    # Forked children must not share the parent's database connections.
+    connections.close_all()
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    per_process = [receivers // processes + (1 if i < receivers % processes else 0) for i in range(processes)]
+    workers = [
+        context.Process(target=_process_receiver, args=(alias, group, count, messages, timeout, queue))
+        for count in per_process if count
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        channels = []
+        for _ in workers:
+            _, names = queue.get(timeout=timeout)
+            channels.extend(names)
+
+        async def send():
+            layer = channel_layers.make_backend(alias)
+            try:
+                return await _send_all(layer, group or channels[0], group, messages, payload_bytes)
+            finally:
+                await layer.close()
+
+        started, sent_at = asyncio.run(send())
+        results = []
+        for _ in workers:
+            _, worker_results = queue.get(timeout=timeout * 2)
+            results.extend(worker_results)
+    finally:
+        for worker in workers:
+            worker.join(timeout)
+            if worker.is_alive():
+                worker.terminate()
+    return _summarize(results, started, sent_at, messages, messages * len(channels))
+
+
+def run_layer_benchmark(alias='default', messages=DEFAULT_MESSAGES, receivers=DEFAULT_RECEIVERS,
+                        processes=0, payload_bytes=DEFAULT_PAYLOAD_BYTES, timeout=DEFAULT_TIMEOUT):
+    results = {}
+    for name, group, count in (('group_send', GROUP, receivers), ('send', None, 1)):
+        if processes:
+            results[name] = _round_in_processes(
+                alias, group, count, min(processes, count), messages, payload_bytes, timeout
+            )
+        else:
+            results[name] = asyncio.run(
+                _round_in_process(alias, group, count, messages, payload_bytes, timeout)
+            )
+    return results
+
+
+async def _storm(application, path, tokens, concurrency, timeout):
+    slots = asyncio.Semaphore(concurrency)
+
+    async def connect(token):
+        async with slots:
+            communicator = WebsocketCommunicator(application, f'{path}?token={token}')
+            started = time.perf_counter()
+            try:
+                connected, _ = await communicator.connect(timeout)
+            except asyncio.TimeoutError:
+                connected = False
+            return communicator, connected, (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(connect(token) for token in tokens))
+    elapsed = time.perf_counter() - started
+    for communicator, connected, _ in results:
+        if connected:
+            await communicator.disconnect()
+    latencies = [latency for _, connected, latency in results if connected]
+    return {
+        'connections': len(tokens),
+        'connected': len(latencies),
+        'connects_per_s': round(len(latencies) / max(elapsed, 1e-9)),
+        'p50_ms': round(percentile(latencies, 0.50), 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 0.95), 2) if latencies else None,
+        'max_ms': round(max(latencies), 2) if latencies else None,
+    }
+
+
+def run_connect_benchmark(connections=DEFAULT_CONNECTIONS, concurrency=DEFAULT_CONCURRENCY,
+                          path=DEFAULT_PATH, timeout=DEFAULT_TIMEOUT):
+    from config.asgi import application
+
+    users = list(get_user_model().objects.filter(is_active=True).order_by('pk')[:connections])
+    if not users:
+        return {}
+    tokens = [str(AccessToken.for_user(users[i % len(users)])) for i in range(connections)]
+    invalidate_users([user.pk for user in users])
+    results = {}
+    for name in ('cold', 'warm'):
+        results[name] = asyncio.run(_storm(application, path, tokens, concurrency, timeout))
+    return results
@@ -1,7 +1,15 @@
 import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 
-class NotificationConsumer(AsyncWebsocketConsumer):
+from .eventlog import EventReplayMixin
+from .sendqueue import BoundedSendMixin
+from .models import BroadcastNotification
+from .fanout import broadcast_group
+from .feed import notification_key
+from .outbox import attach_event_loop
+from .unread import aunread_count
+
+class NotificationConsumer(EventReplayMixin, BoundedSendMixin, AsyncWebsocketConsumer):
     async def connect(self):
         if self.scope["user"].is_anonymous:
             # Reject anonymous users
@@ -9,21 +17,26 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         else:
             self.user_id = str(self.scope["user"].id)
             self.user_group_name = f'user_{self.user_id}'
+            self.broadcast_groups = [
+                broadcast_group(audience)
+                for audience in BroadcastNotification.audiences_for(self.scope["user"])
+            ]
 
-            # Join user group
-            await self.channel_layer.group_add(
-                self.user_group_name,
-                self.channel_name
-            )
+            attach_event_loop()
+            # Join user group and the groups of the user's broadcast audiences
+            for group in [self.user_group_name, *self.broadcast_groups]:
+                await self.channel_layer.group_add(group, self.channel_name)
             await self.accept()
+            # Events missed since the client's last event_id (?since=<id>)
+            await self.replay_missed([self.user_group_name, *self.broadcast_groups])
+            # Initial badge, so clients do not need to list notifications.
+            await self.unread_count({})
 
     async def disconnect(self, close_code):
         if not self.scope["user"].is_anonymous:
-            # Leave user group
-            await self.channel_layer.group_discard(
-                self.user_group_name,
-                self.channel_name
-            )
+            # Leave user and broadcast groups
+            for group in [self.user_group_name, *self.broadcast_groups]:
+                await self.channel_layer.group_discard(group, self.channel_name)
 
     # Receive message from WebSocket
     async def receive(self, text_data):
@@ -33,18 +46,32 @@ class NotificationConsumer(AsyncWebsocketConsumer):
 
     # Receive notification from channel layer
     async def send_notification(self, event):
+        if self.is_replayed(event):
+            return
         message = event['message']
         notification_type = event['notification_type']
         is_read = event['is_read']
         created_at = event['created_at']
         notification_id = event['notification_id']
+        kind = event.get('kind', 'personal')
 
         # Send message to WebSocket
         await self.send(text_data=json.dumps({
             'type': 'notification',
+            'event_id': event.get('event_id'),
             'id': notification_id,
+            'kind': kind,
+            'key': notification_key(kind, notification_id),
             'message': message,
             'notification_type': notification_type,
             'is_read': is_read,
             'created_at': created_at,
+            'unread_count': await aunread_count(self.scope["user"]),
+        }))
+
+    # Unread counter changed (notifications marked read)
+    async def unread_count(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'unread_count',
+            'unread_count': await aunread_count(self.scope["user"]),
         }))
@@ -0,0 +1,120 @@
+"""
+Replay of realtime events to reconnecting WebSocket clients.
+
+Events queued with ``enqueue_channel(..., log=True)`` are also written to
+``EventLogEntry``, in the same transaction, and carry the entry id as
+``event_id``. A client remembers the last ``event_id`` it saw and reconnects
+with ``?since=<id>``; ``EventReplayMixin`` then sends what the consumer's
+groups received since that event, at most ``EVENT_REPLAY_LIMIT`` events.
+
+Ids are allocated when an event is inserted but it only becomes visible
+when its transaction commits, so an event with a lower id than ``since``
+may have committed after the client's last event. Replay therefore starts
+``EVENT_REPLAY_OVERLAP_SECONDS`` before the ``since`` event was created and
+can resend events the client already has; clients skip event ids they have
+seen, and the consumer skips live events it has just replayed
+(``is_replayed``). When more events were missed, or the ``since`` event is
+no longer in the log, the client is told to refetch instead (``replay``
+frame with ``truncated``). Entries older than ``EVENT_LOG_RETENTION_HOURS``
+are deleted with old notifications (``notifications.retention``).
+"""
+import json
+from datetime import timedelta
+from urllib.parse import parse_qs
+
+from channels.consumer import get_handler_name
+from channels.db import database_sync_to_async
+from django.conf import settings
+
+from .models import EventLogEntry
+
+
+def log_events(messages):
+    """
+    Log ``(group, event)`` pairs; returns them with ``event_id`` set on each
+    event, which is what gets sent.
+    """
+    entries = EventLogEntry.objects.bulk_create([
+        EventLogEntry(stream=group, event=event) for group, event in messages
+    ])
+    return [(entry.stream, {**entry.event, 'event_id': entry.pk}) for entry in entries]
+
+
+def missed_events(streams, since, limit=None):
+    """
+    Events of ``streams`` the client may have missed since event ``since``,
+    in id order, and whether some could not be returned (over ``limit``, or
+    ``since`` is no longer in the log).
+    """
+    limit = limit or settings.EVENT_REPLAY_LIMIT
+    since_created_at = EventLogEntry.objects.filter(pk=since).values_list('created_at', flat=True).first()
+    if since_created_at is None:
+        return [], True
+    entries = list(
+        EventLogEntry.objects.filter(
+            stream__in=streams,
+            created_at__gte=since_created_at - timedelta(seconds=settings.EVENT_REPLAY_OVERLAP_SECONDS),
+        )
+        .exclude(pk=since)
+        .order_by('pk')
+        .values_list('pk', 'event')[:limit + 1]
+    )
+    return [{**event, 'event_id': pk} for pk, event in entries[:limit]], len(entries) > limit
+
+
+def since_param(scope):
+    """The ``since`` query parameter of a WebSocket scope, or None."""
+    values = parse_qs(scope.get('query_string', b'').decode('utf8')).get('since')
+    try:
+        since = int(values[0]) if values else None
+    except ValueError:
+        return None
+    return since if since is not None and since >= 0 else None
+
+
+class EventReplayMixin:
+    """
+    For ``AsyncWebsocketConsumer``s: call ``replay_missed(groups)`` after
+    accepting. Replayed events go through the usual handlers; the same event
+    arriving live afterwards is skipped (``is_replayed``, ``send_batch``).
+    """
+    replayed_event_ids = frozenset()
+
+    async def replay_missed(self, groups):
+        """Replay events after ``?since=``; returns ``truncated``, or None without ``since``."""
+        since = since_param(self.scope)
+        if since is None:
+            return None
+        events, truncated = await database_sync_to_async(missed_events)(groups, since)
+        for event in events:
+            handler = getattr(self, get_handler_name(event), None)
+            if handler is not None:
+                await handler(event)
+        self.replayed_event_ids = {event['event_id'] for event in events}
+        await self.send(text_data=json.dumps({
+            'type': 'replay',
+            'since': since,
+            'count': len(events),
+            'truncated': truncated,
+        }))
+        return truncated
+
+    def is_replayed(self, event):
+        """True for a live event that was already sent by ``replay_missed``."""
+        event_id = event.get('event_id')
+        if event_id in self.replayed_event_ids:
+            self.replayed_event_ids.discard(event_id)
+            return True
+        return False
+
+    async def send_batch(self, event):
+        """Send a batch event coalesced by the outbox, without events already replayed."""
+        text = event['text']
+        replayed = [event_id for event_id in event['event_ids'] if self.is_replayed({'event_id': event_id})]
+        if replayed:
+            frame = json.loads(text)
+            frame['events'] = [e for e in frame['events'] if e.get('event_id') not in replayed]
+            if not frame['events']:
+                return
+            text = json.dumps(frame)
+        await self.send(text_data=text)
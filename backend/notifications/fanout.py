@@ -0,0 +1,113 @@
+"""
+Notifications addressed to many users at once.
+
+``broadcast`` stores one ``BroadcastNotification`` for a whole audience
+(see ``notifications.feed``) and queues one ``group_send`` to the
+audience's group, so an order costs the same however many admins there
+are. ``notify_users`` is for personal notifications: it writes all rows
+with one ``bulk_create`` and queues their realtime events as a single
+outbox message. Audience member ids, needed to move the cached unread
+counters, are cached (``audience_member_ids``) and dropped whenever a user
+is saved or deleted.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import BroadcastNotification, Notification
+from .outbox import enqueue_channel
+from .unread import adjust_unread
+
+User = get_user_model()
+
+ROLES = [role for role, _ in User.ROLE_CHOICES]
+
+
+def audience_cache_key(audience):
+    return f'notifications:audience_ids:{audience}'
+
+
+def audience_member_ids(audience):
+    """Ids of the users that receive broadcasts to ``audience``."""
+    key = audience_cache_key(audience)
+    ids = cache.get(key)
+    if ids is None:
+        if audience == BroadcastNotification.STAFF:
+            users = User.objects.filter(Q(is_staff=True) | Q(is_superuser=True))
+        else:
+            users = User.objects.filter(role=audience.removeprefix(BroadcastNotification.ROLE_PREFIX))
+        ids = list(users.order_by('pk').values_list('pk', flat=True))
+        cache.set(key, ids, settings.NOTIFICATION_STAFF_CACHE_TIMEOUT)
+    return ids
+
+
+def staff_recipient_ids():
+    """Ids of the staff and superusers that receive admin notifications."""
+    return audience_member_ids(BroadcastNotification.STAFF)
+
+
+def invalidate_audience_members():
+    cache.delete_many([audience_cache_key(BroadcastNotification.STAFF)] + [
+        audience_cache_key(f'{BroadcastNotification.ROLE_PREFIX}{role}') for role in ROLES
+    ])
+
+
+def broadcast_group(audience):
+    return f'broadcast.{audience}'
+
+
+def realtime_event(notification):
+    """Channel layer event handled by ``NotificationConsumer.send_notification``."""
+    return {
+        'type': 'send_notification',
+        'kind': 'personal',
+        'message': notification.message,
+        'notification_type': notification.notification_type,
+        'is_read': notification.is_read,
+        'created_at': notification.created_at.isoformat(),
+        'notification_id': notification.id,
+    }
+
+
+def broadcast_event(broadcast):
+    return {
+        'type': 'send_notification',
+        'kind': 'broadcast',
+        'message': broadcast.message,
+        'notification_type': broadcast.notification_type,
+        'is_read': False,
+        'created_at': broadcast.created_at.isoformat(),
+        'notification_id': broadcast.id,
+    }
+
+
+def realtime_messages(notifications):
+    return [(f'user_{n.recipient_id}', realtime_event(n)) for n in notifications]
+
+
+def notify_users(user_ids, message, notification_type):
+    """Create one notification per user and queue their realtime events."""
+    notifications = Notification.objects.bulk_create([
+        Notification(recipient_id=user_id, message=message, notification_type=notification_type)
+        for user_id in user_ids
+    ])
+    adjust_unread([n.recipient_id for n in notifications], 1)
+    enqueue_channel(realtime_messages(notifications), log=True)
+    return notifications
+
+
+def broadcast(audience, message, notification_type):
+    """
+    Create one notification for every member of ``audience`` and queue its
+    event. Nothing is stored while the audience is empty.
+    """
+    member_ids = audience_member_ids(audience)
+    if not member_ids:
+        return None
+    notification = BroadcastNotification.objects.create(
+        audience=audience, message=message, notification_type=notification_type
+    )
+    adjust_unread(member_ids, 1)
+    enqueue_channel([(broadcast_group(audience), broadcast_event(notification))], log=True)
+    return notification
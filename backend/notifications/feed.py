@@ -0,0 +1,161 @@
+"""
+Personal and broadcast notifications of one user.
+
+Staff notifications are stored once as ``BroadcastNotification`` rows
+(fan-out on read) instead of one ``Notification`` per recipient. Read state
+is kept per user in ``NotificationReadState``:
+
+* a personal notification is read when ``is_read`` is set or its id is at
+  or below ``personal_read_through``;
+* a broadcast is read when its id is at or below
+  ``broadcasts_read_through`` or a ``BroadcastRead`` marker exists. Markers
+  are only kept above the watermark.
+
+"Mark all as read" therefore only moves the two watermarks, whatever the
+size of the history. They move to the newest ids the client has listed: ids
+are allocated before a transaction commits, so a row with a lower id than
+the newest one visible can still appear afterwards, and a watermark past it
+would mark it read unseen. Clients that do not send their ids get the
+watermarks moved over rows older than ``NOTIFICATION_READ_MARGIN`` seconds,
+and the newer unread ones they can see marked one by one. ``feed`` merges both kinds in a
+single ``UNION ALL`` query, each side using its own index.
+
+Personal and broadcast ids come from different tables and can be equal, so
+clients identify a notification by its ``key``, ``"<kind>:<id>"``.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import BooleanField, Exists, ExpressionWrapper, Max, OuterRef, Q, Value
+from django.utils import timezone
+
+from .models import BroadcastNotification, BroadcastRead, Notification, NotificationReadState
+
+FEED_FIELDS = ('id', 'message', 'notification_type', 'created_at', 'kind', 'read')
+KINDS = ('personal', 'broadcast')
+
+
+def notification_key(kind, pk):
+    """Identifier of a notification that is unique across both kinds."""
+    return f'{kind}:{pk}'
+
+
+def parse_notification_key(key):
+    """``(kind, pk)`` of a ``notification_key``; raises ``ValueError`` if malformed."""
+    kind, _, pk = key.partition(':')
+    if kind not in KINDS:
+        raise ValueError(key)
+    return kind, int(pk)
+
+
+def read_state(user):
+    """The user's ``NotificationReadState``; unsaved (all zero) if there is none yet."""
+    return NotificationReadState.objects.filter(user=user).first() or NotificationReadState(user=user)
+
+
+def visible_broadcasts(user):
+    """Broadcasts of the user's audiences sent since the account was created."""
+    return BroadcastNotification.objects.filter(
+        audience__in=BroadcastNotification.audiences_for(user),
+        created_at__gte=user.date_joined,
+    )
+
+
+def unread_personal(user, state):
+    return user.notifications.filter(is_read=False, pk__gt=state.personal_read_through)
+
+
+def is_personal_read(notification, state):
+    return notification.is_read or notification.pk <= state.personal_read_through
+
+
+def _read_marker(user):
+    return BroadcastRead.objects.filter(user=user, broadcast=OuterRef('pk'))
+
+
+def _unread_broadcasts(user, state):
+    return (
+        visible_broadcasts(user)
+        .filter(pk__gt=state.broadcasts_read_through)
+        .exclude(Exists(_read_marker(user)))
+    )
+
+
+def feed(user):
+    """Values of every notification of ``user``, newest first."""
+    state = read_state(user)
+    personal = (
+        user.notifications.order_by()
+        .annotate(
+            kind=Value('personal'),
+            read=ExpressionWrapper(
+                Q(is_read=True) | Q(pk__lte=state.personal_read_through),
+                output_field=BooleanField(),
+            ),
+        )
+        .values(*FEED_FIELDS)
+    )
+    broadcasts = (
+        visible_broadcasts(user)
+        .order_by()
+        .annotate(
+            kind=Value('broadcast'),
+            read=ExpressionWrapper(
+                Q(pk__lte=state.broadcasts_read_through) | Exists(_read_marker(user)),
+                output_field=BooleanField(),
+            ),
+        )
+        .values(*FEED_FIELDS)
+    )
+    return personal.union(broadcasts, all=True).order_by('-created_at', '-id')
+
+
+def count_unread(user):
+    state = read_state(user)
+    return unread_personal(user, state).count() + _unread_broadcasts(user, state).count()
+
+
+def mark_read(user, ids=(), broadcast_ids=()):
+    """Mark personal ``ids`` and ``broadcast_ids`` read. Returns how many were unread."""
+    state = read_state(user)
+    updated = 0
+    if ids:
+        updated = unread_personal(user, state).filter(pk__in=ids).update(is_read=True)
+    if broadcast_ids:
+        unread = set(_unread_broadcasts(user, state).filter(pk__in=broadcast_ids).values_list('pk', flat=True))
+        BroadcastRead.objects.bulk_create(
+            [BroadcastRead(user=user, broadcast_id=pk) for pk in unread], ignore_conflicts=True
+        )
+        updated += len(unread)
+    return updated
+
+
+def _latest_pk(queryset):
+    return queryset.aggregate(latest=Max('pk'))['latest'] or 0
+
+
+def mark_all_read(user, personal_through=None, broadcasts_through=None):
+    """
+    Mark every notification of ``user`` up to ``personal_through`` and
+    ``broadcasts_through`` (the newest ids the client listed) read. Without
+    them, the watermarks only pass rows older than the commit margin and the
+    newer visible ones are marked individually. Watermarks never move back.
+    """
+    state = read_state(user)
+    if personal_through is None or broadcasts_through is None:
+        settled = timezone.now() - timedelta(seconds=settings.NOTIFICATION_READ_MARGIN)
+        personal_through = _latest_pk(user.notifications.filter(created_at__lte=settled))
+        broadcasts_through = _latest_pk(visible_broadcasts(user).filter(created_at__lte=settled))
+        recent = set(_unread_broadcasts(user, state).filter(created_at__gt=settled).values_list('pk', flat=True))
+        BroadcastRead.objects.bulk_create(
+            [BroadcastRead(user=user, broadcast_id=pk) for pk in recent], ignore_conflicts=True
+        )
+        unread_personal(user, state).filter(created_at__gt=settled).update(is_read=True)
+    personal_through = max(personal_through, state.personal_read_through)
+    broadcasts_through = max(broadcasts_through, state.broadcasts_read_through)
+    NotificationReadState.objects.update_or_create(
+        user=user,
+        defaults={'personal_read_through': personal_through, 'broadcasts_read_through': broadcasts_through},
+    )
+    # Markers at or below the watermark say nothing anymore.
+    BroadcastRead.objects.filter(user=user, broadcast_id__lte=broadcasts_through).delete()
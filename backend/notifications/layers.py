@@ -0,0 +1,495 @@
+"""
+Channel layer backed by the project's Postgres database.
+
+``InMemoryChannelLayer`` only reaches consumers of its own process. This
+layer lets several Daphne processes share groups without running Redis:
+
+* Each process (each event loop, strictly) LISTENs on a Postgres channel of
+  its own. Names from ``new_channel`` embed it (``specific.<client>!<id>``),
+  so ``send`` is one ``pg_notify`` to the owning process.
+* Every group maps to one Postgres channel, which a process LISTENs on while
+  it has local members. ``group_send`` is therefore a single ``pg_notify``
+  however many processes and members there are.
+* NOTIFY payloads must stay under 8000 bytes. Larger messages are stored in
+  ``ChannelLayerMessage`` and the notification carries only the row id.
+  Messages to normal channels (without ``!``) are stored there as well and
+  claimed once with ``SKIP LOCKED``.
+* Received messages wait in local queues bounded by ``capacity`` (or the
+  matching ``channel_capacity``) and are dropped after ``expiry`` seconds.
+  Group memberships end after ``group_expiry`` seconds, or as soon as a
+  message to the channel expires unread, as in the in-memory layer.
+
+Messages are JSON (bytes values are base64 encoded). Enable it with
+``CHANNEL_LAYER_BACKEND=postgres``; it needs psycopg2.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+
+import psycopg2
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer
+from django.db import connections
+
+from .models import ChannelLayerMessage
+
+logger = logging.getLogger(__name__)
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more.
+NOTIFY_PAYLOAD_LIMIT = 7900
+
+# Seconds between sweeps of expired queued messages and stored rows.
+CLEAN_INTERVAL = 30
+
+# Normal-channel receivers poll this often in case a wake-up was missed.
+CLAIM_POLL_INTERVAL = 1.0
+
+RECONNECT_DELAY = 1.0
+
+
+def _encode_bytes(value):
+    if isinstance(value, bytes):
+        return {'__bytes__': base64.b64encode(value).decode('ascii')}
+    raise TypeError(f'{type(value).__name__} is not serializable in a channel message')
+
+
+def _decode_bytes(obj):
+    if len(obj) == 1 and '__bytes__' in obj:
+        return base64.b64decode(obj['__bytes__'])
+    return obj
+
+
+def dumps(envelope):
+    return json.dumps(envelope, default=_encode_bytes, separators=(',', ':'))
+
+
+def loads(text):
+    return json.loads(text, object_hook=_decode_bytes)
+
+
+def client_of(channel):
+    """The process part of a specific channel name (``specific.<client>!<id>``)."""
+    return channel[:channel.index('!')].rsplit('.', 1)[-1]
+
+
+class _Database:
+    """
+    Autocommit connection used to publish and claim messages. All calls run
+    on one dedicated thread, so the connection is never shared.
+    """
+    def __init__(self, alias):
+        self.alias = alias
+        self.table = ChannelLayerMessage._meta.db_table
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='channel-layer')
+        self.conn = None
+        self._next_clean = 0
+
+    def run(self, fn, *args):
+        return asyncio.get_running_loop().run_in_executor(self.executor, self._call, fn, args)
+
+    def _call(self, fn, args):
+        if self.conn is None or self.conn.closed:
+            self.conn = connect(self.alias)
+        try:
+            return fn(self.conn.cursor(), *args)
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            # Connection lost: reconnect and try once more.
+            self.close_connection()
+            self.conn = connect(self.alias)
+            return fn(self.conn.cursor(), *args)
+
+    def publish(self, cursor, pg_channel, text, expires):
+        if len(text.encode()) > NOTIFY_PAYLOAD_LIMIT:
+            cursor.execute(
+                f'INSERT INTO {self.table} (channel, payload, expires_at) '
+                f'VALUES (%s, %s, to_timestamp(%s)) RETURNING id',
+                ['', text, expires],
+            )
+            text = dumps({'r': cursor.fetchone()[0]})
+        cursor.execute('SELECT pg_notify(%s, %s)', [pg_channel, text])
+        self._clean(cursor)
+
+    def enqueue(self, cursor, channel, text, expires, capacity, pg_channel):
+        cursor.execute(
+            f'SELECT count(*) FROM {self.table} WHERE channel = %s AND expires_at > now()', [channel]
+        )
+        if cursor.fetchone()[0] >= capacity:
+            return False
+        cursor.execute(
+            f'INSERT INTO {self.table} (channel, payload, expires_at) VALUES (%s, %s, to_timestamp(%s))',
+            [channel, text, expires],
+        )
+        cursor.execute('SELECT pg_notify(%s, %s)', [pg_channel, ''])
+        return True
+
+    def claim(self, cursor, channel):
+        cursor.execute(
+            f'DELETE FROM {self.table} WHERE id = ('
+            f'SELECT id FROM {self.table} WHERE channel = %s AND expires_at > now() '
+            f'ORDER BY id LIMIT 1 FOR UPDATE SKIP LOCKED) RETURNING payload',
+            [channel],
+        )
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    def fetch(self, cursor, pk):
+        cursor.execute(f'SELECT payload FROM {self.table} WHERE id = %s AND expires_at > now()', [pk])
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    def flush(self, cursor):
+        cursor.execute(f'DELETE FROM {self.table}')
+
+    def _clean(self, cursor):
+        now = time.monotonic()
+        if now >= self._next_clean:
+            self._next_clean = now + CLEAN_INTERVAL
+            cursor.execute(f'DELETE FROM {self.table} WHERE expires_at <= now()')
+
+    def close_connection(self):
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+            self.conn = None
+
+
+def connect(alias):
+    """New raw autocommit psycopg2 connection with the settings of ``alias``."""
+    wrapper = connections.create_connection(alias)
+    conn = wrapper.get_new_connection(wrapper.get_connection_params())
+    conn.autocommit = True
+    return conn
+
+
+class _Listener:
+    """
+    State of one event loop: its LISTEN connection, the queues of its
+    channels and the groups they belong to.
+    """
+    def __init__(self, layer, loop):
+        self.layer = layer
+        self.loop = loop
+        self.client = uuid.uuid4().hex[:12]
+        self.process_channel = layer.pg_channel('p', self.client)
+        self.queues = {}
+        self.groups = {}
+        self.wakeups = {}
+        # Postgres channel: future of its LISTEN command.
+        self.listening = {}
+        self.conn = None
+        self.ready = loop.create_future()
+        self.closed = False
+
+    async def start(self):
+        try:
+            await self._connect()
+            await self._listen(self.process_channel)
+            self.loop.call_later(CLEAN_INTERVAL, self._clean_expired)
+        except BaseException as exc:
+            self.ready.set_exception(exc)
+            raise
+        self.ready.set_result(True)
+
+    async def _connect(self):
+        self.conn = await self.loop.run_in_executor(self.layer.db.executor, connect, self.layer.alias)
+        self.loop.add_reader(self.conn.fileno(), self._on_readable)
+
+    def _execute(self, sql):
+        """
+        Run ``sql`` on the LISTEN connection in the layer's executor, never on
+        the loop. Commands run one at a time and in order, so an UNLISTEN
+        cannot overtake the LISTEN before it.
+        """
+        conn = self.conn
+        future = self.loop.run_in_executor(self.layer.db.executor, lambda: conn.cursor().execute(sql))
+        future.add_done_callback(lambda done: self._executed(sql, done))
+        return future
+
+    def _executed(self, sql, future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error('%s failed', sql, exc_info=future.exception())
+        # Notifications read while the command ran did not wake the reader.
+        self._handle_notifies()
+
+    def _listen(self, pg_channel):
+        """LISTEN on ``pg_channel`` once; returns a future that is done when it is active."""
+        future = self.listening.get(pg_channel)
+        if future is None:
+            future = self.listening[pg_channel] = self._execute(f'LISTEN "{pg_channel}"')
+        return future
+
+    def _unlisten(self, pg_channel):
+        if self.listening.pop(pg_channel, None) is not None:
+            self._execute(f'UNLISTEN "{pg_channel}"')
+
+    def _on_readable(self):
+        try:
+            self.conn.poll()
+        except Exception:
+            logger.exception('Channel layer lost its LISTEN connection')
+            self.loop.remove_reader(self.conn.fileno())
+            self.loop.create_task(self._reconnect())
+            return
+        self._handle_notifies()
+
+    def _handle_notifies(self):
+        if self.conn is None or self.conn.closed:
+            return
+        while self.conn.notifies:
+            notify = self.conn.notifies.pop(0)
+            try:
+                self._handle(notify.channel, notify.payload)
+            except Exception:
+                logger.exception('Could not handle a channel layer message')
+
+    async def _reconnect(self):
+        listening = list(self.listening)
+        while not self.closed:
+            try:
+                await self._connect()
+                self.listening = {}
+                await asyncio.gather(*(self._listen(pg_channel) for pg_channel in listening))
+                # Normal-channel receivers re-check the table.
+                for event in self.wakeups.values():
+                    event.set()
+                return
+            except Exception:
+                logger.exception('Channel layer could not reconnect')
+                await asyncio.sleep(RECONNECT_DELAY)
+
+    def _handle(self, pg_channel, payload):
+        event = self.wakeups.get(pg_channel)
+        if event is not None:
+            event.set()
+            return
+        envelope = loads(payload)
+        if 'r' in envelope:
+            self.loop.create_task(self._fetch(envelope['r']))
+        else:
+            self._deliver(envelope)
+
+    async def _fetch(self, pk):
+        text = await self.layer.db.run(self.layer.db.fetch, pk)
+        if text is not None:
+            self._deliver(loads(text))
+
+    def _deliver(self, envelope):
+        kind, name, expires = envelope['k'], envelope['n'], envelope['x']
+        if kind == 'a':
+            self.add(name, envelope['c'])
+        elif kind == 'd':
+            self.discard(name, envelope['c'])
+        elif expires < time.time():
+            return
+        elif kind == 'c':
+            self.put(name, expires, envelope['m'])
+        elif kind == 'g':
+            members = list(self.groups.get(name, ()))
+            for index, channel in enumerate(members):
+                message = envelope['m'] if index == 0 else deepcopy(envelope['m'])
+                self.put(channel, expires, message)
+
+    def put(self, channel, expires, message):
+        queue = self.queues.setdefault(channel, asyncio.Queue())
+        if queue.qsize() >= self.layer.get_capacity(channel):
+            logger.warning('Channel %s is full; message dropped', channel)
+            return
+        queue.put_nowait((expires, message))
+
+    async def receive(self, channel):
+        queue = self.queues.setdefault(channel, asyncio.Queue())
+        try:
+            while True:
+                expires, message = await queue.get()
+                if expires >= time.time():
+                    return message
+        finally:
+            if queue.empty() and self.queues.get(channel) is queue:
+                self.queues.pop(channel, None)
+
+    async def claim(self, channel):
+        pg_channel = self.layer.pg_channel('q', channel)
+        event = self.wakeups.setdefault(pg_channel, asyncio.Event())
+        await self._listen(pg_channel)
+        while True:
+            event.clear()
+            text = await self.layer.db.run(self.layer.db.claim, channel)
+            if text is not None:
+                return loads(text)['m']
+            try:
+                await asyncio.wait_for(event.wait(), CLAIM_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    def add(self, group, channel):
+        """Add ``channel`` to ``group``; returns the future of the group's LISTEN."""
+        self.groups.setdefault(group, {})[channel] = time.time()
+        return self._listen(self.layer.pg_channel('g', group))
+
+    def discard(self, group, channel):
+        members = self.groups.get(group)
+        if members is None:
+            return
+        members.pop(channel, None)
+        if not members:
+            del self.groups[group]
+            self._unlisten(self.layer.pg_channel('g', group))
+
+    def _clean_expired(self):
+        if self.closed:
+            return
+        now = time.time()
+        for channel, queue in list(self.queues.items()):
+            expired = False
+            while not queue.empty() and queue._queue[0][0] < now:
+                queue.get_nowait()
+                expired = True
+            if expired:
+                # Nobody is reading it: take it out of its groups.
+                for group in [g for g, members in self.groups.items() if channel in members]:
+                    self.discard(group, channel)
+            if queue.empty():
+                self.queues.pop(channel, None)
+        joined_before = now - self.layer.group_expiry
+        for group, members in list(self.groups.items()):
+            for channel, joined in list(members.items()):
+                if joined < joined_before:
+                    self.discard(group, channel)
+        self.loop.call_later(CLEAN_INTERVAL, self._clean_expired)
+
+    def flush(self):
+        self.queues = {}
+        for group in list(self.groups):
+            self._unlisten(self.layer.pg_channel('g', group))
+        self.groups = {}
+
+    def close(self):
+        self.closed = True
+        if self.conn is not None:
+            self.loop.remove_reader(self.conn.fileno())
+            self.conn.close()
+
+
+class PostgresChannelLayer(BaseChannelLayer):
+    extensions = ['groups', 'flush']
+
+    def __init__(self, alias='default', prefix='channels', expiry=60, group_expiry=86400,
+                 capacity=100, channel_capacity=None, **kwargs):
+        super().__init__(expiry=expiry, capacity=capacity, channel_capacity=channel_capacity, **kwargs)
+        self.channel_capacity = self.compile_capacities(self.channel_capacity)
+        self.alias = alias
+        self.prefix = prefix
+        self.group_expiry = group_expiry
+        self.db = _Database(alias)
+        self._listeners = {}
+        self._lock = threading.Lock()
+
+    def pg_channel(self, kind, name):
+        """Postgres channel of a process (p), group (g) or normal channel (q)."""
+        digest = hashlib.sha1(name.encode()).hexdigest()[:24]
+        return f'{self.prefix}_{kind}_{digest}'
+
+    async def _listener(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            listener = self._listeners.get(loop)
+            created = listener is None
+            if created:
+                listener = self._listeners[loop] = _Listener(self, loop)
+        if created:
+            try:
+                await listener.start()
+            except BaseException:
+                with self._lock:
+                    self._listeners.pop(loop, None)
+                raise
+        else:
+            await listener.ready
+        return listener
+
+    def _envelope(self, kind, name, **extra):
+        return {'k': kind, 'n': name, 'x': time.time() + self.expiry, **extra}
+
+    async def _publish(self, pg_channel, envelope):
+        await self.db.run(self.db.publish, pg_channel, dumps(envelope), envelope['x'])
+
+    async def new_channel(self, prefix='specific'):
+        listener = await self._listener()
+        return f'{prefix}.{listener.client}!{uuid.uuid4().hex[:12]}'
+
+    async def send(self, channel, message):
+        assert isinstance(message, dict), 'message is not a dict'
+        self.require_valid_channel_name(channel)
+        envelope = self._envelope('c', channel, m=message)
+        if '!' in channel:
+            await self._publish(self.pg_channel('p', client_of(channel)), envelope)
+            return
+        queued = await self.db.run(
+            self.db.enqueue, channel, dumps(envelope), envelope['x'],
+            self.get_capacity(channel), self.pg_channel('q', channel),
+        )
+        if not queued:
+            raise ChannelFull(channel)
+
+    async def receive(self, channel):
+        self.require_valid_channel_name(channel)
+        listener = await self._listener()
+        if '!' in channel:
+            if client_of(channel) != listener.client:
+                raise ValueError(f'{channel} belongs to another process or event loop')
+            return await listener.receive(channel)
+        return await listener.claim(channel)
+
+    async def group_add(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        await self._membership('a', group, channel)
+
+    async def group_discard(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        await self._membership('d', group, channel)
+
+    async def _membership(self, kind, group, channel):
+        if '!' not in channel:
+            raise TypeError('Groups of the Postgres layer hold process-specific channels only')
+        client = client_of(channel)
+        listener = self._listeners.get(asyncio.get_running_loop())
+        if listener is not None and listener.client == client:
+            await listener.ready
+            if kind == 'a':
+                # Messages to the group are only seen once LISTEN is active.
+                await listener.add(group, channel)
+            else:
+                listener.discard(group, channel)
+        else:
+            # The owning process keeps the membership; tell it.
+            await self._publish(self.pg_channel('p', client), self._envelope(kind, group, c=channel))
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), 'message is not a dict'
+        self.require_valid_group_name(group)
+        await self._publish(self.pg_channel('g', group), self._envelope('g', group, m=message))
+
+    async def flush(self):
+        with self._lock:
+            listeners = list(self._listeners.values())
+        for listener in listeners:
+            listener.flush()
+        await self.db.run(self.db.flush)
+
+    async def close(self):
+        with self._lock:
+            listeners, self._listeners = list(self._listeners.values()), {}
+        for listener in listeners:
+            listener.close()
+        await asyncio.get_running_loop().run_in_executor(self.db.executor, self.db.close_connection)
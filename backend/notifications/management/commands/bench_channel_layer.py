@@ -0,0 +1,63 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from notifications.benchmarks import (
+    DEFAULT_MESSAGES,
+    DEFAULT_PAYLOAD_BYTES,
+    DEFAULT_RECEIVERS,
+    DEFAULT_TIMEOUT,
+    run_layer_benchmark,
+)
+
+
+class Command(BaseCommand):
+    help = 'Measure throughput and delivery latency of the configured channel layer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--layer', default='default', help='Alias in CHANNEL_LAYERS')
+        parser.add_argument('--messages', type=int, default=DEFAULT_MESSAGES, help='Messages sent per round')
+        parser.add_argument('--receivers', type=int, default=DEFAULT_RECEIVERS, help='Channels in the group')
+        parser.add_argument(
+            '--processes', type=int, default=0,
+            help='Run the receivers in this many worker processes (0: in this process)',
+        )
+        parser.add_argument('--payload-bytes', type=int, default=DEFAULT_PAYLOAD_BYTES)
+        parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='Seconds to wait for deliveries')
+        parser.add_argument('--output', help='Write the results to this JSON file')
+
+    def handle(self, *args, **options):
+        if options['layer'] not in settings.CHANNEL_LAYERS:
+            raise CommandError(f"No channel layer named {options['layer']!r}")
+        if options['receivers'] < 1 or options['messages'] < 1:
+            raise CommandError('--receivers and --messages must be at least 1')
+
+        self.stdout.write(f"Backend: {settings.CHANNEL_LAYERS[options['layer']]['BACKEND']}")
+        results = run_layer_benchmark(
+            alias=options['layer'],
+            messages=options['messages'],
+            receivers=options['receivers'],
+            processes=options['processes'],
+            payload_bytes=options['payload_bytes'],
+            timeout=options['timeout'],
+        )
+
+        self.stdout.write(
+            f"{'round':<12}{'delivered':>12}{'send/s':>10}{'recv/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<12}{result['delivered']:>6}/{result['expected']:<5}{result['send_per_s']:>10}"
+                f"{result['delivered_per_s']:>10}{result['p50_ms']!s:>10}{result['p95_ms']!s:>10}{result['max_ms']!s:>10}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        lost = sum(result['expected'] - result['delivered'] for result in results.values())
+        if lost:
+            raise CommandError(f'{lost} messages were not delivered (single-process layer with --processes?)')
+        self.stdout.write(self.style.SUCCESS('All messages delivered'))
@@ -0,0 +1,52 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from notifications.benchmarks import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_CONNECTIONS,
+    DEFAULT_PATH,
+    DEFAULT_TIMEOUT,
+    run_connect_benchmark,
+)
+
+
+class Command(BaseCommand):
+    help = 'Measure WebSocket connection setup under a storm of token-authenticated connects'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=DEFAULT_CONNECTIONS, help='Sockets opened per round')
+        parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Handshakes in flight at once')
+        parser.add_argument('--path', default=DEFAULT_PATH, help='WebSocket path, e.g. /ws/orders/')
+        parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='Seconds to wait for one handshake')
+        parser.add_argument('--output', help='Write the results to this JSON file')
+
+    def handle(self, *args, **options):
+        if options['connections'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--connections and --concurrency must be at least 1')
+
+        results = run_connect_benchmark(
+            connections=options['connections'],
+            concurrency=options['concurrency'],
+            path=options['path'],
+            timeout=options['timeout'],
+        )
+        if not results:
+            raise CommandError('No active users to connect as (run seed_bench first)')
+
+        self.stdout.write(f"{'round':<8}{'connected':>14}{'conn/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<8}{result['connected']:>8}/{result['connections']:<5}{result['connects_per_s']:>10}"
+                f"{result['p50_ms']!s:>10}{result['p95_ms']!s:>10}{result['max_ms']!s:>10}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        failed = sum(result['connections'] - result['connected'] for result in results.values())
+        if failed:
+            raise CommandError(f'{failed} connections were not accepted')
+        self.stdout.write(self.style.SUCCESS('All connections accepted'))
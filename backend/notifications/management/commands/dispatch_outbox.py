@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from notifications.models import OutboxMessage
+from notifications.outbox import dispatch_pending
+
+
+class Command(BaseCommand):
+    help = 'Deliver pending outbox messages (channel layer and push notifications)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--loop', action='store_true', help='Keep dispatching until interrupted')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Seconds to wait between passes with --loop')
+        parser.add_argument('--retry-failed', action='store_true',
+                            help='Give messages that ran out of attempts another round first')
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            revived = OutboxMessage.objects.filter(failed=True).update(failed=False, attempts=0)
+            self.stdout.write(f'Requeued {revived} failed messages')
+
+        if not options['loop']:
+            processed = dispatch_pending(options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Processed {processed} outbox messages'))
+            return
+
+        while True:
+            try:
+                processed = dispatch_pending(options['batch_size'])
+            finally:
+                close_old_connections()
+            if processed:
+                self.stdout.write(f'Processed {processed} outbox messages')
+            time.sleep(options['interval'])
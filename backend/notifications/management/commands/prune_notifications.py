@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from notifications.retention import prune_notifications
+
+
+class Command(BaseCommand):
+    help = 'Delete notifications past their retention period in batches (run daily from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.NOTIFICATION_PRUNE_BATCH_SIZE,
+            help='Rows deleted per statement',
+        )
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between full batches')
+
+    def handle(self, *args, **options):
+        deleted = prune_notifications(batch_size=options['batch_size'], pause=options['pause'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted['read']} read and {deleted['unread']} unread notifications, "
+            f"{deleted['broadcast']} broadcasts and {deleted['events']} logged events"
+        ))
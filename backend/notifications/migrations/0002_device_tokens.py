@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-19 07:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeviceToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=255, unique=True, verbose_name='Token')),
+                ('platform', models.CharField(blank=True, max_length=20, verbose_name='Platform')),
+                ('is_invalid', models.BooleanField(default=False, verbose_name='Is Invalid')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('last_seen_at', models.DateTimeField(auto_now=True, verbose_name='Last Seen At')),
+                ('invalidated_at', models.DateTimeField(blank=True, null=True, verbose_name='Invalidated At')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='device_tokens', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Device Token',
+                'verbose_name_plural': 'Device Tokens',
+                'ordering': ['-last_seen_at'],
+                'indexes': [models.Index(fields=['user', 'is_invalid'], name='notificatio_user_id_f5e46a_idx')],
+            },
+        ),
+    ]
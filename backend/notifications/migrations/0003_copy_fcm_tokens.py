@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+def copy_fcm_tokens(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    DeviceToken = apps.get_model('notifications', 'DeviceToken')
+    users = User.objects.exclude(fcm_token__isnull=True).exclude(fcm_token='').values_list('id', 'fcm_token')
+    DeviceToken.objects.bulk_create(
+        [DeviceToken(user_id=user_id, token=token) for user_id, token in users.iterator()],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_device_tokens'),
+        ('users', '0005_alter_user_options'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_fcm_tokens, migrations.RunPython.noop),
+    ]
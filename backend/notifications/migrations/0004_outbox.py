@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-19 07:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_copy_fcm_tokens'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('channel', 'Channel Layer'), ('push', 'Push Notification')], max_length=20, verbose_name='Kind')),
+                ('payload', models.JSONField(verbose_name='Payload')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Attempts')),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Available At')),
+                ('failed', models.BooleanField(default=False, verbose_name='Failed')),
+                ('last_error', models.TextField(blank=True, verbose_name='Last Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+            ],
+            options={
+                'verbose_name': 'Outbox Message',
+                'verbose_name_plural': 'Outbox Messages',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['failed', 'available_at'], name='notificatio_failed_dc4ba8_idx')],
+            },
+        ),
+    ]
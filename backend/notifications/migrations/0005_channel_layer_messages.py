@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-19 07:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChannelLayerMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(blank=True, max_length=100, verbose_name='Channel')),
+                ('payload', models.TextField(verbose_name='Payload')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='Expires At')),
+            ],
+            options={
+                'verbose_name': 'Channel Layer Message',
+                'verbose_name_plural': 'Channel Layer Messages',
+                'indexes': [models.Index(fields=['channel', 'id'], name='notificatio_channel_eb91bc_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-19 07:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_channel_layer_messages'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'is_read'], name='notificatio_recipie_4e3567_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.8 on 2026-10-19 07:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0006_notification_unread_index'),
+        ('users', '0005_alter_user_options'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationReadState',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_read_state', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='User')),
+                ('broadcasts_read_through', models.BigIntegerField(default=0, verbose_name='Broadcasts Read Through')),
+            ],
+            options={
+                'verbose_name': 'Notification Read State',
+                'verbose_name_plural': 'Notification Read States',
+            },
+        ),
+        migrations.CreateModel(
+            name='BroadcastNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('audience', models.CharField(help_text="'staff' or 'role.<role>', e.g. role.bodeguero", max_length=50, verbose_name='Audience')),
+                ('message', models.TextField(verbose_name='Message')),
+                ('notification_type', models.CharField(max_length=50, verbose_name='Notification Type')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+            ],
+            options={
+                'verbose_name': 'Broadcast Notification',
+                'verbose_name_plural': 'Broadcast Notifications',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['audience', 'created_at'], name='notificatio_audienc_2ee147_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BroadcastRead',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('read_at', models.DateTimeField(auto_now_add=True, verbose_name='Read At')),
+                ('broadcast', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reads', to='notifications.broadcastnotification', verbose_name='Broadcast')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='broadcast_reads', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Broadcast Read',
+                'verbose_name_plural': 'Broadcast Reads',
+                'constraints': [models.UniqueConstraint(fields=('user', 'broadcast'), name='unique_broadcast_read')],
+            },
+        ),
+    ]
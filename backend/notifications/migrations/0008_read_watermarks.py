@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-19 07:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0007_broadcast_notifications'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationreadstate',
+            name='personal_read_through',
+            field=models.BigIntegerField(default=0, verbose_name='Personal Read Through'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['created_at'], name='notificatio_created_46ad24_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-19 07:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0008_read_watermarks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventLogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stream', models.CharField(max_length=100, verbose_name='Stream')),
+                ('event', models.JSONField(verbose_name='Event')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Created At')),
+            ],
+            options={
+                'verbose_name': 'Event Log Entry',
+                'verbose_name_plural': 'Event Log Entries',
+                'indexes': [models.Index(fields=['stream', 'id'], name='notificatio_stream_ea4b13_idx')],
+            },
+        ),
+    ]
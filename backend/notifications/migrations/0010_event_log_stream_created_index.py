@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-19 07:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0009_event_log'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='eventlogentry',
+            name='notificatio_stream_ea4b13_idx',
+        ),
+        migrations.AddIndex(
+            model_name='eventlogentry',
+            index=models.Index(fields=['stream', 'created_at'], name='notificatio_stream_80c179_idx'),
+        ),
+    ]
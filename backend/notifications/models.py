@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 class Notification(models.Model):
     recipient = models.ForeignKey(
@@ -21,6 +22,198 @@ class Notification(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Notification'
         verbose_name_plural = 'Notifications'
+        indexes = [
+            models.Index(fields=['recipient', 'is_read']),
+            # Retention pruning (notifications.retention)
+            models.Index(fields=['created_at']),
+        ]
 
     def __str__(self):
-        return f"Notification for {self.recipient.email} - {self.notification_type}"
\ No newline at end of file
+        return f"Notification for {self.recipient.email} - {self.notification_type}"
+
+class DeviceToken(models.Model):
+    """
+    Push notification token of one device. A user can have several; tokens
+    that Firebase reports as unregistered are flagged invalid and skipped.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='device_tokens',
+        verbose_name='User'
+    )
+    token = models.CharField(max_length=255, unique=True, verbose_name='Token')
+    platform = models.CharField(max_length=20, blank=True, verbose_name='Platform')
+    is_invalid = models.BooleanField(default=False, verbose_name='Is Invalid')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Created At')
+    last_seen_at = models.DateTimeField(auto_now=True, verbose_name='Last Seen At')
+    invalidated_at = models.DateTimeField(blank=True, null=True, verbose_name='Invalidated At')
+
+    class Meta:
+        ordering = ['-last_seen_at']
+        verbose_name = 'Device Token'
+        verbose_name_plural = 'Device Tokens'
+        indexes = [
+            models.Index(fields=['user', 'is_invalid']),
+        ]
+
+    def __str__(self):
+        return f"{self.platform or 'device'} token for user {self.user_id}"
+
+class OutboxMessage(models.Model):
+    """
+    Channel-layer or push message written in the same transaction as the
+    change that caused it and delivered after commit by ``notifications.outbox``.
+    Delivered messages are deleted; ``failed`` ones ran out of attempts.
+    """
+    class Kind(models.TextChoices):
+        CHANNEL = 'channel', 'Channel Layer'
+        PUSH = 'push', 'Push Notification'
+
+    kind = models.CharField(max_length=20, choices=Kind.choices, verbose_name='Kind')
+    payload = models.JSONField(verbose_name='Payload')
+    attempts = models.PositiveIntegerField(default=0, verbose_name='Attempts')
+    available_at = models.DateTimeField(default=timezone.now, verbose_name='Available At')
+    failed = models.BooleanField(default=False, verbose_name='Failed')
+    last_error = models.TextField(blank=True, verbose_name='Last Error')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Created At')
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Outbox Message'
+        verbose_name_plural = 'Outbox Messages'
+        indexes = [
+            models.Index(fields=['failed', 'available_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} message #{self.pk}"
+
+class ChannelLayerMessage(models.Model):
+    """
+    Message of ``notifications.layers.PostgresChannelLayer`` that does not fit
+    in a NOTIFY payload, or that waits on a normal (not process-specific)
+    channel. ``channel`` is empty for the former.
+    """
+    channel = models.CharField(max_length=100, blank=True, verbose_name='Channel')
+    payload = models.TextField(verbose_name='Payload')
+    expires_at = models.DateTimeField(db_index=True, verbose_name='Expires At')
+
+    class Meta:
+        verbose_name = 'Channel Layer Message'
+        verbose_name_plural = 'Channel Layer Messages'
+        indexes = [
+            models.Index(fields=['channel', 'id']),
+        ]
+
+    def __str__(self):
+        return f"Channel layer message #{self.pk}"
+
+class BroadcastNotification(models.Model):
+    """
+    Notification addressed to an audience (all staff, or every user of a
+    role) and stored once. Each user's read state lives in
+    ``NotificationReadState`` and ``BroadcastRead``.
+    """
+    STAFF = 'staff'
+    ROLE_PREFIX = 'role.'
+
+    audience = models.CharField(
+        max_length=50,
+        verbose_name='Audience',
+        help_text="'staff' or 'role.<role>', e.g. role.bodeguero"
+    )
+    message = models.TextField(verbose_name='Message')
+    notification_type = models.CharField(max_length=50, verbose_name='Notification Type')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Created At')
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Broadcast Notification'
+        verbose_name_plural = 'Broadcast Notifications'
+        indexes = [
+            models.Index(fields=['audience', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Broadcast to {self.audience} - {self.notification_type}"
+
+    @classmethod
+    def audiences_for(cls, user):
+        """Audiences whose broadcasts ``user`` receives."""
+        audiences = [f'{cls.ROLE_PREFIX}{user.role}']
+        if user.is_staff or user.is_superuser:
+            audiences.append(cls.STAFF)
+        return audiences
+
+
+class NotificationReadState(models.Model):
+    """
+    Read watermarks of one user: every personal notification with an id up
+    to ``personal_read_through`` and every broadcast up to
+    ``broadcasts_read_through`` counts as read.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='notification_read_state',
+        verbose_name='User'
+    )
+    personal_read_through = models.BigIntegerField(default=0, verbose_name='Personal Read Through')
+    broadcasts_read_through = models.BigIntegerField(default=0, verbose_name='Broadcasts Read Through')
+
+    class Meta:
+        verbose_name = 'Notification Read State'
+        verbose_name_plural = 'Notification Read States'
+
+    def __str__(self):
+        return f"Read state of user {self.user_id}"
+
+
+class BroadcastRead(models.Model):
+    """Broadcast read individually, above the user's watermark."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='broadcast_reads',
+        verbose_name='User'
+    )
+    broadcast = models.ForeignKey(
+        BroadcastNotification,
+        on_delete=models.CASCADE,
+        related_name='reads',
+        verbose_name='Broadcast'
+    )
+    read_at = models.DateTimeField(auto_now_add=True, verbose_name='Read At')
+
+    class Meta:
+        verbose_name = 'Broadcast Read'
+        verbose_name_plural = 'Broadcast Reads'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'broadcast'], name='unique_broadcast_read'),
+        ]
+
+    def __str__(self):
+        return f"Broadcast {self.broadcast_id} read by user {self.user_id}"
+
+
+class EventLogEntry(models.Model):
+    """
+    Realtime event sent to ``stream`` (a channel-layer group), kept for
+    ``EVENT_LOG_RETENTION_HOURS`` so reconnecting clients can replay what they
+    missed (``notifications.eventlog``). Its id is the event's ``event_id``.
+    """
+    stream = models.CharField(max_length=100, verbose_name='Stream')
+    event = models.JSONField(verbose_name='Event')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Created At')
+
+    class Meta:
+        verbose_name = 'Event Log Entry'
+        verbose_name_plural = 'Event Log Entries'
+        indexes = [
+            models.Index(fields=['stream', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Event #{self.pk} on {self.stream}"
@@ -0,0 +1,280 @@
+"""
+Transactional outbox for channel-layer and push messages.
+
+Signal handlers run inside the transaction that saves the order, while the
+product rows are still locked. Instead of talking to the channel layer or
+Firebase there, they call ``enqueue_channel`` / ``enqueue_push``, which only
+insert an ``OutboxMessage`` in that same transaction. The message is
+therefore sent if and only if the change commits.
+
+Delivery happens in ``dispatch_batch``: pending rows are claimed with
+``SELECT ... FOR UPDATE SKIP LOCKED`` and leased by moving their
+``available_at`` ``OUTBOX_LEASE`` seconds ahead, in a short transaction of
+its own, so several dispatchers never send the same row and no lock is held
+while talking to the network. Channel messages of the batch are then sent in
+one async round; a second transaction deletes the delivered rows and
+reschedules the failed ones with exponential backoff until
+``OUTBOX_MAX_ATTEMPTS``. Rows of a dispatcher that died mid-batch are sent
+again once their lease runs out. After each commit that enqueued something,
+``worker`` is woken up in a background thread of the same process
+(``OUTBOX_AUTO_DISPATCH``), so the request never waits for the network;
+``manage.py dispatch_outbox --loop`` runs a standalone dispatcher.
+
+Group sends must run on the event loop of the consumers: the in-memory
+channel layer hands messages over through asyncio queues, and a message put
+from another loop does not wake the consumer waiting on it. Consumers
+therefore register the server loop (``attach_event_loop``) and the worker
+thread sends on it; without one (management command, no socket connected
+yet) messages are sent on a loop of their own.
+
+Events to the groups of ``CHANNEL_COALESCED_GROUPS`` are forwarded to
+clients as they are, so they are serialized here, once per group send
+(``text``), instead of once per socket. Those of one batch are coalesced
+into a single batch event, and the worker runs at most one batch every
+``OUTBOX_COALESCE_WINDOW`` seconds, so a burst of orders reaches the staff
+group as a few batch frames rather than one message per order.
+"""
+import asyncio
+import json
+import logging
+import time
+import threading
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .eventlog import log_events
+from .models import OutboxMessage
+from .push import PushDeliveryError, send_push
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_channel(messages, log=False):
+    """
+    Queue ``(group, event)`` pairs for the channel layer; one row for all of
+    them. With ``log`` the events are also kept for replay to reconnecting
+    clients (``notifications.eventlog``) and get an ``event_id``.
+    """
+    messages = list(messages)
+    if not messages:
+        return None
+    if log:
+        messages = log_events(messages)
+    messages = [[group, event] for group, event in messages]
+    return _enqueue(OutboxMessage.Kind.CHANNEL, {'messages': messages})
+
+
+def enqueue_push(user_ids, title, body, data=None):
+    """Queue a push notification to every device of ``user_ids``."""
+    return _enqueue(OutboxMessage.Kind.PUSH, {
+        'user_ids': list(user_ids),
+        'title': title,
+        'body': body,
+        'data': {key: str(value) for key, value in (data or {}).items()},
+    })
+
+
+def _enqueue(kind, payload):
+    message = OutboxMessage.objects.create(kind=kind, payload=payload)
+    if settings.OUTBOX_AUTO_DISPATCH:
+        transaction.on_commit(worker.kick, robust=True)
+    return message
+
+
+def coalesce(rows):
+    """
+    ``(group, event, rows)`` to send for channel ``rows``: the events of each
+    coalesced group become one pre-serialized event, sent for all its rows.
+    """
+    sends = []
+    batches = {}
+    for row in rows:
+        for group, event in row.payload['messages']:
+            if group not in settings.CHANNEL_COALESCED_GROUPS:
+                sends.append((group, event, [row]))
+                continue
+            events, batch_rows = batches.setdefault(group, ([], []))
+            events.append(event)
+            if row not in batch_rows:
+                batch_rows.append(row)
+    for group, (events, batch_rows) in batches.items():
+        if len(events) == 1:
+            event = {**events[0], 'text': json.dumps(events[0])}
+        else:
+            batch_type = settings.CHANNEL_COALESCED_GROUPS[group]
+            event = {
+                'type': batch_type,
+                'event_ids': [event.get('event_id') for event in events],
+                'text': json.dumps({'type': batch_type, 'events': events}),
+            }
+        sends.append((group, event, batch_rows))
+    return sends
+
+
+async def _send_channel_messages(messages):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    await asyncio.gather(*(channel_layer.group_send(group, event) for group, event in messages))
+
+
+async def _send_coalesced(sends):
+    return await asyncio.gather(
+        *(_send_channel_messages([(group, event)]) for group, event, _ in sends),
+        return_exceptions=True,
+    )
+
+
+def attach_event_loop():
+    """Send channel messages on the running event loop; called by consumers on connect."""
+    worker.loop = asyncio.get_running_loop()
+
+
+def _run_sends(sends):
+    loop = worker.loop
+    if loop is not None and loop.is_running():
+        try:
+            in_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            in_loop = False
+        if not in_loop:
+            return asyncio.run_coroutine_threadsafe(_send_coalesced(sends), loop).result()
+    return async_to_sync(_send_coalesced)(sends)
+
+
+def _send_push_row(row):
+    payload = row.payload
+    try:
+        send_push(payload['user_ids'], payload['title'], payload['body'], payload['data'],
+                  tokens=payload.get('tokens'))
+    except PushDeliveryError as exc:
+        # Retry only the devices that were not reached.
+        row.payload = {**payload, 'tokens': exc.tokens}
+        raise
+
+
+def _deliver(rows):
+    """Send ``rows``; returns ``{row.pk: exception}`` for the ones that failed."""
+    errors = {}
+    channel_rows = [row for row in rows if row.kind == OutboxMessage.Kind.CHANNEL]
+    if channel_rows:
+        sends = coalesce(channel_rows)
+        results = _run_sends(sends)
+        for (_, _, send_rows), result in zip(sends, results):
+            if isinstance(result, Exception):
+                for row in send_rows:
+                    errors.setdefault(row.pk, result)
+    for row in rows:
+        if row.kind == OutboxMessage.Kind.PUSH:
+            try:
+                _send_push_row(row)
+            except Exception as exc:
+                errors[row.pk] = exc
+        elif row.kind != OutboxMessage.Kind.CHANNEL:
+            errors[row.pk] = ValueError(f'Unknown outbox message kind {row.kind!r}')
+    return errors
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(2 ** attempts, settings.OUTBOX_MAX_BACKOFF))
+
+
+def _claim(batch_size, now):
+    """Lease up to ``batch_size`` due rows to this dispatcher."""
+    with transaction.atomic():
+        rows = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(failed=False, available_at__lte=now)
+            .order_by('id')[:batch_size]
+        )
+        if rows:
+            OutboxMessage.objects.filter(pk__in=[row.pk for row in rows]).update(
+                available_at=now + timedelta(seconds=settings.OUTBOX_LEASE)
+            )
+    return rows
+
+
+def dispatch_batch(batch_size=None):
+    """Deliver up to ``batch_size`` due messages. Returns the number processed."""
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    rows = _claim(batch_size, timezone.now())
+    if not rows:
+        return 0
+    errors = _deliver(rows)
+
+    now = timezone.now()
+    with transaction.atomic():
+        OutboxMessage.objects.filter(pk__in=[row.pk for row in rows if row.pk not in errors]).delete()
+        retried = []
+        for row in rows:
+            exc = errors.get(row.pk)
+            if exc is None:
+                continue
+            row.attempts += 1
+            row.last_error = repr(exc)[:1000]
+            if row.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                row.failed = True
+                logger.error('Outbox message %s failed after %d attempts: %r', row.pk, row.attempts, exc)
+            else:
+                row.available_at = now + retry_delay(row.attempts)
+                logger.warning('Outbox message %s failed (attempt %d): %r', row.pk, row.attempts, exc)
+            retried.append(row)
+        if retried:
+            OutboxMessage.objects.bulk_update(
+                retried, ['payload', 'attempts', 'last_error', 'failed', 'available_at']
+            )
+    return len(rows)
+
+
+def dispatch_pending(batch_size=None):
+    """Deliver every due message, batch after batch. Returns the number processed."""
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    total = 0
+    while True:
+        processed = dispatch_batch(batch_size)
+        total += processed
+        if processed < batch_size:
+            return total
+
+
+class DispatchWorker:
+    """
+    Background thread that dispatches the outbox when kicked after a commit,
+    and every ``OUTBOX_POLL_INTERVAL`` seconds to pick up retries. Messages
+    committed during ``OUTBOX_COALESCE_WINDOW`` after a round wait for the
+    next one, and go out together.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        # Event loop the consumers run on (``attach_event_loop``).
+        self.loop = None
+
+    def kick(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='outbox-dispatch', daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(settings.OUTBOX_POLL_INTERVAL)
+            self._wake.clear()
+            try:
+                dispatch_pending()
+            except Exception:
+                logger.exception('Outbox dispatch failed')
+            finally:
+                # This thread is not a request: close its connection explicitly.
+                connections.close_all()
+            time.sleep(settings.OUTBOX_COALESCE_WINDOW)
+
+
+worker = DispatchWorker()
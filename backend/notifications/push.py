@@ -0,0 +1,133 @@
+"""
+Push notifications to registered devices.
+
+``send_push`` loads the valid ``DeviceToken`` rows of the recipients and
+sends one multicast request per ``MULTICAST_BATCH_SIZE`` tokens (the limit
+of the FCM API). Tokens the transport reports as unregistered are flagged
+invalid so they are not tried again. The transport is selected with the
+``PUSH_TRANSPORT`` setting; ``FakeTransport`` records messages in memory
+for tests and local development.
+
+Batches that fail as a whole (network errors, FCM outages) are reported with
+``PushDeliveryError`` after the other batches were sent, carrying only the
+tokens to retry.
+"""
+import logging
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import DeviceToken
+
+logger = logging.getLogger(__name__)
+
+MULTICAST_BATCH_SIZE = 500
+
+
+class PushResult:
+    def __init__(self, token, success, unregistered=False, error=None):
+        self.token = token
+        self.success = success
+        self.unregistered = unregistered
+        self.error = error
+
+
+class PushDeliveryError(Exception):
+    def __init__(self, tokens, delivered):
+        super().__init__(f'{len(tokens)} tokens could not be sent')
+        self.tokens = tokens
+        self.delivered = delivered
+
+
+class FirebaseTransport:
+    def send_multicast(self, tokens, title, body, data):
+        from firebase_admin import messaging
+
+        message = messaging.MulticastMessage(
+            tokens=tokens,
+            notification=messaging.Notification(title=title, body=body),
+            data=data,
+        )
+        batch = messaging.send_each_for_multicast(message)
+        results = []
+        for token, response in zip(tokens, batch.responses):
+            unregistered = isinstance(
+                response.exception, (messaging.UnregisteredError, messaging.SenderIdMismatchError)
+            )
+            results.append(PushResult(token, response.success, unregistered, response.exception))
+        return results
+
+
+class FakeTransport:
+    """Records every multicast call; tokens in ``unregistered`` fail as unregistered."""
+    sent = []
+    unregistered = set()
+
+    def send_multicast(self, tokens, title, body, data):
+        self.sent.append({'tokens': list(tokens), 'title': title, 'body': body, 'data': data})
+        return [
+            PushResult(token, token not in self.unregistered, token in self.unregistered)
+            for token in tokens
+        ]
+
+    @classmethod
+    def reset(cls):
+        cls.sent.clear()
+        cls.unregistered.clear()
+
+
+def get_transport():
+    return import_string(settings.PUSH_TRANSPORT)()
+
+
+def register_device(user, token, platform=''):
+    """Create or refresh ``token`` for ``user``; a token moves to its latest user."""
+    device, _ = DeviceToken.objects.update_or_create(
+        token=token,
+        defaults={'user': user, 'platform': platform, 'is_invalid': False, 'invalidated_at': None},
+    )
+    return device
+
+
+def send_push(user_ids, title, body, data=None, tokens=None):
+    """
+    Send a push notification to every valid device of ``user_ids`` (or only
+    to ``tokens`` of them, when retrying). Returns the number of devices that
+    accepted it.
+    """
+    data = {key: str(value) for key, value in (data or {}).items()}
+    devices = DeviceToken.objects.filter(user_id__in=user_ids, is_invalid=False)
+    if tokens is not None:
+        devices = devices.filter(token__in=tokens)
+    tokens = list(devices.order_by('id').values_list('token', flat=True))
+    if not tokens:
+        return 0
+
+    transport = get_transport()
+    delivered = 0
+    unregistered = []
+    failed = []
+    for start in range(0, len(tokens), MULTICAST_BATCH_SIZE):
+        batch = tokens[start:start + MULTICAST_BATCH_SIZE]
+        try:
+            results = transport.send_multicast(batch, title, body, data)
+        except Exception:
+            logger.exception('Push multicast of %d tokens failed', len(batch))
+            failed.extend(batch)
+            continue
+        for result in results:
+            if result.success:
+                delivered += 1
+            elif result.unregistered:
+                unregistered.append(result.token)
+            else:
+                logger.warning('Push to a device failed: %s', result.error)
+
+    if unregistered:
+        DeviceToken.objects.filter(token__in=unregistered).update(
+            is_invalid=True, invalidated_at=timezone.now()
+        )
+    if failed:
+        raise PushDeliveryError(failed, delivered)
+    return delivered
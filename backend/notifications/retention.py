@@ -0,0 +1,76 @@
+"""
+Retention of notifications.
+
+Read personal notifications (``is_read`` or below the recipient's read
+watermark) are deleted after ``NOTIFICATION_RETENTION_DAYS``, unread ones
+after ``NOTIFICATION_UNREAD_RETENTION_DAYS`` (0 keeps them), and broadcasts
+after ``NOTIFICATION_RETENTION_DAYS`` together with their read markers;
+replayable realtime events after ``EVENT_LOG_RETENTION_HOURS``.
+Rows are deleted in batches of ids, optionally with a pause between
+batches, so no statement locks a large part of the table while orders keep
+creating notifications.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .fanout import audience_member_ids
+from .models import BroadcastNotification, EventLogEntry, Notification, NotificationReadState
+from .unread import forget_unread
+
+
+def _delete_in_batches(queryset, batch_size, pause, on_batch=None):
+    """
+    ``on_batch`` gets the ids of each batch before it is deleted, and may
+    return a callable to run once they are.
+    """
+    deleted = 0
+    while True:
+        rows = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not rows:
+            return deleted
+        after_delete = on_batch(rows) if on_batch is not None else None
+        queryset.model.objects.filter(pk__in=rows).delete()
+        if after_delete is not None:
+            after_delete()
+        deleted += len(rows)
+        if pause and len(rows) == batch_size:
+            time.sleep(pause)
+
+
+def _recipients_of(ids):
+    recipients = set(Notification.objects.filter(pk__in=ids).values_list('recipient_id', flat=True))
+    return lambda: forget_unread(recipients)
+
+
+def prune_notifications(batch_size=None, pause=0, now=None):
+    """Delete notifications past retention. Returns the number deleted per kind."""
+    batch_size = batch_size or settings.NOTIFICATION_PRUNE_BATCH_SIZE
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
+
+    below_watermark = NotificationReadState.objects.filter(
+        user=OuterRef('recipient'), personal_read_through__gte=OuterRef('pk')
+    )
+    read = Notification.objects.filter(created_at__lt=cutoff).filter(Q(is_read=True) | Exists(below_watermark))
+    deleted = {'read': _delete_in_batches(read, batch_size, pause)}
+
+    deleted['unread'] = 0
+    if settings.NOTIFICATION_UNREAD_RETENTION_DAYS:
+        unread_cutoff = now - timedelta(days=settings.NOTIFICATION_UNREAD_RETENTION_DAYS)
+        unread = Notification.objects.filter(created_at__lt=unread_cutoff)
+        # The cached counters of their recipients count them: recompute those.
+        deleted['unread'] = _delete_in_batches(unread, batch_size, pause, on_batch=_recipients_of)
+
+    broadcasts = BroadcastNotification.objects.filter(created_at__lt=cutoff)
+    audiences = set(broadcasts.values_list('audience', flat=True).distinct())
+    deleted['broadcast'] = _delete_in_batches(broadcasts, batch_size, pause)
+    for audience in audiences:
+        forget_unread(audience_member_ids(audience))
+
+    events = EventLogEntry.objects.filter(created_at__lt=now - timedelta(hours=settings.EVENT_LOG_RETENTION_HOURS))
+    deleted['events'] = _delete_in_batches(events, batch_size, pause)
+    return deleted
@@ -0,0 +1,121 @@
+"""
+Bounded outgoing queue for WebSocket consumers.
+
+A consumer handles channel-layer events one at a time, and ``send`` waits
+on the client's connection. One slow dashboard therefore backs up its
+channel until the layer starts dropping messages, and holds buffers on the
+event loop meanwhile. With ``BoundedSendMixin``, frames go to a queue of at
+most ``WS_SEND_QUEUE_SIZE`` per socket that a task drains, so handlers
+return at once. When the queue is full the socket is closed with code 1013
+(try again later) and its pending frames are discarded. Dropping single
+frames would leave gaps a client cannot detect, since event ids are shared
+by all streams and some frames (counters, snapshots) carry none; a closed
+client instead reconnects with ``?since=`` and gets the missed events
+replayed, or is told to refetch (``notifications.eventlog``). ``metrics``
+counts closed sockets, discarded frames and how long frames waited in the
+queue, for the whole process.
+"""
+import asyncio
+import threading
+import time
+
+from django.conf import settings
+
+# "Try again later": the client could not keep up and should reconnect.
+OVERFLOW_CLOSE_CODE = 1013
+
+
+class SendQueueMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.queued = 0
+        self.sent = 0
+        self.dropped = 0
+        self.closed = 0
+        self.max_depth = 0
+        self.lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
+
+    def enqueue(self, depth):
+        with self._lock:
+            self.queued += 1
+            self.max_depth = max(self.max_depth, depth)
+
+    def drop(self, frames=1):
+        with self._lock:
+            self.dropped += frames
+
+    def close(self, frames):
+        with self._lock:
+            self.closed += 1
+            self.dropped += frames
+
+    def send(self, lag):
+        with self._lock:
+            self.sent += 1
+            self.lag_seconds += lag
+            self.max_lag_seconds = max(self.max_lag_seconds, lag)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'queue_size': settings.WS_SEND_QUEUE_SIZE,
+                'queued': self.queued,
+                'sent': self.sent,
+                'dropped': self.dropped,
+                'closed': self.closed,
+                'max_depth': self.max_depth,
+                'avg_lag_ms': round(self.lag_seconds / self.sent * 1000, 1) if self.sent else 0,
+                'max_lag_ms': round(self.max_lag_seconds * 1000, 1),
+            }
+
+
+metrics = SendQueueMetrics()
+
+
+class BoundedSendMixin:
+    """
+    For ``AsyncWebsocketConsumer``s: ``send(text_data=...)`` queues the frame
+    instead of waiting for the client. Frames keep their order; none is
+    sent after a frame was discarded.
+    """
+    _send_queue = None
+    _send_task = None
+    _send_overflowed = False
+
+    async def send(self, text_data=None, bytes_data=None, close=False):
+        if text_data is None or close:
+            await super().send(text_data=text_data, bytes_data=bytes_data, close=close)
+            return
+        if self._send_overflowed:
+            metrics.drop()
+            return
+        if self._send_queue is None:
+            self._send_queue = asyncio.Queue(settings.WS_SEND_QUEUE_SIZE)
+            self._send_task = asyncio.ensure_future(self._drain_send_queue())
+        if self._send_queue.full():
+            await self._close_overflowed()
+            return
+        self._send_queue.put_nowait((time.monotonic(), text_data))
+        metrics.enqueue(self._send_queue.qsize())
+
+    async def _close_overflowed(self):
+        self._send_overflowed = True
+        self._send_task.cancel()
+        # The pending frames and the one that did not fit.
+        metrics.close(self._send_queue.qsize() + 1)
+        await super().send(close=OVERFLOW_CLOSE_CODE)
+
+    async def _drain_send_queue(self):
+        while True:
+            queued_at, text_data = await self._send_queue.get()
+            await super().send(text_data=text_data)
+            metrics.send(time.monotonic() - queued_at)
+
+    async def websocket_disconnect(self, message):
+        if self._send_task is not None:
+            self._send_task.cancel()
+        await super().websocket_disconnect(message)
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from .feed import notification_key, parse_notification_key
 from .models import Notification
 
 class NotificationSerializer(serializers.ModelSerializer):
@@ -13,3 +14,47 @@ class NotificationSerializer(serializers.ModelSerializer):
             'created_at'
         ]
         read_only_fields = ['created_at', 'recipient']
+
+
+class NotificationFeedSerializer(serializers.Serializer):
+    """Row of ``notifications.feed.feed``: a personal or a broadcast notification."""
+    id = serializers.IntegerField()
+    kind = serializers.CharField()
+    key = serializers.SerializerMethodField()
+    recipient = serializers.SerializerMethodField()
+    message = serializers.CharField()
+    notification_type = serializers.CharField()
+    is_read = serializers.BooleanField(source='read')
+    created_at = serializers.DateTimeField()
+
+    def get_key(self, row):
+        return notification_key(row['kind'], row['id'])
+
+    def get_recipient(self, row):
+        return self.context['request'].user.pk
+
+
+class MarkAllReadSerializer(serializers.Serializer):
+    """Newest personal and broadcast ids the client has listed."""
+    personal_through = serializers.IntegerField(required=False, min_value=0)
+    broadcasts_through = serializers.IntegerField(required=False, min_value=0)
+
+
+class MarkReadSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=500)
+    broadcast_ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=500)
+    keys = serializers.ListField(child=serializers.CharField(), required=False, max_length=500)
+
+    def validate_keys(self, keys):
+        try:
+            return [parse_notification_key(key) for key in keys]
+        except ValueError:
+            raise serializers.ValidationError('Keys must look like personal:<id> or broadcast:<id>.')
+
+    def validate(self, attrs):
+        # ``keys`` are split into the personal ``ids`` and the ``broadcast_ids``.
+        for kind, pk in attrs.pop('keys', []):
+            attrs.setdefault('ids' if kind == 'personal' else 'broadcast_ids', []).append(pk)
+        if not attrs.get('ids') and not attrs.get('broadcast_ids'):
+            raise serializers.ValidationError('Provide ids, broadcast_ids or keys.')
+        return attrs
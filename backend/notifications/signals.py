@@ -1,26 +1,25 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.conf import settings
 from orders.models import Order
-from .models import Notification
+from products.models import Product
+from products.signals import stock_below_reorder_point
+from .models import BroadcastNotification, Notification
+from .fanout import broadcast, invalidate_audience_members, realtime_messages
+from .outbox import enqueue_channel, enqueue_push
+from .unread import adjust_unread
 from users.models import User # Assuming users.models.User is the AUTH_USER_MODEL
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
-import json
 
 @receiver(post_save, sender=Order)
 def create_order_notification(sender, instance, created, **kwargs):
     # Notification for Admin on New Order
     if created:
-        # Get all staff/superuser users (admins)
-        # Assuming 'is_staff' or 'is_superuser' identifies an admin
-        admin_users = User.objects.filter(is_staff=True) | User.objects.filter(is_superuser=True)
-        for admin in admin_users.distinct():
-            Notification.objects.create(
-                recipient=admin,
-                message=f"New Order #{instance.number} placed by {instance.customer_name}.",
-                notification_type="new_order"
-            )
+        # One row for all staff/superusers (admins), pushed after commit
+        broadcast(
+            BroadcastNotification.STAFF,
+            message=f"New Order #{instance.number} placed by {instance.customer_name}.",
+            notification_type="new_order"
+        )
     # Notification for Client on Order Status Update to 'completed'
     # Check if the status has actually changed to 'completed'
     # To avoid sending multiple notifications if the order is saved again without status change
@@ -35,44 +34,41 @@ def create_order_notification(sender, instance, created, **kwargs):
                 notification_type="order_status_update"
             )
             
-            # Send FCM push notification if the user has an FCM token
-            if instance.created_by.fcm_token:
-                try:
-                    from firebase_admin import messaging
-                    message = messaging.Message(
-                        notification=messaging.Notification(
-                            title="Your Order is on its way!",
-                            body=notification_message,
-                        ),
-                        data={
-                            "order_id": str(instance.id),
-                            "order_number": instance.number,
-                            "notification_type": "order_status_update",
-                        },
-                        token=instance.created_by.fcm_token,
-                    )
-                    response = messaging.send(message)
-                    print(f"Successfully sent FCM message: {response}")
-                except Exception as e:
-                    print(f"Error sending FCM message: {e}")
+            # Push to every registered device of the customer once the order is saved
+            enqueue_push(
+                [instance.created_by_id],
+                title="Your Order is on its way!",
+                body=notification_message,
+                data={
+                    "order_id": instance.id,
+                    "order_number": instance.number,
+                    "notification_type": "order_status_update",
+                },
+            )
+
+@receiver(stock_below_reorder_point)
+def create_low_stock_notification(sender, product_id, stock, reorder_point, **kwargs):
+    """
+    Notifies admins once when a product drops below its reorder point.
+    """
+    product = Product.objects.filter(pk=product_id).only("name", "sku").first()
+    if product is None:
+        return
+    broadcast(
+        BroadcastNotification.STAFF,
+        message=f"Low stock: {product.name} ({product.sku}) has {stock} units left (reorder point {reorder_point}).",
+        notification_type="low_stock"
+    )
 
 @receiver(post_save, sender=Notification)
 def send_realtime_notification(sender, instance, created, **kwargs):
+    # Single notifications; bulk ones are queued by fanout.notify_users.
     if created:
-        channel_layer = get_channel_layer()
-        user_id = str(instance.recipient.id)
-        user_group_name = f'user_{user_id}'
-
-        notification_data = {
-            'type': 'send_notification', # This calls the send_notification method in the consumer
-            'message': instance.message,
-            'notification_type': instance.notification_type,
-            'is_read': instance.is_read,
-            'created_at': instance.created_at.isoformat(), # ISO format for easy parsing in JS/Dart
-            'notification_id': instance.id,
-        }
+        if not instance.is_read:
+            adjust_unread([instance.recipient_id], 1)
+        enqueue_channel(realtime_messages([instance]), log=True)
 
-        async_to_sync(channel_layer.group_send)(
-            user_group_name,
-            notification_data
-        )
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_audience_members_cache(sender, **kwargs):
+    invalidate_audience_members()
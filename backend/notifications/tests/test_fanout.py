@@ -0,0 +1,68 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from notifications.fanout import audience_member_ids, staff_recipient_ids
+from notifications.models import BroadcastNotification, Notification, OutboxMessage
+from orders.models import Order
+
+User = get_user_model()
+
+
+@override_settings(OUTBOX_AUTO_DISPATCH=False)
+class StaffFanoutTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def make_admins(self, count):
+        for index in range(User.objects.filter(is_staff=True).count(), count):
+            User.objects.create(username=f'admin{index}', role='admin', is_staff=True)
+
+    def create_order(self):
+        OutboxMessage.objects.all().delete()
+        with CaptureQueriesContext(connection) as queries:
+            Order.objects.create(customer_name='Cliente', total_amount=Decimal('10'))
+        return len(queries)
+
+    def queued_broadcasts(self):
+        return [
+            (group, event)
+            for row in OutboxMessage.objects.all()
+            for group, event in row.payload['messages']
+            if group.startswith('broadcast.')
+        ]
+
+    def test_order_writes_one_row_for_all_admins(self):
+        self.make_admins(1)
+        self.create_order()  # warms the audience cache
+        one_admin = self.create_order()
+
+        self.make_admins(20)
+        self.create_order()
+        twenty_admins = self.create_order()
+
+        self.assertEqual(one_admin, twenty_admins)
+        self.assertFalse(Notification.objects.filter(notification_type='new_order').exists())
+        self.assertEqual(BroadcastNotification.objects.filter(audience='staff').count(), 4)
+        [(group, event)] = self.queued_broadcasts()
+        self.assertEqual(group, 'broadcast.staff')
+        self.assertEqual(event['notification_type'], 'new_order')
+        self.assertEqual(event['kind'], 'broadcast')
+
+    def test_audience_cache_follows_user_changes(self):
+        self.make_admins(2)
+        self.assertEqual(len(staff_recipient_ids()), 2)
+        self.assertEqual(audience_member_ids('role.vendedor'), [])
+        user = User.objects.create(username='vendedor', role='vendedor')
+        self.assertEqual(audience_member_ids('role.vendedor'), [user.pk])
+        user.is_superuser = True
+        user.save()
+        self.assertEqual(len(staff_recipient_ids()), 3)
+
+    def test_no_audience_no_row(self):
+        self.create_order()
+        self.assertFalse(BroadcastNotification.objects.exists())
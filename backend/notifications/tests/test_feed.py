@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITransactionTestCase
+
+from notifications.fanout import broadcast
+from notifications.feed import feed
+from notifications.models import BroadcastNotification, BroadcastRead, Notification
+from notifications.unread import unread_count
+
+User = get_user_model()
+
+
+@override_settings(OUTBOX_AUTO_DISPATCH=False)
+class BroadcastFeedTest(APITransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create(username='admin', role='admin', is_staff=True)
+        self.customer = User.objects.create(username='cliente')
+        self.client.force_authenticate(self.admin)
+
+    def test_feed_merges_personal_and_broadcast(self):
+        personal = Notification.objects.create(recipient=self.admin, message='Personal', notification_type='info')
+        staff = broadcast('staff', 'Nuevo pedido', 'new_order')
+        broadcast('role.bodeguero', 'Otro rol', 'low_stock')
+
+        response = self.client.get('/api/notifications/')
+        self.assertEqual(
+            [(item['key'], item['id'], item['is_read']) for item in response.data],
+            [(f'broadcast:{staff.pk}', staff.pk, False), (f'personal:{personal.pk}', personal.pk, False)],
+        )
+        self.assertEqual(response.data[0]['recipient'], self.admin.pk)
+        self.assertEqual(feed(self.customer).count(), 0)
+
+    def test_broadcasts_before_joining_are_hidden(self):
+        old = broadcast('staff', 'Antiguo', 'new_order')
+        BroadcastNotification.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=1))
+        User.objects.filter(pk=self.admin.pk).update(date_joined=timezone.now() - timedelta(hours=1))
+        self.admin.refresh_from_db()
+        self.assertEqual(feed(self.admin).count(), 0)
+        self.assertEqual(unread_count(self.admin), 0)
+
+    def test_read_markers_and_watermark(self):
+        first = broadcast('staff', 'Uno', 'new_order')
+        second = broadcast('staff', 'Dos', 'new_order')
+        personal = Notification.objects.create(recipient=self.admin, message='Personal', notification_type='info')
+        self.assertEqual(unread_count(self.admin), 3)
+
+        response = self.client.post(
+            '/api/notifications/mark_read/', {'broadcast_ids': [first.pk, first.pk]}, format='json'
+        )
+        self.assertEqual(response.data, {'updated': 1, 'unread_count': 2})
+        read = {item['key']: item['is_read'] for item in self.client.get('/api/notifications/').data}
+        self.assertEqual(read, {
+            f'broadcast:{first.pk}': True, f'broadcast:{second.pk}': False, f'personal:{personal.pk}': False,
+        })
+
+        # Listed before this broadcast was sent: it stays unread.
+        late = broadcast('staff', 'Tarde', 'new_order')
+        response = self.client.post(
+            '/api/notifications/mark_all_as_read/',
+            {'personal_through': personal.pk, 'broadcasts_through': second.pk}, format='json',
+        )
+        self.assertEqual(response.data['message'], '2 notifications marked as read.')
+        self.assertEqual(response.data['unread_count'], 1)
+        self.client.post('/api/notifications/mark_read/', {'keys': [f'broadcast:{late.pk}']}, format='json')
+        # Markers at or below the watermark are gone.
+        self.assertEqual(list(BroadcastRead.objects.values_list('broadcast_id', flat=True)), [late.pk])
+        # Only the watermark moved; the personal row itself is untouched.
+        self.assertFalse(Notification.objects.get(pk=personal.pk).is_read)
+        self.assertEqual(unread_count(self.admin), 0)
+        self.assertTrue(all(item['is_read'] for item in self.client.get('/api/notifications/').data))
+
+        fourth = broadcast('staff', 'Cuatro', 'new_order')
+        other = Notification.objects.create(recipient=self.admin, message='Otra', notification_type='info')
+        response = self.client.post(
+            '/api/notifications/mark_read/', {'keys': [f'broadcast:{fourth.pk}', f'personal:{other.pk}']}, format='json'
+        )
+        self.assertEqual(response.data, {'updated': 2, 'unread_count': 0})
+        response = self.client.post('/api/notifications/mark_read/', {'keys': ['order:1']}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        third = broadcast('staff', 'Tres', 'new_order')
+        self.assertEqual(unread_count(self.admin), 1)
+        self.assertFalse({item['id']: item['read'] for item in feed(self.admin)}[third.pk])
+
+    def test_mark_all_without_ids_marks_recent_rows_one_by_one(self):
+        old = broadcast('staff', 'Antiguo', 'new_order')
+        BroadcastNotification.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(minutes=5))
+        User.objects.filter(pk=self.admin.pk).update(date_joined=timezone.now() - timedelta(hours=1))
+        self.admin.refresh_from_db()
+        recent = broadcast('staff', 'Reciente', 'new_order')
+        personal = Notification.objects.create(recipient=self.admin, message='Personal', notification_type='info')
+
+        response = self.client.post('/api/notifications/mark_all_as_read/')
+        self.assertEqual(response.data, {'message': '3 notifications marked as read.', 'unread_count': 0})
+        self.assertEqual(self.admin.notification_read_state.broadcasts_read_through, old.pk)
+        self.assertEqual(list(BroadcastRead.objects.values_list('broadcast_id', flat=True)), [recent.pk])
+        self.assertTrue(Notification.objects.get(pk=personal.pk).is_read)
@@ -0,0 +1,84 @@
+import asyncio
+import unittest
+
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase
+
+from notifications.layers import NOTIFY_PAYLOAD_LIMIT, PostgresChannelLayer, client_of, dumps, loads
+
+
+class EncodingTest(SimpleTestCase):
+    def test_bytes_round_trip(self):
+        message = {'type': 'websocket.send', 'bytes': b'\x00\xffdata', 'text': None, 'n': [1, 2]}
+        self.assertEqual(loads(dumps(message)), message)
+
+    def test_names(self):
+        layer = PostgresChannelLayer()
+        self.assertEqual(client_of('specific.abc123!def456'), 'abc123')
+        self.assertEqual(client_of('specific.dotted.abc123!x'), 'abc123')
+        group = layer.pg_channel('g', 'admin_orders')
+        self.assertLess(len(group), 64)
+        self.assertNotEqual(group, layer.pg_channel('g', 'user_1'))
+        self.assertNotEqual(group, layer.pg_channel('p', 'admin_orders'))
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'LISTEN/NOTIFY needs PostgreSQL')
+class PostgresChannelLayerTest(TransactionTestCase):
+    def setUp(self):
+        # Two layers stand for two Daphne processes.
+        self.first = PostgresChannelLayer(capacity=5)
+        self.second = PostgresChannelLayer(capacity=5)
+        self.addCleanup(async_to_sync(self.close_layers))
+
+    async def close_layers(self):
+        await self.first.flush()
+        await self.first.close()
+        await self.second.close()
+
+    async def receive(self, layer, channel):
+        return await asyncio.wait_for(layer.receive(channel), 5)
+
+    async def test_group_send_reaches_every_process(self):
+        one = await self.first.new_channel()
+        two = await self.second.new_channel()
+        await self.first.group_add('admin_orders', one)
+        await self.second.group_add('admin_orders', two)
+
+        await self.first.group_send('admin_orders', {'type': 'order.notification', 'n': 1})
+        self.assertEqual((await self.receive(self.first, one))['n'], 1)
+        self.assertEqual((await self.receive(self.second, two))['n'], 1)
+
+        await self.second.group_discard('admin_orders', two)
+        await self.first.group_send('admin_orders', {'type': 'order.notification', 'n': 2})
+        self.assertEqual((await self.receive(self.first, one))['n'], 2)
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(self.second.receive(two), 0.5)
+
+    async def test_send_to_channel_of_other_process(self):
+        channel = await self.second.new_channel()
+        await self.first.send(channel, {'type': 'hello', 'data': b'\x01'})
+        self.assertEqual(await self.receive(self.second, channel), {'type': 'hello', 'data': b'\x01'})
+
+    async def test_large_messages_go_through_the_table(self):
+        channel = await self.second.new_channel()
+        body = 'x' * (NOTIFY_PAYLOAD_LIMIT * 2)
+        await self.first.send(channel, {'type': 'big', 'body': body})
+        self.assertEqual((await self.receive(self.second, channel))['body'], body)
+
+    async def test_normal_channel_is_claimed_once(self):
+        await self.first.send('tasks', {'type': 'task', 'n': 1})
+        received = await asyncio.gather(
+            self.receive(self.first, 'tasks'),
+            asyncio.wait_for(self.second.receive('tasks'), 1.5),
+            return_exceptions=True,
+        )
+        self.assertEqual(sum(isinstance(item, dict) for item in received), 1)
+
+    async def test_capacity_drops_extra_messages(self):
+        channel = await self.second.new_channel()
+        for n in range(8):
+            await self.first.send(channel, {'type': 'm', 'n': n})
+        await asyncio.sleep(0.5)
+        received = [(await self.receive(self.second, channel))['n'] for _ in range(5)]
+        self.assertEqual(received, [0, 1, 2, 3, 4])
@@ -0,0 +1,169 @@
+import json
+import threading
+import time
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from notifications.consumers import NotificationConsumer
+from notifications.models import OutboxMessage
+from notifications.outbox import dispatch_batch, dispatch_pending, enqueue_channel, enqueue_push, worker
+from notifications.push import FakeTransport, register_device
+
+User = get_user_model()
+
+
+class FlakyTransport(FakeTransport):
+    """Fails every batch containing a token listed in ``down``."""
+    down = set()
+
+    def send_multicast(self, tokens, title, body, data):
+        if self.down & set(tokens):
+            raise ConnectionError('FCM unavailable')
+        return super().send_multicast(tokens, title, body, data)
+
+
+@override_settings(OUTBOX_AUTO_DISPATCH=False, PUSH_TRANSPORT='notifications.tests.test_outbox.FlakyTransport')
+class OutboxTest(TestCase):
+    def setUp(self):
+        FakeTransport.reset()
+        FlakyTransport.down = set()
+        self.layer = get_channel_layer()
+        self.channel = async_to_sync(self.layer.new_channel)()
+        async_to_sync(self.layer.group_add)('user_1', self.channel)
+        self.addCleanup(async_to_sync(self.layer.flush))
+
+    def receive(self):
+        return async_to_sync(self.layer.receive)(self.channel)
+
+    def test_kick_is_scheduled_after_commit(self):
+        with override_settings(OUTBOX_AUTO_DISPATCH=True):
+            with self.captureOnCommitCallbacks() as callbacks:
+                enqueue_channel([('user_1', {'type': 'send_notification'})])
+        self.assertEqual(callbacks, [worker.kick])
+
+    def test_channel_messages_are_sent_and_deleted(self):
+        enqueue_channel([('user_1', {'type': 'send_notification', 'n': 1})])
+        enqueue_channel([('user_1', {'type': 'send_notification', 'n': 2})])
+
+        self.assertEqual(dispatch_pending(), 2)
+        self.assertEqual(sorted([self.receive()['n'], self.receive()['n']]), [1, 2])
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_coalesced_group_gets_one_serialized_batch(self):
+        async_to_sync(self.layer.group_add)('admin_orders', self.channel)
+        enqueue_channel([('admin_orders', {'type': 'order.notification', 'n': 1})])
+        enqueue_channel([('admin_orders', {'type': 'order.notification', 'n': 2, 'event_id': 7})])
+        self.assertEqual(dispatch_batch(), 2)
+
+        batch = self.receive()
+        self.assertEqual(batch['type'], 'order.batch')
+        self.assertEqual(batch['event_ids'], [None, 7])
+        self.assertEqual(json.loads(batch['text']), {'type': 'order.batch', 'events': [
+            {'type': 'order.notification', 'n': 1},
+            {'type': 'order.notification', 'n': 2, 'event_id': 7},
+        ]})
+
+        enqueue_channel([('admin_orders', {'type': 'order.notification', 'n': 3})])
+        dispatch_batch()
+        single = self.receive()
+        self.assertEqual(single['type'], 'order.notification')
+        self.assertEqual(json.loads(single['text']), {'type': 'order.notification', 'n': 3})
+
+    def test_rows_are_leased_while_sent(self):
+        enqueue_channel([('user_1', {'type': 'send_notification'})])
+        leased = []
+
+        def deliver(rows):
+            leased.extend(OutboxMessage.objects.filter(available_at__gt=timezone.now()).values_list('pk', flat=True))
+            # Another dispatcher finds nothing due meanwhile.
+            leased.append(dispatch_batch())
+            return {}
+
+        with mock.patch('notifications.outbox._deliver', side_effect=deliver):
+            self.assertEqual(dispatch_batch(), 1)
+        self.assertEqual(len(leased), 2)
+        self.assertEqual(leased[1], 0)
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_failures_back_off_and_give_up(self):
+        message = enqueue_channel([('user_1', {'type': 'send_notification'})])
+        with mock.patch('notifications.outbox._send_channel_messages', side_effect=RuntimeError('down')):
+            self.assertEqual(dispatch_batch(), 1)
+            message.refresh_from_db()
+            self.assertEqual(message.attempts, 1)
+            self.assertGreater(message.available_at, timezone.now())
+            self.assertIn('down', message.last_error)
+            # Not due yet.
+            self.assertEqual(dispatch_batch(), 0)
+
+            with override_settings(OUTBOX_MAX_ATTEMPTS=2):
+                OutboxMessage.objects.update(available_at=timezone.now())
+                dispatch_batch()
+        message.refresh_from_db()
+        self.assertTrue(message.failed)
+        self.assertEqual(dispatch_batch(), 0)
+
+    @mock.patch('notifications.push.MULTICAST_BATCH_SIZE', 1)
+    def test_push_retries_only_unreached_tokens(self):
+        user = User.objects.create(username='cliente')
+        register_device(user, 'phone')
+        register_device(user, 'tablet')
+        FlakyTransport.down = {'tablet'}
+        message = enqueue_push([user.pk], 'Hola', 'Mensaje', {'order_id': 3})
+
+        dispatch_batch()
+        message.refresh_from_db()
+        self.assertEqual(message.payload['tokens'], ['tablet'])
+        self.assertEqual([call['tokens'] for call in FakeTransport.sent], [['phone']])
+
+        FlakyTransport.down = set()
+        OutboxMessage.objects.update(available_at=timezone.now())
+        dispatch_batch()
+        self.assertEqual([call['tokens'] for call in FakeTransport.sent], [['phone'], ['tablet']])
+        self.assertEqual(FakeTransport.sent[1]['data'], {'order_id': '3'})
+        self.assertFalse(OutboxMessage.objects.exists())
+
+
+@override_settings(OUTBOX_AUTO_DISPATCH=False)
+class WorkerThreadDeliveryTest(TransactionTestCase):
+    def tearDown(self):
+        worker.loop = None
+
+    def test_dispatch_from_another_thread_reaches_consumer_at_once(self):
+        user = User.objects.create(username='cliente')
+
+        def dispatch():
+            try:
+                dispatch_pending()
+            finally:
+                connections.close_all()
+
+        async def run():
+            communicator = WebsocketCommunicator(NotificationConsumer.as_asgi(), '/ws/notifications/')
+            communicator.scope['user'] = user
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            await communicator.receive_json_from()
+            await sync_to_async(enqueue_channel)([(f'user_{user.pk}', {'type': 'unread_count'})])
+
+            # Like DispatchWorker: a plain thread, not one of the event loop.
+            thread = threading.Thread(target=dispatch)
+            started = time.monotonic()
+            thread.start()
+            frame = await communicator.receive_json_from(timeout=1)
+            elapsed = time.monotonic() - started
+            await sync_to_async(thread.join)()
+            await communicator.disconnect()
+            return frame, elapsed
+
+        frame, elapsed = async_to_sync(run)()
+        self.assertEqual(frame, {'type': 'unread_count', 'unread_count': 0})
+        self.assertLess(elapsed, 0.5)
+        self.assertFalse(OutboxMessage.objects.exists())
@@ -0,0 +1,74 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+
+from notifications.models import DeviceToken
+from notifications.outbox import dispatch_pending
+from notifications.push import FakeTransport, register_device, send_push
+from orders.models import Order
+
+User = get_user_model()
+
+
+@override_settings(PUSH_TRANSPORT='notifications.push.FakeTransport')
+class SendPushTest(TestCase):
+    def setUp(self):
+        FakeTransport.reset()
+        self.user = User.objects.create_user(username='cliente', password='password123')
+
+    def test_batches_of_500(self):
+        DeviceToken.objects.bulk_create([DeviceToken(user=self.user, token=f'token-{i}') for i in range(1201)])
+        self.assertEqual(send_push([self.user.pk], 'Hola', 'Mensaje', {'order_id': 7}), 1201)
+        self.assertEqual([len(call['tokens']) for call in FakeTransport.sent], [500, 500, 201])
+        self.assertEqual(FakeTransport.sent[0]['data'], {'order_id': '7'})
+
+    def test_unregistered_tokens_are_flagged(self):
+        register_device(self.user, 'good')
+        register_device(self.user, 'stale')
+        FakeTransport.unregistered.add('stale')
+
+        self.assertEqual(send_push([self.user.pk], 'Hola', 'Mensaje'), 1)
+        self.assertTrue(DeviceToken.objects.get(token='stale').is_invalid)
+
+        FakeTransport.sent.clear()
+        send_push([self.user.pk], 'Hola', 'Mensaje')
+        self.assertEqual(FakeTransport.sent[0]['tokens'], ['good'])
+
+    def test_register_revives_token(self):
+        register_device(self.user, 'token')
+        DeviceToken.objects.update(is_invalid=True)
+        register_device(self.user, 'token', platform='android')
+        device = DeviceToken.objects.get()
+        self.assertFalse(device.is_invalid)
+        self.assertEqual(device.platform, 'android')
+
+
+@override_settings(PUSH_TRANSPORT='notifications.push.FakeTransport', OUTBOX_AUTO_DISPATCH=False)
+class DevicePushFlowTest(APITestCase):
+    def setUp(self):
+        FakeTransport.reset()
+        self.user = User.objects.create_user(username='cliente', password='password123')
+        self.client.force_authenticate(self.user)
+
+    def test_update_fcm_token_registers_each_device(self):
+        for token in ('phone', 'tablet', 'phone'):
+            response = self.client.post('/api/auth/users/update_fcm_token/', {'fcm_token': token})
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(self.user.device_tokens.values_list('token', flat=True)), ['phone', 'tablet']
+        )
+
+    def test_shipped_order_pushes_to_all_devices(self):
+        register_device(self.user, 'phone')
+        register_device(self.user, 'tablet')
+        order = Order.objects.create(customer_name='Cliente', created_by=self.user, total_amount=Decimal('10'))
+        order.status = Order.Status.SHIPPED
+        order.save()
+        self.assertEqual(FakeTransport.sent, [])
+
+        dispatch_pending()
+        self.assertEqual(len(FakeTransport.sent), 1)
+        self.assertEqual(sorted(FakeTransport.sent[0]['tokens']), ['phone', 'tablet'])
+        self.assertEqual(FakeTransport.sent[0]['data']['order_number'], order.number)
@@ -0,0 +1,121 @@
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITransactionTestCase
+
+from notifications.consumers import NotificationConsumer
+from notifications.eventlog import missed_events
+from notifications.fanout import notify_users
+from notifications.models import EventLogEntry, OutboxMessage
+from notifications.outbox import enqueue_channel
+from orders.consumers import OrderConsumer
+
+User = get_user_model()
+
+
+def order_event(order_id):
+    return {'type': 'order.notification', 'message': {'notification_type': 'new_order', 'order_id': order_id}}
+
+
+@override_settings(OUTBOX_AUTO_DISPATCH=False)
+class EventReplayTest(APITransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='cliente')
+        self.admin = User.objects.create(username='admin', role='admin', is_staff=True)
+
+    def connect(self, consumer, path, user, frames, live=None):
+        async def run():
+            communicator = WebsocketCommunicator(consumer.as_asgi(), path)
+            communicator.scope['user'] = user
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            received = [await communicator.receive_json_from() for _ in range(frames)]
+            if live is not None:
+                await communicator.send_input(live)
+            self.assertTrue(await communicator.receive_nothing())
+            await communicator.disconnect()
+            return received
+
+        return async_to_sync(run)()
+
+    def test_logged_events_carry_their_id(self):
+        enqueue_channel([('admin_orders', order_event(1))], log=True)
+        enqueue_channel([(f'user_{self.user.pk}', {'type': 'unread_count'})])
+
+        entry = EventLogEntry.objects.get()
+        self.assertEqual(entry.stream, 'admin_orders')
+        messages = [message for row in OutboxMessage.objects.all() for message in row.payload['messages']]
+        self.assertEqual(messages, [
+            ['admin_orders', {**order_event(1), 'event_id': entry.pk}],
+            [f'user_{self.user.pk}', {'type': 'unread_count'}],
+        ])
+
+    def test_orders_replay_since_last_event(self):
+        enqueue_channel([('admin_orders', order_event(1))], log=True)
+        seen = EventLogEntry.objects.get().pk
+        enqueue_channel([(f'user_{self.user.pk}_orders', order_event(2))], log=True)
+        enqueue_channel([('admin_orders', order_event(3))], log=True)
+        missed = EventLogEntry.objects.get(stream='admin_orders', pk__gt=seen)
+
+        replayed, summary = self.connect(
+            OrderConsumer, f'/ws/orders/?since={seen}', self.admin, 2,
+            # Delivered live after the replay: not sent twice.
+            live={**order_event(3), 'event_id': missed.pk},
+        )
+        self.assertEqual(replayed, {'type': 'order.notification', 'event_id': missed.pk, 'message': order_event(3)['message']})
+        self.assertEqual(summary, {'type': 'replay', 'since': seen, 'count': 1, 'truncated': False})
+
+    def test_notifications_replay_and_unread_count(self):
+        notify_users([self.admin.pk], 'Antes', 'new_order')
+        seen = EventLogEntry.objects.get().pk
+        notifications = notify_users([self.user.pk, self.user.pk], 'Hola', 'new_order')
+        notify_users([self.admin.pk], 'Otro', 'new_order')
+
+        frames = self.connect(NotificationConsumer, f'/ws/notifications/?since={seen}', self.user, 4)
+        self.assertEqual([frame['id'] for frame in frames[:2]], [n.pk for n in notifications])
+        self.assertEqual(frames[2], {'type': 'replay', 'since': seen, 'count': 2, 'truncated': False})
+        self.assertEqual(frames[3], {'type': 'unread_count', 'unread_count': 2})
+
+        # Without ``since`` nothing is replayed.
+        self.assertEqual(self.connect(NotificationConsumer, '/ws/notifications/', self.user, 1)[0]['type'], 'unread_count')
+
+    @override_settings(EVENT_REPLAY_LIMIT=2)
+    def test_replay_is_capped(self):
+        for order_id in range(4):
+            enqueue_channel([('admin_orders', order_event(order_id))], log=True)
+        first = EventLogEntry.objects.order_by('pk').values_list('pk', flat=True).first()
+        EventLogEntry.objects.update(created_at=timezone.now() - timedelta(minutes=5))
+        EventLogEntry.objects.filter(pk=first).update(created_at=timezone.now() - timedelta(minutes=10))
+
+        events, truncated = missed_events(['admin_orders'], first)
+        self.assertEqual([event['message']['order_id'] for event in events], [1, 2])
+        self.assertTrue(truncated)
+
+    def test_lower_ids_committed_late_are_replayed(self):
+        # The first event's transaction committed after the client saw the second.
+        for order_id in range(3):
+            enqueue_channel([('admin_orders', order_event(order_id))], log=True)
+        first, second, third = EventLogEntry.objects.order_by('pk').values_list('pk', flat=True)
+
+        events, truncated = missed_events(['admin_orders'], second)
+        self.assertEqual([event['event_id'] for event in events], [first, third])
+        self.assertFalse(truncated)
+
+        # Outside the overlap window it was delivered long before.
+        EventLogEntry.objects.filter(pk=first).update(created_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(missed_events(['admin_orders'], second), ([{**order_event(2), 'event_id': third}], False))
+
+    def test_pruned_history_is_truncated(self):
+        for order_id in range(2):
+            enqueue_channel([('admin_orders', order_event(order_id))], log=True)
+        first = EventLogEntry.objects.order_by('pk').values_list('pk', flat=True).first()
+
+        EventLogEntry.objects.filter(pk=first).delete()
+        self.assertEqual(missed_events(['admin_orders'], first), ([], True))
+        self.assertEqual(missed_events(['admin_orders'], 0), ([], True))
@@ -0,0 +1,84 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITransactionTestCase
+
+from notifications.fanout import broadcast
+from notifications.feed import mark_all_read, mark_read
+from notifications.models import BroadcastNotification, BroadcastRead, EventLogEntry, Notification
+from notifications.outbox import enqueue_channel
+from notifications.retention import prune_notifications
+from notifications.unread import unread_count
+
+User = get_user_model()
+
+
+@override_settings(
+    OUTBOX_AUTO_DISPATCH=False, NOTIFICATION_RETENTION_DAYS=30, NOTIFICATION_UNREAD_RETENTION_DAYS=90,
+)
+class PruneNotificationsTest(APITransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create(username='admin', role='admin', is_staff=True)
+        User.objects.filter(pk=self.admin.pk).update(date_joined=timezone.now() - timedelta(days=365))
+        self.admin.refresh_from_db()
+
+    def notify(self, message, days_ago, **fields):
+        notification = Notification.objects.create(
+            recipient=self.admin, message=message, notification_type='info', **fields
+        )
+        Notification.objects.filter(pk=notification.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+        return notification
+
+    def test_prunes_read_old_and_expired_unread(self):
+        old_read = self.notify('Leída', 40, is_read=True)
+        old_unread = self.notify('Sin leer', 40)
+        expired = self.notify('Muy antigua', 100)
+        recent_read = self.notify('Reciente', 5, is_read=True)
+        self.assertEqual(unread_count(self.admin), 2)
+
+        deleted = prune_notifications(batch_size=1)
+
+        self.assertEqual(deleted, {'read': 1, 'unread': 1, 'broadcast': 0, 'events': 0})
+        remaining = set(Notification.objects.values_list('pk', flat=True))
+        self.assertEqual(remaining, {old_unread.pk, recent_read.pk})
+        self.assertNotIn(old_read.pk, remaining)
+        self.assertNotIn(expired.pk, remaining)
+        # The counter that still included the expired row was recomputed.
+        self.assertEqual(unread_count(self.admin), 1)
+
+    def test_watermark_counts_as_read(self):
+        below = self.notify('Antes', 40)
+        mark_all_read(self.admin)
+        above = self.notify('Después', 40)
+
+        self.assertEqual(prune_notifications()['read'], 1)
+        self.assertFalse(Notification.objects.filter(pk=below.pk).exists())
+        self.assertTrue(Notification.objects.filter(pk=above.pk).exists())
+
+    def test_prunes_old_broadcasts_with_markers(self):
+        old = broadcast('staff', 'Antiguo', 'new_order')
+        recent = broadcast('staff', 'Nuevo', 'new_order')
+        mark_read(self.admin, broadcast_ids=[old.pk])
+        BroadcastNotification.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=40))
+
+        call_command('prune_notifications', batch_size=10, stdout=StringIO())
+
+        self.assertEqual(list(BroadcastNotification.objects.values_list('pk', flat=True)), [recent.pk])
+        self.assertFalse(BroadcastRead.objects.exists())
+        self.assertEqual(unread_count(self.admin), 1)
+
+    @override_settings(EVENT_LOG_RETENTION_HOURS=1)
+    def test_prunes_old_logged_events(self):
+        enqueue_channel([('admin_orders', {'type': 'order.notification', 'message': {}})] * 2, log=True)
+        old = EventLogEntry.objects.order_by('pk').first()
+        EventLogEntry.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(hours=2))
+
+        self.assertEqual(prune_notifications()['events'], 1)
+        self.assertFalse(EventLogEntry.objects.filter(pk=old.pk).exists())
+        self.assertEqual(EventLogEntry.objects.count(), 1)
@@ -0,0 +1,111 @@
+import asyncio
+import json
+
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from notifications.sendqueue import OVERFLOW_CLOSE_CODE, BoundedSendMixin, metrics
+from orders.consumers import OrderConsumer
+
+User = get_user_model()
+
+
+class SlowSocket:
+    """Stands in for the WebSocket consumer: sends wait until ``opened``."""
+    def __init__(self):
+        self.opened = asyncio.Event()
+        self.sent = []
+
+    async def send(self, text_data=None, bytes_data=None, close=False):
+        if close:
+            self.sent.append(('close', close))
+            return
+        await self.opened.wait()
+        self.sent.append(text_data)
+
+
+class SlowConsumer(BoundedSendMixin, SlowSocket):
+    pass
+
+
+class ReconnectedOrderConsumer(OrderConsumer):
+    async def connect(self):
+        await super().connect()
+        # As if event 4 had just been replayed
+        self.replayed_event_ids = {4}
+
+
+class BoundedSendTest(TestCase):
+    def setUp(self):
+        metrics.reset()
+
+    @override_settings(WS_SEND_QUEUE_SIZE=2)
+    def test_frames_are_queued_while_the_client_is_slow(self):
+        async def run():
+            consumer = SlowConsumer()
+            for n in range(3):
+                # Returns at once although the client does not read.
+                await asyncio.wait_for(consumer.send(text_data=str(n)), 0.1)
+            consumer.opened.set()
+            for _ in range(10):
+                await asyncio.sleep(0)
+            consumer._send_task.cancel()
+            return consumer.sent
+
+        self.assertEqual(async_to_sync(run)(), ['0', '1', '2'])
+        snapshot = metrics.snapshot()
+        self.assertEqual((snapshot['queued'], snapshot['sent'], snapshot['dropped']), (3, 3, 0))
+        self.assertEqual(snapshot['max_depth'], 2)
+
+    @override_settings(WS_SEND_QUEUE_SIZE=2)
+    def test_full_queue_closes_the_socket(self):
+        async def run():
+            consumer = SlowConsumer()
+            for n in range(5):
+                await asyncio.wait_for(consumer.send(text_data=str(n)), 0.1)
+            consumer.opened.set()
+            for _ in range(10):
+                await asyncio.sleep(0)
+            return consumer.sent
+
+        # 0 was being sent, 1 and 2 were queued; 3 did not fit and 4 came after the close.
+        self.assertEqual(async_to_sync(run)(), [('close', OVERFLOW_CLOSE_CODE)])
+        snapshot = metrics.snapshot()
+        self.assertEqual((snapshot['closed'], snapshot['dropped'], snapshot['sent']), (1, 4, 0))
+
+    def test_metrics_endpoint_is_for_admins(self):
+        admin = User.objects.create(username='admin', role='admin')
+        seller = User.objects.create(username='vendedor', role='vendedor', is_staff=True)
+        client = APIClient()
+
+        client.force_authenticate(seller)
+        self.assertEqual(client.get('/api/orders/ws-metrics/').status_code, 403)
+        client.force_authenticate(admin)
+        response = client.get('/api/orders/ws-metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['closed'], 0)
+
+    def test_order_consumer_forwards_serialized_frames(self):
+        admin = User.objects.create(username='admin', role='admin', is_staff=True)
+        batch = {'type': 'order.batch', 'events': [
+            {'type': 'order.notification', 'event_id': 4, 'message': {'order_id': 1}},
+            {'type': 'order.notification', 'event_id': 5, 'message': {'order_id': 2}},
+        ]}
+
+        async def run():
+            communicator = WebsocketCommunicator(ReconnectedOrderConsumer.as_asgi(), '/ws/orders/')
+            communicator.scope['user'] = admin
+            await communicator.connect()
+            await communicator.send_input({'type': 'order.batch', 'event_ids': [4, 5], 'text': json.dumps(batch)})
+            await communicator.send_input({'type': 'order.notification', 'text': '{"pre": "serialized"}'})
+            frames = [await communicator.receive_json_from(), await communicator.receive_json_from()]
+            await communicator.disconnect()
+            return frames
+
+        frames = async_to_sync(run)()
+        # The replayed event is left out of the live batch.
+        self.assertEqual(frames[0], {'type': 'order.batch', 'events': batch['events'][1:]})
+        self.assertEqual(frames[1], {'pre': 'serialized'})
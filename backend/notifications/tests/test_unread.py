@@ -0,0 +1,102 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITransactionTestCase
+
+from notifications.consumers import NotificationConsumer
+from notifications.fanout import notify_users
+from notifications.models import Notification, OutboxMessage
+from notifications.feed import count_unread
+from notifications.unread import unread_cache_key, unread_count
+
+User = get_user_model()
+
+
+# Transactional: counters move on commit, as they do in the views.
+@override_settings(OUTBOX_AUTO_DISPATCH=False)
+class UnreadCountTest(APITransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='cliente')
+        self.other = User.objects.create(username='otro')
+        self.client.force_authenticate(self.user)
+
+    def notify(self, *users):
+        return notify_users([user.pk for user in users], 'Hola', 'new_order')
+
+    def test_counter_follows_new_notifications(self):
+        self.notify(self.user)
+        response = self.client.get('/api/notifications/unread-count/')
+        self.assertEqual(response.data, {'unread_count': 1})
+
+        self.notify(self.user, self.other)
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/notifications/unread-count/')
+        self.assertEqual(response.data, {'unread_count': 2})
+
+    def test_change_during_first_count_is_not_lost(self):
+        def count_then_notify(user):
+            # Counted before the new notification commits; its ``incr`` then
+            # finds no entry.
+            count = count_unread(user)
+            self.notify(self.user)
+            return count
+
+        with mock.patch('notifications.unread.count_unread', side_effect=count_then_notify):
+            self.assertEqual(unread_count(self.user), 0)
+        self.assertIsNone(cache.get(unread_cache_key(self.user.pk)))
+        self.assertEqual(unread_count(self.user), 1)
+
+    def test_mark_read_by_ids(self):
+        mine = self.notify(self.user, self.user, self.user)
+        theirs = self.notify(self.other)
+        self.assertEqual(unread_count(self.user), 3)
+        OutboxMessage.objects.all().delete()
+
+        response = self.client.post(
+            '/api/notifications/mark_read/', {'ids': [mine[0].pk, mine[1].pk, theirs[0].pk]}, format='json'
+        )
+        self.assertEqual(response.data, {'updated': 2, 'unread_count': 1})
+        self.assertFalse(Notification.objects.get(pk=theirs[0].pk).is_read)
+        self.assertEqual(cache.get(unread_cache_key(self.user.pk)), 1)
+        self.assertEqual(
+            OutboxMessage.objects.get().payload['messages'],
+            [[f'user_{self.user.pk}', {'type': 'unread_count'}]],
+        )
+
+        # Already read: nothing changes.
+        response = self.client.post('/api/notifications/mark_read/', {'ids': [mine[0].pk]}, format='json')
+        self.assertEqual(response.data, {'updated': 0, 'unread_count': 1})
+
+    def test_mark_read_validates_ids(self):
+        response = self.client.post('/api/notifications/mark_read/', {'ids': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_mark_all_as_read_resets_counter(self):
+        self.notify(self.user, self.user)
+        self.assertEqual(unread_count(self.user), 2)
+        response = self.client.post('/api/notifications/mark_all_as_read/')
+        self.assertEqual(response.data['unread_count'], 0)
+        self.assertEqual(unread_count(self.user), 0)
+
+    def test_socket_sends_counter(self):
+        self.notify(self.user)
+
+        async def connect():
+            communicator = WebsocketCommunicator(NotificationConsumer.as_asgi(), '/ws/notifications/')
+            communicator.scope['user'] = self.user
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            initial = await communicator.receive_json_from()
+            await communicator.send_input({'type': 'unread_count'})
+            pushed = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return initial, pushed
+
+        initial, pushed = async_to_sync(connect)()
+        self.assertEqual(initial, {'type': 'unread_count', 'unread_count': 1})
+        self.assertEqual(pushed, {'type': 'unread_count', 'unread_count': 1})
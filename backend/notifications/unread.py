@@ -0,0 +1,101 @@
+"""
+Per-user unread notification counters.
+
+Badges used to be drawn by listing every notification of the user. The
+count is kept in the default cache instead: it is computed once
+(``notifications.feed.count_unread``, on the ``(recipient, is_read)``
+index) and then moved with
+``incr``/``decr`` when notifications are created or marked read. Changes
+are applied after the transaction commits, so a rolled-back order does not
+leave the badge one too high. A missing or inconsistent entry is simply
+recomputed on the next read.
+
+A change can commit while a reader is counting: the count misses it, and
+the ``incr`` finds no entry yet. Every change therefore first replaces a
+version token (``unread_version_key``), and the reader drops the count it
+just stored when the token moved while it was counting, instead of keeping
+a stale badge until the entry expires.
+"""
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .feed import count_unread
+
+
+def unread_cache_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def unread_version_key(user_id):
+    return f'notifications:unread:{user_id}:version'
+
+
+def unread_count(user):
+    key = unread_cache_key(user.pk)
+    count = cache.get(key)
+    if count is None:
+        version = cache.get(unread_version_key(user.pk))
+        count = count_unread(user)
+        cache.add(key, count, settings.NOTIFICATION_UNREAD_CACHE_TIMEOUT)
+        if cache.get(unread_version_key(user.pk)) != version:
+            cache.delete(key)
+    return count
+
+
+async def aunread_count(user):
+    key = unread_cache_key(user.pk)
+    count = await cache.aget(key)
+    if count is None:
+        version = await cache.aget(unread_version_key(user.pk))
+        count = await sync_to_async(count_unread)(user)
+        await cache.aadd(key, count, settings.NOTIFICATION_UNREAD_CACHE_TIMEOUT)
+        if await cache.aget(unread_version_key(user.pk)) != version:
+            await cache.adelete(key)
+    return count
+
+
+def _bump_versions(user_ids):
+    version = uuid.uuid4().hex
+    cache.set_many(
+        {unread_version_key(user_id): version for user_id in user_ids},
+        settings.NOTIFICATION_UNREAD_CACHE_TIMEOUT,
+    )
+
+
+def _adjust(user_ids, delta):
+    # Before the counters: a reader that stores a count after a missed
+    # ``incr`` below sees the new token and drops it.
+    _bump_versions(user_ids)
+    for user_id in user_ids:
+        key = unread_cache_key(user_id)
+        try:
+            count = cache.incr(key, delta)
+        except ValueError:
+            # Not cached: the next read counts from the database.
+            continue
+        if count < 0:
+            cache.delete(key)
+
+
+def adjust_unread(user_ids, delta):
+    """Move the counters of ``user_ids`` by ``delta`` once the transaction commits."""
+    user_ids = list(user_ids)
+    if user_ids and delta:
+        transaction.on_commit(lambda: _adjust(user_ids, delta), robust=True)
+
+
+def forget_unread(user_ids):
+    """Drop the counters of ``user_ids`` after their notifications were deleted."""
+    user_ids = set(user_ids)
+    if user_ids:
+        _bump_versions(user_ids)
+        cache.delete_many([unread_cache_key(user_id) for user_id in user_ids])
+
+
+def unread_count_event():
+    """Channel layer event handled by ``NotificationConsumer.unread_count``."""
+    return {'type': 'unread_count'}
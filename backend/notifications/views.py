@@ -3,7 +3,10 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import Notification
-from .serializers import NotificationSerializer
+from .feed import feed, is_personal_read, mark_all_read, mark_read, read_state
+from .outbox import enqueue_channel
+from .serializers import MarkAllReadSerializer, MarkReadSerializer, NotificationFeedSerializer, NotificationSerializer
+from .unread import adjust_unread, forget_unread, unread_count as get_unread_count, unread_count_event
 
 class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -19,13 +22,71 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
         """
         return self.request.user.notifications.all().order_by('-created_at')
 
+    def list(self, request, *args, **kwargs):
+        """
+        Personal and broadcast notifications of the user, newest first.
+        """
+        serializer = NotificationFeedSerializer(feed(request.user), many=True, context={'request': request})
+        return Response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        One personal notification, read if it is below the user's watermark.
+        """
+        notification = self.get_object()
+        notification.is_read = is_personal_read(notification, read_state(request.user))
+        return Response(self.get_serializer(notification).data)
+
+    def _push_unread_count(self):
+        # The socket reads the new count when the event is delivered.
+        enqueue_channel([(f'user_{self.request.user.pk}', unread_count_event())])
+
+    @action(detail=False, methods=['get'], url_path='unread-count')
+    def unread_count(self, request):
+        """
+        Number of unread notifications, for badges.
+        """
+        return Response({'unread_count': get_unread_count(request.user)})
+
+    @action(detail=False, methods=['post'])
+    def mark_read(self, request):
+        """
+        Mark the notifications with the given keys ("personal:<id>" or
+        "broadcast:<id>"), ids (personal) and broadcast_ids as read.
+        """
+        serializer = MarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated_count = mark_read(
+            request.user,
+            ids=serializer.validated_data.get('ids'),
+            broadcast_ids=serializer.validated_data.get('broadcast_ids'),
+        )
+        if updated_count:
+            adjust_unread([request.user.pk], -updated_count)
+            self._push_unread_count()
+        return Response(
+            {'updated': updated_count, 'unread_count': get_unread_count(request.user)},
+            status=status.HTTP_200_OK
+        )
+
     @action(detail=False, methods=['post'])
     def mark_all_as_read(self, request):
         """
-        Mark all unread notifications for the user as read.
+        Mark the user's notifications read up to personal_through and
+        broadcasts_through, the newest ids the client has listed; when they
+        are not sent, every notification visible now. Only the user's read
+        watermarks move, plus markers for the newest rows without ids.
         """
-        updated_count = self.get_queryset().filter(is_read=False).update(is_read=True)
+        serializer = MarkAllReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        unread_before = get_unread_count(request.user)
+        mark_all_read(request.user, **serializer.validated_data)
+        forget_unread([request.user.pk])
+        unread = get_unread_count(request.user)
+        updated_count = max(unread_before - unread, 0)
+        if updated_count:
+            self._push_unread_count()
         return Response(
-            {'message': f'{updated_count} notifications marked as read.'},
+            {'message': f'{updated_count} notifications marked as read.', 'unread_count': unread},
             status=status.HTTP_200_OK
-        )
\ No newline at end of file
+        )
@@ -1,6 +1,9 @@
 from django.contrib import admin
+from django.db import transaction
 
+from .dashboard import publish_status_change
 from .models import Order, OrderItem
+from .sales import record_status_change
 
 
 class OrderItemInline(admin.TabularInline):
@@ -25,3 +28,15 @@ class OrderAdmin(admin.ModelAdmin):
         "updated_at",
         "created_by",
     ]
+
+    @transaction.atomic
+    def save_model(self, request, obj, form, change):
+        previous_status = None
+        if change:
+            previous_status = (
+                Order.objects.select_for_update().values_list("status", flat=True).get(pk=obj.pk)
+            )
+        super().save_model(request, obj, form, change)
+        if change:
+            record_status_change(obj, previous_status)
+            publish_status_change(obj, previous_status)
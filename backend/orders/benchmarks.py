@@ -0,0 +1,199 @@
+"""
+Latency benchmarks for the hot API endpoints.
+
+Every scenario is driven through the DRF test client against the configured
+database (normally a local Postgres filled with ``seed_bench``). For each one
+we record p50/p95/max latency, the number of queries and the peak memory
+allocated while serving one request. Requests run inside a transaction that
+is rolled back, so write scenarios leave no rows behind.
+
+Results are compared with per-scenario budgets (``p95_ms``, ``queries``,
+``peak_kb``) and, optionally, with a previous JSON baseline.
+"""
+import json
+import math
+import re
+import time
+import tracemalloc
+
+from django.db import connection, transaction
+from rest_framework.test import APIClient
+
+from products.models import Product
+
+TRANSACTION_SQL = re.compile(r'^\s*(SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK|BEGIN|COMMIT)\b', re.IGNORECASE)
+
+DEFAULT_ITERATIONS = 30
+DEFAULT_WARMUP = 3
+
+# Query-count budgets hold on any machine. Latency (``p95_ms``) and memory
+# (``peak_kb``) budgets depend on the hardware and data volume, so they are
+# given per environment with --budgets.
+DEFAULT_BUDGETS = {
+    # Includes the outbox and event log rows of the admin and dashboard events.
+    'order_create': {'queries': 22},
+    'order_list': {'queries': 5},
+    'order_search': {'queries': 5},
+    'product_list': {'queries': 5},
+    'dashboard_summary': {'queries': 12},
+    'reports_summary': {'queries': 15},
+    'reports_pdf': {'queries': 15},
+    'reports_excel': {'queries': 15},
+    'sales_report': {'queries': 3},
+    'voice_command': {'queries': 3},
+}
+
+
+class Scenario:
+    def __init__(self, name, method, path, data=None, params=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.data = data
+        self.params = params
+
+    def payload(self):
+        # Built once per run so its lookups are not part of the timings.
+        return self.data() if callable(self.data) else self.data
+
+    def request(self, client, payload):
+        if self.method == 'post':
+            return client.post(self.path, payload, format='json')
+        return client.get(self.path, self.params)
+
+
+def _order_payload():
+    product = Product.objects.filter(stock__gt=0, status='active').order_by('-stock').first()
+    if product is None:
+        raise RuntimeError('No product with stock available; run seed_bench first.')
+    return {
+        'customer_name': 'Cliente Benchmark',
+        'payment_method': 'cash',
+        'status': 'completed',
+        'items': [{'product': product.pk, 'quantity': 1, 'unit_price': str(product.price)}],
+    }
+
+
+SCENARIOS = [
+    Scenario('order_create', 'post', '/api/orders/', data=_order_payload),
+    Scenario('order_list', 'get', '/api/orders/'),
+    Scenario('order_search', 'get', '/api/orders/', params={'search': 'Producto 0001'}),
+    Scenario('product_list', 'get', '/api/products/'),
+    Scenario('dashboard_summary', 'get', '/api/orders/dashboard-summary/'),
+    Scenario('reports_summary', 'get', '/api/orders/reports-summary/'),
+    Scenario('reports_pdf', 'get', '/api/orders/reports-pdf/'),
+    Scenario('reports_excel', 'get', '/api/orders/reports-excel/'),
+    Scenario('sales_report', 'get', '/api/products/sales-report/'),
+    Scenario('voice_command', 'post', '/api/orders/voice-command/', data={'command_text': 'productos mas vendidos'}),
+]
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class QueryRecorder:
+    """
+    Execute wrapper recording statements other than transaction control. The
+    test client's request_started signal resets ``connection.queries``, so
+    ``CaptureQueriesContext`` cannot be used here.
+    """
+    def __init__(self, queries):
+        self.queries = queries
+
+    def __call__(self, execute, sql, params, many, context):
+        if not TRANSACTION_SQL.match(sql):
+            self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+
+def _run_once(client, scenario, payload):
+    with transaction.atomic():
+        response = scenario.request(client, payload)
+        if hasattr(response, 'streaming_content'):
+            b''.join(response.streaming_content)
+        transaction.set_rollback(True)
+    if response.status_code >= 400:
+        raise RuntimeError(f'{scenario.name}: HTTP {response.status_code}')
+    return response
+
+
+def measure(client, scenario, iterations=DEFAULT_ITERATIONS, warmup=DEFAULT_WARMUP):
+    payload = scenario.payload()
+    for _ in range(warmup):
+        _run_once(client, scenario, payload)
+
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        _run_once(client, scenario, payload)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    # Query counting and tracemalloc slow requests down, so they get their own
+    # request instead of being mixed into the timings.
+    queries = []
+    with connection.execute_wrapper(QueryRecorder(queries)):
+        _run_once(client, scenario, payload)
+    tracemalloc.start()
+    try:
+        _run_once(client, scenario, payload)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'iterations': iterations,
+        'p50_ms': round(percentile(timings, 0.50), 2),
+        'p95_ms': round(percentile(timings, 0.95), 2),
+        'max_ms': round(max(timings), 2),
+        'queries': len(queries),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def make_client(user):
+    client = APIClient(SERVER_NAME='localhost')
+    client.force_authenticate(user)
+    return client
+
+
+def run_benchmarks(user, scenarios=None, iterations=DEFAULT_ITERATIONS, warmup=DEFAULT_WARMUP):
+    client = make_client(user)
+    results = {}
+    for scenario in scenarios or SCENARIOS:
+        results[scenario.name] = measure(client, scenario, iterations=iterations, warmup=warmup)
+    return results
+
+
+def check_budgets(results, budgets):
+    """Return a message for every metric above its budget."""
+    violations = []
+    for name, result in results.items():
+        for metric, limit in budgets.get(name, {}).items():
+            if metric in result and result[metric] > limit:
+                violations.append(f'{name}: {metric} {result[metric]} > budget {limit}')
+    return violations
+
+
+def check_regressions(results, baseline, tolerance):
+    """
+    Compare with a previous run. Latency may grow by ``tolerance`` (0.2 means
+    20%) before it counts as a regression; query counts may not grow at all.
+    """
+    violations = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if result['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            violations.append(f"{name}: p95_ms {result['p95_ms']} vs baseline {previous['p95_ms']}")
+        if result['queries'] > previous['queries']:
+            violations.append(f"{name}: queries {result['queries']} vs baseline {previous['queries']}")
+    return violations
+
+
+def load_json(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
@@ -1,7 +1,15 @@
 import json
+from channels.db import database_sync_to_async
+from django.db import connection, transaction
 from channels.generic.websocket import AsyncWebsocketConsumer
 
-class OrderConsumer(AsyncWebsocketConsumer):
+from notifications.eventlog import EventReplayMixin
+from notifications.models import EventLogEntry
+from notifications.outbox import attach_event_loop
+from notifications.sendqueue import BoundedSendMixin
+from .dashboard import DASHBOARD_GROUP, build_dashboard_summary
+
+class OrderConsumer(EventReplayMixin, BoundedSendMixin, AsyncWebsocketConsumer):
     async def connect(self):
         self.user = self.scope["user"]
 
@@ -11,40 +19,109 @@ class OrderConsumer(AsyncWebsocketConsumer):
 
         await self.accept()
 
+        attach_event_loop()
         # Join a group for admins/staff or a personal group for customers
         if self.user.is_staff_member:
-            await self.channel_layer.group_add(
-                "admin_orders",
-                self.channel_name
-            )
+            self.group_name = "admin_orders"
         else:
-            await self.channel_layer.group_add(
-                f"user_{self.user.id}_orders",
-                self.channel_name
-            )
+            self.group_name = f"user_{self.user.id}_orders"
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+
+        # Events missed since the client's last event_id (?since=<id>)
+        await self.replay_missed([self.group_name])
 
     async def disconnect(self, close_code):
         if not self.user.is_authenticated:
             return
 
-        if self.user.is_staff_member:
-            await self.channel_layer.group_discard(
-                "admin_orders",
-                self.channel_name
-            )
-        else:
-            await self.channel_layer.group_discard(
-                f"user_{self.user.id}_orders",
-                self.channel_name
-            )
+        await self.channel_layer.group_discard(self.group_name, self.channel_name)
 
     # This method is called when a message is sent to the group
     async def order_notification(self, event):
+        if self.is_replayed(event):
+            return
+        if 'text' in event:
+            # Serialized once for the whole group by the outbox
+            await self.send(text_data=event['text'])
+            return
         message = event['message']
         notification_type = event['type']
 
         # Send message to WebSocket
         await self.send(text_data=json.dumps({
             'type': notification_type,
+            'event_id': event.get('event_id'),
             'message': message
         }))
+
+    # Several order events coalesced by the outbox, already serialized
+    async def order_batch(self, event):
+        await self.send_batch(event)
+
+
+class DashboardConsumer(EventReplayMixin, BoundedSendMixin, AsyncWebsocketConsumer):
+    """
+    Live sales dashboard for staff: a snapshot on connect, then deltas
+    (orders.dashboard). With ``?since=`` only the missed deltas are sent,
+    unless there were too many. Sending ``{"type": "snapshot"}`` asks for a
+    fresh snapshot, e.g. after midnight.
+    """
+    async def connect(self):
+        self.user = self.scope["user"]
+
+        if not self.user.is_authenticated or not self.user.is_staff_member:
+            await self.close()
+            return
+
+        attach_event_loop()
+        await self.channel_layer.group_add(DASHBOARD_GROUP, self.channel_name)
+        await self.accept()
+        truncated = await self.replay_missed([DASHBOARD_GROUP])
+        if truncated is not False:
+            await self.send_snapshot()
+
+    async def disconnect(self, close_code):
+        if not self.user.is_authenticated or not self.user.is_staff_member:
+            return
+
+        await self.channel_layer.group_discard(DASHBOARD_GROUP, self.channel_name)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        try:
+            request = json.loads(text_data or "{}")
+        except ValueError:
+            return
+        if isinstance(request, dict) and request.get("type") == "snapshot":
+            await self.send_snapshot()
+
+    async def send_snapshot(self):
+        event_id, data = await database_sync_to_async(_snapshot)()
+        await self.send(text_data=json.dumps({
+            "type": "dashboard.snapshot",
+            "event_id": event_id,
+            "data": data,
+        }))
+
+    async def dashboard_delta(self, event):
+        if self.is_replayed(event):
+            return
+        await self.send(text_data=event.get("text") or json.dumps(event))
+
+    async def dashboard_batch(self, event):
+        await self.send_batch(event)
+
+
+def _snapshot():
+    """
+    The last event id and the figures, read from one database snapshot: in
+    READ COMMITTED each statement sees the commits made before it, so an
+    order committed in between would be counted in the figures and then
+    applied again from its delta.
+    """
+    repeatable_read = connection.vendor == "postgresql" and not connection.in_atomic_block
+    with transaction.atomic():
+        if repeatable_read:
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+        event_id = EventLogEntry.objects.order_by("-pk").values_list("pk", flat=True).first()
+        return event_id, build_dashboard_summary(top_products_limit=None)
@@ -0,0 +1,198 @@
+"""
+Sales dashboard: snapshot and live deltas.
+
+``build_dashboard_summary`` runs the aggregates behind ``dashboard-summary``.
+Instead of polling it, staff dashboards connect to ``ws/dashboard/``
+(``orders.consumers.DashboardConsumer``): they get one snapshot, then a
+``dashboard.delta`` whenever an order enters or leaves the completed state,
+or a completed order is deleted.
+The delta is computed from that order alone (its total and items) and
+queued once for the ``dashboard`` group through the outbox, so the work per
+order does not depend on how many dashboards are open. Clients add the
+delta's figures to theirs; deltas up to the snapshot's ``event_id`` are
+already included in it. The snapshot lists the sales of every product, not
+only the top five of ``dashboard-summary``: a delta can push a product out
+of the top, and clients need the next one's figures to rank it.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import DecimalField, Sum, Value
+from django.db.models.functions import Coalesce, TruncDay
+from django.utils import timezone
+
+from notifications.outbox import enqueue_channel
+from products.models import Product
+from users.models import User
+from .models import Order, OrderItem
+
+DASHBOARD_GROUP = "dashboard"
+UNCATEGORIZED = "Sin categoría"
+
+
+def build_dashboard_summary(top_products_limit=5):
+    """
+    The figures of the sales dashboard (``dashboard-summary`` and the
+    snapshot of ``ws/dashboard/``, which passes no ``top_products_limit``).
+    """
+    today = timezone.localdate()
+    start_week = today - timedelta(days=6)
+
+    completed_orders = Order.objects.filter(status=Order.Status.COMPLETED)
+    decimal_zero = Value(0, output_field=DecimalField(max_digits=12, decimal_places=2))
+
+    total_products = Product.objects.count()
+    total_customers = User.objects.filter(role="user").count()
+    today_sales = completed_orders.filter(created_at__date=today).aggregate(
+        total=Coalesce(Sum("total_amount"), decimal_zero)
+    )["total"]
+    month_sales = completed_orders.filter(
+        created_at__year=today.year, created_at__month=today.month
+    ).aggregate(total=Coalesce(Sum("total_amount"), decimal_zero))["total"]
+
+    # Ventas de la semana
+    weekly_sales_qs = (
+        completed_orders.filter(created_at__date__gte=start_week)
+        .annotate(day=TruncDay("created_at"))
+        .values("day")
+        .annotate(total=Coalesce(Sum("total_amount"), decimal_zero))
+        .order_by("day")
+    )
+    weekly_sales = [
+        {
+            "day": record["day"].strftime("%a"),
+            "date": record["day"].strftime("%Y-%m-%d"),
+            "total": float(record["total"]),
+        }
+        for record in weekly_sales_qs
+    ]
+
+    # Ventas por categoría
+    category_sales_qs = (
+        OrderItem.objects.filter(order__status=Order.Status.COMPLETED)
+        .values(name=Coalesce("product__category__name", Value(UNCATEGORIZED)))
+        .annotate(
+            value=Coalesce(Sum("quantity"), 0),
+            amount=Coalesce(Sum("total_price"), decimal_zero),
+        )
+        .order_by("-amount")
+    )
+    category_sales = [
+        {
+            "name": record["name"],
+            "units": int(record["value"]),
+            "amount": float(record["amount"]),
+        }
+        for record in category_sales_qs
+    ]
+
+    # Productos más vendidos
+    top_products_qs = (
+        OrderItem.objects.filter(order__status=Order.Status.COMPLETED)
+        .values("product__name")
+        .annotate(
+            units=Coalesce(Sum("quantity"), 0),
+            amount=Coalesce(Sum("total_price"), decimal_zero),
+        )
+        .order_by("-units")
+    )
+    if top_products_limit is not None:
+        top_products_qs = top_products_qs[:top_products_limit]
+    top_products = [
+        {
+            "name": record["product__name"],
+            "units": int(record["units"]),
+            "amount": float(record["amount"]),
+        }
+        for record in top_products_qs
+    ]
+
+    data = {
+        "stats": {
+            "total_products": total_products,
+            "total_customers": total_customers,
+            "today_sales": float(today_sales),
+            "month_sales": float(month_sales),
+        },
+        "weekly_sales": weekly_sales,
+        "category_sales": category_sales,
+        "top_products": top_products,
+    }
+    return data
+
+
+def counts_on_dashboard(status):
+    return status == Order.Status.COMPLETED
+
+
+def dashboard_delta(order, sign, items, products=None, total_amount=None):
+    """
+    Changes to the summary when ``order`` with ``(product_id, quantity,
+    total_price)`` ``items`` is added (``sign=1``) or removed (``sign=-1``).
+    ``products`` maps ids to already loaded products (with their category);
+    ``total_amount`` replaces the one of the instance.
+    """
+    today = timezone.localdate()
+    day = timezone.localtime(order.created_at).date()
+    amount = sign * float(order.total_amount if total_amount is None else total_amount)
+
+    totals = defaultdict(lambda: [0, Decimal("0.00")])
+    for product_id, quantity, total_price in items:
+        totals[product_id][0] += quantity
+        totals[product_id][1] += Decimal(total_price)
+    if products is None:
+        products = Product.objects.filter(pk__in=totals).select_related("category").in_bulk()
+    top_products = []
+    categories = defaultdict(lambda: [0, Decimal("0.00")])
+    for pk, (units, revenue) in totals.items():
+        product = products[pk]
+        category = product.category.name if product.category_id else UNCATEGORIZED
+        top_products.append({"name": product.name, "units": sign * units, "amount": sign * float(revenue)})
+        categories[category][0] += units
+        categories[category][1] += revenue
+
+    return {
+        "type": "dashboard.delta",
+        "order_id": order.pk,
+        "status": order.status,
+        "stats": {
+            "today_sales": amount if day == today else 0.0,
+            "month_sales": amount if (day.year, day.month) == (today.year, today.month) else 0.0,
+        },
+        "weekly_sales": [
+            {"day": day.strftime("%a"), "date": day.strftime("%Y-%m-%d"), "total": amount}
+        ] if today - timedelta(days=6) <= day <= today else [],
+        "category_sales": [
+            {"name": name, "units": sign * units, "amount": sign * float(revenue)}
+            for name, (units, revenue) in sorted(categories.items())
+        ],
+        "top_products": sorted(top_products, key=lambda product: product["name"]),
+    }
+
+
+def publish_status_change(order, previous_status, items=None, products=None):
+    """
+    Queue a delta for open dashboards if ``order`` entered or left the
+    completed state (``previous_status`` is None for a new order).
+    """
+    was_counted = counts_on_dashboard(previous_status)
+    is_counted = counts_on_dashboard(order.status)
+    if was_counted == is_counted:
+        return None
+    if items is None:
+        items = order.items.values_list("product_id", "quantity", "total_price")
+    delta = dashboard_delta(order, 1 if is_counted else -1, items, products)
+    return enqueue_channel([(DASHBOARD_GROUP, delta)], log=True)
+
+
+def publish_order_deleted(order, status, total_amount):
+    """
+    Queue a delta removing ``order``, about to be deleted with the stored
+    ``status`` and ``total_amount`` (the instance may be stale).
+    """
+    if not counts_on_dashboard(status):
+        return None
+    items = order.items.values_list("product_id", "quantity", "total_price")
+    delta = {**dashboard_delta(order, -1, items, total_amount=total_amount), "status": "deleted"}
+    return enqueue_channel([(DASHBOARD_GROUP, delta)], log=True)
@@ -0,0 +1,91 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.benchmarks import (
+    DEFAULT_BUDGETS,
+    DEFAULT_ITERATIONS,
+    DEFAULT_WARMUP,
+    SCENARIOS,
+    check_budgets,
+    check_regressions,
+    load_json,
+    run_benchmarks,
+)
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Measure latency, query count and memory of the hot API endpoints and enforce budgets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS, help='Timed requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=DEFAULT_WARMUP, help='Untimed requests per endpoint')
+        parser.add_argument(
+            '--only', nargs='+', choices=[scenario.name for scenario in SCENARIOS],
+            help='Run only these scenarios',
+        )
+        parser.add_argument('--user', help='Username to authenticate as (default: first admin)')
+        parser.add_argument('--output', help='Write the results to this JSON file (e.g. a new baseline)')
+        parser.add_argument('--budgets', help='JSON file of {scenario: {metric: limit}} overriding the defaults')
+        parser.add_argument('--baseline', help='Previous --output file to compare against')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Allowed p95 growth over the baseline (0.2 = 20%%)',
+        )
+
+    def get_user(self, username):
+        users = User.objects.filter(is_active=True)
+        if username:
+            user = users.filter(username=username).first()
+        else:
+            user = users.filter(role='admin').order_by('pk').first()
+        if user is None:
+            raise CommandError('No user to authenticate as; pass --user or run seed_bench first.')
+        return user
+
+    def handle(self, *args, **options):
+        budgets = dict(DEFAULT_BUDGETS)
+        try:
+            if options['budgets']:
+                budgets.update(load_json(options['budgets']))
+            baseline = load_json(options['baseline']) if options['baseline'] else None
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read JSON file: {e}')
+
+        scenarios = [
+            scenario for scenario in SCENARIOS
+            if not options['only'] or scenario.name in options['only']
+        ]
+        try:
+            results = run_benchmarks(
+                self.get_user(options['user']),
+                scenarios=scenarios,
+                iterations=options['iterations'],
+                warmup=options['warmup'],
+            )
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"{'scenario':<20}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'queries':>9}{'peak KB':>10}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<20}{result['p50_ms']:>10}{result['p95_ms']:>10}{result['max_ms']:>10}"
+                f"{result['queries']:>9}{result['peak_kb']:>10}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        violations = check_budgets(results, budgets)
+        if baseline is not None:
+            violations += check_regressions(results, baseline, options['tolerance'])
+        if violations:
+            for violation in violations:
+                self.stderr.write(violation)
+            raise CommandError(f'{len(violations)} performance budget(s) exceeded')
+        self.stdout.write(self.style.SUCCESS('All endpoints within budget'))
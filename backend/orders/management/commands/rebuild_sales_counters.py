@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from orders.sales import rebuild_sales_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-product sales counters from completed and shipped orders'
+
+    def handle(self, *args, **options):
+        products = rebuild_sales_counters()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt sales counters for {products} products'))
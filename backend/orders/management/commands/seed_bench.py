@@ -0,0 +1,59 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.seed import DEFAULT_BATCH_SIZE, DEFAULT_END, BenchSeeder, flush_bench_data
+
+
+class Command(BaseCommand):
+    help = 'Generate a large, reproducible data set for performance measurements'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--users', type=int, default=200, help='Customer accounts')
+        parser.add_argument('--staff', type=int, default=10, help='Staff accounts (admin, vendedor, ...)')
+        parser.add_argument('--months', type=int, default=12, help='Months of order history')
+        parser.add_argument('--end', type=date.fromisoformat, default=DEFAULT_END,
+                            help='Day the history ends, YYYY-MM-DD')
+        parser.add_argument('--orders-per-day', type=int, default=50)
+        parser.add_argument('--movements', type=int, default=10000, help='Inventory movements')
+        parser.add_argument('--notifications-per-user', type=int, default=20, help='Average per user')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed gives the same data')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows per INSERT')
+        parser.add_argument('--flush', action='store_true', help='Delete previously seeded data first')
+
+    def handle(self, *args, **options):
+        if options['products'] < 1:
+            raise CommandError('--products must be at least 1')
+
+        if options['flush']:
+            flush_bench_data()
+            self.stdout.write('Deleted previous benchmark data')
+
+        seeder = BenchSeeder(
+            products=options['products'],
+            categories=options['categories'],
+            users=options['users'],
+            staff=options['staff'],
+            months=options['months'],
+            orders_per_day=options['orders_per_day'],
+            movements=options['movements'],
+            notifications_per_user=options['notifications_per_user'],
+            seed=options['seed'],
+            end=options['end'],
+            batch_size=options['batch_size'],
+            stdout=self.stdout,
+        )
+        started = time.perf_counter()
+        try:
+            counts = seeder.run()
+        except Exception as e:
+            if 'unique' in str(e).lower():
+                raise CommandError(f'Benchmark data already exists, run again with --flush ({e})')
+            raise
+        total = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {total} rows in {time.perf_counter() - started:.1f}s'
+        ))
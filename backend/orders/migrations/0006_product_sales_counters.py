@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:48
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_alter_order_options'),
+        ('products', '0005_product_reorder_point'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSales',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='sales', serialize=False, to='products.product')),
+                ('units_sold', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['units_sold'], name='orders_prod_units_s_fe00c2_idx'), models.Index(fields=['revenue'], name='orders_prod_revenue_97f79f_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductMonthlySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('units_sold', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_sales', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['month', 'units_sold'], name='orders_prod_month_6dc847_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'month'), name='unique_product_month_sales')],
+            },
+        ),
+    ]
@@ -113,3 +113,45 @@ class OrderItem(models.Model):
     def save(self, *args, **kwargs):
         self.total_price = Decimal(self.unit_price) * Decimal(self.quantity)
         super().save(*args, **kwargs)
+
+
+class ProductSales(models.Model):
+    """Running sales totals of a product over completed and shipped orders."""
+
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="sales",
+    )
+    units_sold = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["units_sold"]),
+            models.Index(fields=["revenue"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.product_id}: {self.units_sold} u / {self.revenue}"
+
+
+class ProductMonthlySales(models.Model):
+    """Sales totals of a product for one calendar month."""
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="monthly_sales")
+    month = models.DateField(help_text="First day of the month")
+    units_sold = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["product", "month"], name="unique_product_month_sales"),
+        ]
+        indexes = [
+            models.Index(fields=["month", "units_sold"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.product_id} {self.month:%Y-%m}: {self.units_sold} u / {self.revenue}"
@@ -0,0 +1,147 @@
+"""
+Precomputed per-product sales counters.
+
+``ProductSales`` (all time) and ``ProductMonthlySales`` hold the units and
+revenue of completed and shipped orders. They are adjusted when an order
+enters or leaves those states or is deleted, so the sales report reads counters instead of
+aggregating every order item on each request. ``rebuild_sales_counters``
+recomputes everything from the orders and is used to reconcile drift.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import DateField, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Order, OrderItem, ProductMonthlySales, ProductSales
+
+SALES_STATUSES = (Order.Status.COMPLETED, Order.Status.SHIPPED)
+
+
+def counts_as_sale(status):
+    return status in SALES_STATUSES
+
+
+def sales_month(order):
+    return timezone.localtime(order.created_at).date().replace(day=1)
+
+
+def _upsert(model, key_columns, rows):
+    """
+    Add ``units_sold``/``revenue`` deltas with one
+    ``INSERT ... ON CONFLICT DO UPDATE SET col = col + EXCLUDED.col``.
+    """
+    if not rows:
+        return
+    table = connection.ops.quote_name(model._meta.db_table)
+    columns = key_columns + ["units_sold", "revenue"]
+    placeholders = ", ".join(["(" + ", ".join(["%s"] * len(columns)) + ")"] * len(rows))
+    sql = (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES {placeholders} "
+        f"ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET "
+        f"units_sold = {table}.units_sold + EXCLUDED.units_sold, "
+        f"revenue = {table}.revenue + EXCLUDED.revenue"
+    )
+    params = [value for row in rows for value in row]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def apply_sales_delta(items, month, sign):
+    """
+    Add (``sign=1``) or remove (``sign=-1``) ``(product_id, quantity,
+    total_price)`` items from the counters. Rows are written in product order
+    so concurrent orders lock counter rows in the same sequence.
+    """
+    totals = defaultdict(lambda: [0, Decimal("0.00")])
+    for product_id, quantity, total_price in items:
+        totals[product_id][0] += quantity
+        totals[product_id][1] += Decimal(total_price)
+    if not totals:
+        return
+
+    product_ids = sorted(totals)
+    _upsert(
+        ProductSales,
+        ["product_id"],
+        [(pk, sign * totals[pk][0], sign * totals[pk][1]) for pk in product_ids],
+    )
+    _upsert(
+        ProductMonthlySales,
+        ["product_id", "month"],
+        [
+            (pk, connection.ops.adapt_datefield_value(month), sign * totals[pk][0], sign * totals[pk][1])
+            for pk in product_ids
+        ],
+    )
+
+
+def record_status_change(order, previous_status, items=None):
+    """
+    Update the counters after ``order`` moved from ``previous_status`` (None
+    for a new order) to its current status. ``items`` defaults to the order's
+    stored items.
+    """
+    was_sale = counts_as_sale(previous_status)
+    is_sale = counts_as_sale(order.status)
+    if was_sale == is_sale:
+        return
+    if items is None:
+        items = order.items.values_list("product_id", "quantity", "total_price")
+    apply_sales_delta(items, sales_month(order), 1 if is_sale else -1)
+
+
+def record_order_deleted(order):
+    """
+    Remove the items of ``order``, about to be deleted, from the counters if
+    it counted as a sale. The stored status and total are read under a row
+    lock so a concurrent change cannot apply them twice; they are returned as
+    ``(status, total_amount)``, both ``None`` if the row is already gone.
+    """
+    status, total_amount = (
+        Order.objects.select_for_update().filter(pk=order.pk)
+        .values_list("status", "total_amount").first()
+    ) or (None, None)
+    if counts_as_sale(status):
+        items = order.items.values_list("product_id", "quantity", "total_price")
+        apply_sales_delta(items, sales_month(order), -1)
+    return status, total_amount
+
+
+@transaction.atomic
+def rebuild_sales_counters():
+    """Recompute every counter from the orders. Returns the number of products with sales."""
+    sold_items = OrderItem.objects.filter(order__status__in=SALES_STATUSES)
+
+    ProductSales.objects.all().delete()
+    ProductMonthlySales.objects.all().delete()
+
+    totals = sold_items.values("product_id").annotate(units=Sum("quantity"), amount=Sum("total_price"))
+    ProductSales.objects.bulk_create(
+        [
+            ProductSales(product_id=row["product_id"], units_sold=row["units"], revenue=row["amount"])
+            for row in totals.iterator()
+        ],
+        batch_size=1000,
+    )
+
+    monthly = (
+        sold_items.annotate(month=TruncMonth("order__created_at", output_field=DateField()))
+        .values("product_id", "month")
+        .annotate(units=Sum("quantity"), amount=Sum("total_price"))
+    )
+    ProductMonthlySales.objects.bulk_create(
+        [
+            ProductMonthlySales(
+                product_id=row["product_id"],
+                month=row["month"],
+                units_sold=row["units"],
+                revenue=row["amount"],
+            )
+            for row in monthly.iterator()
+        ],
+        batch_size=1000,
+    )
+    return ProductSales.objects.count()
@@ -0,0 +1,369 @@
+"""
+Synthetic data for performance measurements.
+
+``seed_bench`` fills the database with a configurable volume of categories,
+products, users, orders (spread over the months before a fixed end date),
+inventory movements and notifications. Everything is drawn from one
+``random.Random(seed)``, so the same options always produce the same rows,
+and everything is written with ``bulk_create`` in batches. Like the app,
+staff hear about new orders and low stock through one ``BroadcastNotification``
+each; customers get personal notifications. Seeded rows are recognisable by
+their prefixes (``BENCH-`` SKUs, ``bench_`` usernames, ``B`` order numbers,
+``[bench]`` broadcast messages) so they can be removed again with
+``flush_bench_data``.
+"""
+import random
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from notifications.models import BroadcastNotification, Notification
+from products.models import Category, InventoryMovement, Product
+
+from .models import Order, OrderItem
+from .sales import rebuild_sales_counters
+
+User = get_user_model()
+
+SKU_PREFIX = 'BENCH-'
+USERNAME_PREFIX = 'bench_'
+ORDER_PREFIX = 'B'
+BROADCAST_PREFIX = '[bench] '
+BENCH_PASSWORD = 'bench1234'
+DEFAULT_BATCH_SIZE = 2000
+# Seeded history ends here rather than today, so runs on different days
+# produce the same rows.
+DEFAULT_END = date(2026, 1, 1)
+
+BRANDS = ['Glamour & Co.', 'Sol y Arena', 'Natura Chic', 'Oficina Style', 'Urban Basic', 'Confort Zone']
+SIZES = ['XS', 'S', 'M', 'L', 'XL', 'Única']
+COLORS = ['Negro', 'Blanco', 'Rojo', 'Azul', 'Beige', 'Verde', 'Rosa']
+STAFF_ROLES = ['admin', 'vendedor', 'bodeguero', 'cajero']
+
+# Share of orders per status; orders of the last days are still open.
+STATUS_WEIGHTS = {
+    Order.Status.COMPLETED: 70,
+    Order.Status.SHIPPED: 12,
+    Order.Status.CANCELLED: 8,
+    Order.Status.PROCESSING: 5,
+    Order.Status.PENDING: 5,
+}
+OPEN_STATUS_WEIGHTS = {Order.Status.PENDING: 60, Order.Status.PROCESSING: 30, Order.Status.CANCELLED: 10}
+PAYMENT_WEIGHTS = {
+    Order.PaymentMethod.CASH: 35,
+    Order.PaymentMethod.CARD: 30,
+    Order.PaymentMethod.TRANSFER: 15,
+    Order.PaymentMethod.NEQUI: 12,
+    Order.PaymentMethod.DAVIPLATA: 8,
+}
+# Most orders have one or two lines.
+ITEMS_PER_ORDER_WEIGHTS = [45, 28, 14, 8, 5]
+# 'new_order' and 'low_stock' are broadcasts to the staff.
+NOTIFICATION_TYPES = ['order_status_update', 'promotion']
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """
+    Turn off ``auto_now``/``auto_now_add`` on ``models`` so backdated
+    ``created_at``/``updated_at`` values given to ``bulk_create`` are kept.
+    """
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now = auto_now
+            field.auto_now_add = auto_now_add
+
+
+@transaction.atomic
+def flush_bench_data():
+    """Delete every row created by ``seed_bench``."""
+    Order.objects.filter(number__startswith=ORDER_PREFIX + '-').delete()
+    Product.objects.filter(sku__startswith=SKU_PREFIX).delete()
+    Category.objects.filter(name__startswith=SKU_PREFIX).delete()
+    User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+    BroadcastNotification.objects.filter(message__startswith=BROADCAST_PREFIX).delete()
+    rebuild_sales_counters()
+
+
+class BenchSeeder:
+    def __init__(self, products=1000, categories=20, users=200, staff=10, months=12,
+                 orders_per_day=50, movements=10000, notifications_per_user=20,
+                 seed=42, end=DEFAULT_END, batch_size=DEFAULT_BATCH_SIZE, stdout=None):
+        self.volumes = {
+            'products': products,
+            'categories': categories,
+            'users': users,
+            'staff': staff,
+            'months': months,
+            'orders_per_day': orders_per_day,
+            'movements': movements,
+            'notifications_per_user': notifications_per_user,
+        }
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.stdout = stdout
+        self.end = timezone.make_aware(datetime.combine(end, time.min))
+        self.start = self.end - timedelta(days=30 * months)
+        self.counts = defaultdict(int)
+
+    def log(self, message):
+        if self.stdout is not None:
+            self.stdout.write(message)
+
+    def moment(self, start=None, end=None):
+        start = start or self.start
+        end = end or self.end
+        return start + timedelta(seconds=self.random.uniform(0, (end - start).total_seconds()))
+
+    def weighted(self, weights):
+        return self.random.choices(list(weights), weights=list(weights.values()))[0]
+
+    def run(self):
+        with transaction.atomic(), explicit_timestamps(Category, Product, User, Order, OrderItem,
+                                                        InventoryMovement, Notification, BroadcastNotification):
+            self.seed_categories()
+            self.seed_products()
+            self.seed_users()
+            self.seed_orders()
+            self.seed_movements()
+            self.seed_notifications()
+            rebuild_sales_counters()
+        return dict(self.counts)
+
+    def bulk_create(self, model, objects):
+        created = model.objects.bulk_create(objects, batch_size=self.batch_size)
+        self.counts[model._meta.model_name] += len(created)
+        return created
+
+    def seed_categories(self):
+        self.categories = self.bulk_create(Category, [
+            Category(
+                name=f'{SKU_PREFIX}Categoría {index:03d}',
+                description='Categoría generada para pruebas de rendimiento.',
+                created_at=self.start,
+                updated_at=self.start,
+            )
+            for index in range(self.volumes['categories'])
+        ])
+        self.log(f'{len(self.categories)} categories')
+
+    def seed_products(self):
+        products = []
+        for index in range(self.volumes['products']):
+            price = Decimal(self.random.randrange(1500, 25000)) / 100
+            created_at = self.moment(self.start - timedelta(days=30), self.start)
+            products.append(Product(
+                name=f'Producto {index:06d}',
+                description='Producto generado para pruebas de rendimiento.',
+                sku=f'{SKU_PREFIX}{index:07d}',
+                price=price,
+                cost=(price * Decimal('0.55')).quantize(Decimal('0.01')),
+                category=self.random.choice(self.categories) if self.categories else None,
+                stock=self.random.randint(0, 200),
+                reorder_point=self.random.choice([5, 10, 10, 15, 20]),
+                size=self.random.choice(SIZES),
+                color=self.random.choice(COLORS),
+                brand=self.random.choice(BRANDS),
+                status='active' if self.random.random() < 0.95 else 'inactive',
+                created_at=created_at,
+                updated_at=created_at,
+            ))
+        self.products = self.bulk_create(Product, products)
+        # A few products sell far more than the rest (Zipf-like popularity).
+        popularity = [1 / (rank + 1) ** 1.1 for rank in range(len(self.products))]
+        self.popular_products = self.random.sample(self.products, len(self.products))
+        self.popularity_cum_weights = []
+        total = 0
+        for weight in popularity:
+            total += weight
+            self.popularity_cum_weights.append(total)
+        self.log(f'{len(self.products)} products')
+
+    def seed_users(self):
+        # Hashing is deliberately slow, so every seeded user shares one hash.
+        password = make_password(BENCH_PASSWORD)
+        users = []
+        for index in range(self.volumes['users'] + self.volumes['staff']):
+            is_staff = index < self.volumes['staff']
+            role = STAFF_ROLES[index % len(STAFF_ROLES)] if is_staff else 'user'
+            joined = self.moment()
+            users.append(User(
+                username=f'{USERNAME_PREFIX}{role}_{index:06d}',
+                email=f'{USERNAME_PREFIX}{index:06d}@example.com',
+                first_name='Bench',
+                last_name=f'{index:06d}',
+                password=password,
+                role=role,
+                is_staff=is_staff and role == 'admin',
+                date_joined=joined,
+                created_at=joined,
+                updated_at=joined,
+            ))
+        users = self.bulk_create(User, users)
+        self.staff = users[:self.volumes['staff']]
+        self.customers = users[self.volumes['staff']:]
+        self.log(f'{len(users)} users')
+
+    def seed_orders(self):
+        days = (self.end - self.start).days
+        sequence = 0
+        orders_batch = []
+        for day in range(days):
+            day_start = self.start + timedelta(days=day)
+            recent = days - day <= 2
+            # Weekends are busier.
+            volume = self.volumes['orders_per_day'] * (1.3 if day_start.weekday() >= 5 else 1)
+            for _ in range(max(0, round(self.random.gauss(volume, volume * 0.2)))):
+                sequence += 1
+                orders_batch.append(self.build_order(sequence, day_start, recent))
+                if len(orders_batch) >= self.batch_size:
+                    self.write_orders(orders_batch)
+                    orders_batch = []
+        if orders_batch:
+            self.write_orders(orders_batch)
+        self.log(f"{self.counts['order']} orders, {self.counts['orderitem']} order items")
+
+    def build_order(self, sequence, day_start, recent):
+        created_at = self.moment(day_start, day_start + timedelta(days=1))
+        status = self.weighted(OPEN_STATUS_WEIGHTS if recent else STATUS_WEIGHTS)
+        customer = self.random.choice(self.customers) if self.customers else None
+        order = Order(
+            number=f'{ORDER_PREFIX}-{sequence:010d}',
+            customer_name=customer.get_full_name() if customer else 'Cliente',
+            customer_email=customer.email if customer else None,
+            payment_method=self.weighted(PAYMENT_WEIGHTS),
+            status=status,
+            created_by=self.random.choice(self.staff) if self.staff else None,
+            created_at=created_at,
+            updated_at=created_at,
+        )
+        line_count = self.random.choices(range(1, 6), weights=ITEMS_PER_ORDER_WEIGHTS)[0]
+        products = self.random.choices(
+            self.popular_products, cum_weights=self.popularity_cum_weights, k=line_count
+        )
+        order._bench_items = []
+        subtotal = Decimal('0.00')
+        for product in {product.pk: product for product in products}.values():
+            quantity = self.random.choices([1, 2, 3, 4], weights=[70, 20, 7, 3])[0]
+            total_price = product.price * quantity
+            subtotal += total_price
+            order._bench_items.append(OrderItem(
+                product=product,
+                quantity=quantity,
+                unit_price=product.price,
+                total_price=total_price,
+                created_at=created_at,
+                updated_at=created_at,
+            ))
+        order.subtotal_amount = order.total_amount = subtotal
+        return order
+
+    def write_orders(self, orders):
+        orders = self.bulk_create(Order, orders)
+        items = []
+        for order in orders:
+            for item in order._bench_items:
+                item.order = order
+                items.append(item)
+        self.bulk_create(OrderItem, items)
+        self.bulk_create(BroadcastNotification, [
+            self.broadcast(
+                f'New Order #{order.number} placed by {order.customer_name}.', 'new_order', order.created_at
+            )
+            for order in orders
+        ])
+
+    def broadcast(self, message, notification_type, created_at):
+        return BroadcastNotification(
+            audience=BroadcastNotification.STAFF,
+            message=f'{BROADCAST_PREFIX}{message}',
+            notification_type=notification_type,
+            created_at=created_at,
+        )
+
+    def seed_movements(self):
+        if not self.products:
+            return
+        stocks = {product.pk: product.stock for product in self.products}
+        moments = sorted(self.moment() for _ in range(self.volumes['movements']))
+        movements = []
+        low_stock = []
+        for created_at in moments:
+            product = self.random.choices(
+                self.popular_products, cum_weights=self.popularity_cum_weights
+            )[0]
+            before = stocks[product.pk]
+            movement_type = 'salida' if before > 0 and self.random.random() < 0.6 else 'entrada'
+            if movement_type == 'salida':
+                quantity = self.random.randint(1, min(before, 5))
+                reason = self.random.choice(['venta', 'venta', 'venta', 'merma'])
+            else:
+                quantity = self.random.randint(5, 50)
+                reason = 'compra'
+            after = before + quantity if movement_type == 'entrada' else before - quantity
+            stocks[product.pk] = after
+            if before >= product.reorder_point > after:
+                low_stock.append(self.broadcast(
+                    f'Low stock: {product.name} ({product.sku}) has {after} units left '
+                    f'(reorder point {product.reorder_point}).',
+                    'low_stock', created_at,
+                ))
+            movements.append(InventoryMovement(
+                product=product,
+                movement_type=movement_type,
+                quantity=quantity,
+                reason=reason,
+                created_by=self.random.choice(self.staff) if self.staff else None,
+                created_at=created_at,
+                stock_before=before,
+                stock_after=after,
+            ))
+            if len(movements) >= self.batch_size:
+                self.bulk_create(InventoryMovement, movements)
+                movements = []
+        if movements:
+            self.bulk_create(InventoryMovement, movements)
+        self.bulk_create(BroadcastNotification, low_stock)
+
+        # Current stock is where the movement ledger ends.
+        for product in self.products:
+            product.stock = stocks[product.pk]
+        Product.objects.bulk_update(self.products, ['stock'], batch_size=self.batch_size)
+        self.log(f"{self.counts['inventorymovement']} inventory movements")
+
+    def seed_notifications(self):
+        notifications = []
+        for user in self.staff + self.customers:
+            count = self.random.randint(0, 2 * self.volumes['notifications_per_user'])
+            for _ in range(count):
+                created_at = self.moment(max(user.created_at, self.start))
+                # Older notifications are more likely to have been read.
+                age = (self.end - created_at) / (self.end - self.start)
+                notifications.append(Notification(
+                    recipient=user,
+                    message='Notificación generada para pruebas de rendimiento.',
+                    notification_type=self.random.choice(NOTIFICATION_TYPES),
+                    is_read=self.random.random() < 0.2 + 0.7 * age,
+                    created_at=created_at,
+                ))
+                if len(notifications) >= self.batch_size:
+                    self.bulk_create(Notification, notifications)
+                    notifications = []
+        if notifications:
+            self.bulk_create(Notification, notifications)
+        self.log(f"{self.counts['notification']} notifications, "
+                 f"{self.counts['broadcastnotification']} broadcasts")
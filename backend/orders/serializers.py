@@ -5,7 +5,10 @@ from django.utils import timezone
 from rest_framework import serializers
 
 from products.models import Product, InventoryMovement
+from products.stock import check_reorder_point
+from .dashboard import publish_status_change
 from .models import Order, OrderItem
+from .sales import record_status_change
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -79,9 +82,14 @@ class OrderSerializer(serializers.ModelSerializer):
         )
 
         subtotal = Decimal("0.00")
+        sold_items = []
+        products = {}
         for item_data in items_data:
             product: Product = item_data["product"]
-            product = Product.objects.select_for_update().get(pk=product.pk)
+            product = (
+                Product.objects.select_for_update(of=("self",)).select_related("category").get(pk=product.pk)
+            )
+            products[product.pk] = product
             quantity = item_data["quantity"]
             unit_price = Decimal(item_data.get("unit_price") or product.price)
 
@@ -92,11 +100,13 @@ class OrderSerializer(serializers.ModelSerializer):
                 unit_price=unit_price,
             )
             subtotal += order_item.total_price
+            sold_items.append((product.pk, quantity, order_item.total_price))
 
             stock_before = product.stock
             stock_after = max(0, stock_before - quantity)
             product.stock = stock_after
             product.save(update_fields=["stock"])
+            check_reorder_point(product.pk, stock_before, stock_after, product.reorder_point)
 
             InventoryMovement.objects.create(
                 product=product,
@@ -112,4 +122,17 @@ class OrderSerializer(serializers.ModelSerializer):
         order.subtotal_amount = subtotal
         order.total_amount = subtotal - order.discount_amount + order.tax_amount
         order.save(update_fields=["subtotal_amount", "total_amount"])
+        record_status_change(order, None, items=sold_items)
+        publish_status_change(order, None, items=sold_items, products=products)
         return order
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        # Lock the order so concurrent status changes are counted once.
+        previous_status = (
+            Order.objects.select_for_update().values_list("status", flat=True).get(pk=instance.pk)
+        )
+        instance = super().update(instance, validated_data)
+        record_status_change(instance, previous_status)
+        publish_status_change(instance, previous_status)
+        return instance
@@ -1,16 +1,17 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, pre_delete
 from django.dispatch import receiver
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+from notifications.outbox import enqueue_channel
 from .models import Order
+from .dashboard import publish_order_deleted
+from .sales import record_order_deleted
 
 @receiver(post_save, sender=Order)
 def order_created_or_updated(sender, instance, created, **kwargs):
     """
-    Sends a notification when an order is created or updated.
+    Sends a notification when an order is created or updated. Messages go
+    through the outbox, so they are delivered only after the order commits.
     """
-    channel_layer = get_channel_layer()
-    
+
     if created:
         # Notify admins of a new order
         message = {
@@ -23,10 +24,10 @@ def order_created_or_updated(sender, instance, created, **kwargs):
                 'total_amount': str(instance.total_amount),
             }
         }
-        async_to_sync(channel_layer.group_send)("admin_orders", message)
+        enqueue_channel([("admin_orders", message)], log=True)
     else:
         # Notify the specific customer of a status update
-        if instance.created_by:
+        if instance.created_by_id:
             message = {
                 'type': 'order.notification',
                 'message': {
@@ -36,5 +37,16 @@ def order_created_or_updated(sender, instance, created, **kwargs):
                     'new_status': instance.status,
                 }
             }
-            user_group_name = f"user_{instance.created_by.id}_orders"
-            async_to_sync(channel_layer.group_send)(user_group_name, message)
+            user_group_name = f"user_{instance.created_by_id}_orders"
+            enqueue_channel([(user_group_name, message)], log=True)
+
+
+@receiver(pre_delete, sender=Order)
+def order_deleted(sender, instance, **kwargs):
+    """
+    Takes a deleted completed/shipped order out of the sales counters and
+    the live dashboards. Runs for every deletion path: the admin, queryset
+    deletes and cascades.
+    """
+    status, total_amount = record_order_deleted(instance)
+    publish_order_deleted(instance, status, total_amount)
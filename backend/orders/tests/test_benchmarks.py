@@ -0,0 +1,47 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from orders.benchmarks import check_budgets, check_regressions
+from orders.models import Order
+
+from .test_seed import SMALL
+
+
+class BenchEndpointsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_bench', **SMALL)
+
+    def test_runs_every_scenario_and_rolls_back(self):
+        orders = Order.objects.count()
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'baseline.json')
+            call_command('bench_endpoints', iterations=2, warmup=0, output=output, stdout=StringIO())
+            with open(output) as f:
+                results = json.load(f)
+        self.assertIn('voice_command', results)
+        self.assertGreater(results['order_list']['queries'], 0)
+        self.assertEqual(Order.objects.count(), orders)
+
+    def test_budget_exceeded_fails(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump({'sales_report': {'queries': 0}}, f)
+        try:
+            with self.assertRaises(CommandError):
+                call_command(
+                    'bench_endpoints', iterations=1, warmup=0, only=['sales_report'],
+                    budgets=f.name, stdout=StringIO(), stderr=StringIO(),
+                )
+        finally:
+            os.unlink(f.name)
+
+    def test_regressions(self):
+        baseline = {'order_list': {'p95_ms': 10.0, 'queries': 3}}
+        self.assertEqual(check_regressions({'order_list': {'p95_ms': 11.0, 'queries': 3}}, baseline, 0.2), [])
+        self.assertEqual(len(check_regressions({'order_list': {'p95_ms': 13.0, 'queries': 4}}, baseline, 0.2)), 2)
+        self.assertEqual(check_budgets({'order_list': {'queries': 3}}, {'order_list': {'queries': 3}}), [])
@@ -0,0 +1,198 @@
+import threading
+import unittest
+from decimal import Decimal
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.admin.sites import site
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test import override_settings
+from rest_framework.test import APITransactionTestCase
+
+from notifications.models import OutboxMessage
+from notifications.outbox import dispatch_pending
+from orders.consumers import DashboardConsumer, _snapshot
+from orders.dashboard import DASHBOARD_GROUP, build_dashboard_summary
+from orders.models import Order
+from products.models import Category, Product
+
+User = get_user_model()
+
+
+def apply_delta(summary, delta):
+    """What a dashboard client does with a delta: add it, drop rows that reach zero."""
+    for key, value in delta['stats'].items():
+        summary['stats'][key] = round(summary['stats'][key] + value, 2)
+    for field, key in (('weekly_sales', 'date'), ('category_sales', 'name'), ('top_products', 'name')):
+        rows = {row[key]: row for row in summary[field]}
+        for change in delta[field]:
+            row = rows.setdefault(change[key], {k: v for k, v in change.items() if isinstance(v, str)})
+            for metric, value in change.items():
+                if not isinstance(value, str):
+                    row[metric] = round(row.get(metric, 0) + value, 2)
+        summary[field] = [
+            row for row in rows.values() if any(v for v in row.values() if not isinstance(v, str))
+        ]
+    return summary
+
+
+def normalized(summary):
+    ordered = {'weekly_sales': 'date', 'category_sales': 'name', 'top_products': 'name'}
+    return {
+        **summary,
+        **{field: sorted(summary[field], key=lambda row: row[key]) for field, key in ordered.items()},
+    }
+
+
+@override_settings(OUTBOX_AUTO_DISPATCH=False)
+class DashboardDeltaTest(APITransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='password123', role='admin')
+        shirts = Category.objects.create(name='Camisas')
+        self.shirt = Product.objects.create(
+            name='Camisa', sku='CAM-1', price=Decimal('10.00'), stock=100, category=shirts
+        )
+        self.cap = Product.objects.create(name='Gorra', sku='GOR-1', price=Decimal('5.00'), stock=100)
+        self.client.force_authenticate(self.admin)
+
+    def create_order(self, status, items):
+        response = self.client.post('/api/orders/', {
+            'customer_name': 'Cliente',
+            'status': status,
+            'items': [
+                {'product': product.pk, 'quantity': quantity, 'unit_price': str(product.price)}
+                for product, quantity in items
+            ],
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data['id']
+
+    def deltas(self):
+        return [
+            event
+            for row in OutboxMessage.objects.order_by('pk')
+            for group, event in row.payload['messages']
+            if group == DASHBOARD_GROUP
+        ]
+
+    def test_deltas_keep_snapshot_in_sync(self):
+        self.create_order('completed', [(self.shirt, 1)])
+        snapshot = build_dashboard_summary()
+        OutboxMessage.objects.all().delete()
+
+        completed = self.create_order('completed', [(self.shirt, 2), (self.cap, 1)])
+        pending = self.create_order('pending', [(self.cap, 4)])
+        self.client.patch(f'/api/orders/{pending}/', {'status': 'completed'}, format='json')
+        self.client.patch(f'/api/orders/{completed}/', {'status': 'cancelled'}, format='json')
+
+        deltas = self.deltas()
+        self.assertEqual([delta['status'] for delta in deltas], ['completed', 'completed', 'cancelled'])
+        self.assertEqual(deltas[0]['stats'], {'today_sales': 25.0, 'month_sales': 25.0})
+        self.assertEqual(deltas[0]['category_sales'], [
+            {'name': 'Camisas', 'units': 2, 'amount': 20.0},
+            {'name': 'Sin categoría', 'units': 1, 'amount': 5.0},
+        ])
+        self.assertEqual(deltas[2]['top_products'][0], {'name': 'Camisa', 'units': -2, 'amount': -20.0})
+        self.assertTrue(all(delta['event_id'] for delta in deltas))
+
+        for delta in deltas:
+            snapshot = apply_delta(snapshot, delta)
+        self.assertEqual(normalized(snapshot), normalized(build_dashboard_summary()))
+
+    def test_snapshot_lists_every_product(self):
+        products = [
+            Product.objects.create(name=f'Producto {n}', sku=f'P-{n}', price=Decimal('1.00'), stock=100)
+            for n in range(6)
+        ]
+        for units, product in enumerate(products, start=1):
+            self.create_order('completed', [(product, units)])
+        snapshot = _snapshot()[1]
+        OutboxMessage.objects.all().delete()
+
+        # Producto 0 was sixth; it is first now, and Producto 1 drops out of the top five.
+        self.create_order('completed', [(products[0], 10)])
+        snapshot = apply_delta(snapshot, self.deltas()[0])
+        ranked = sorted(snapshot['top_products'], key=lambda row: -row['units'])[:5]
+        self.assertEqual(ranked, build_dashboard_summary()['top_products'])
+        self.assertEqual(len(self.client.get('/api/orders/dashboard-summary/').data['top_products']), 5)
+
+    def test_admin_changes_and_deletes_publish_deltas(self):
+        self.create_order('completed', [(self.shirt, 1)])
+        edited = self.create_order('completed', [(self.shirt, 2)])
+        deleted = self.create_order('completed', [(self.cap, 3)])
+        pending = self.create_order('pending', [(self.cap, 1)])
+        snapshot = build_dashboard_summary()
+        OutboxMessage.objects.all().delete()
+
+        order = Order.objects.get(pk=edited)
+        order.status = 'cancelled'
+        site._registry[Order].save_model(None, order, None, change=True)
+        # The delta uses the stored total, not the one of a stale instance.
+        stale = Order.objects.get(pk=deleted)
+        stale.total_amount = Decimal('999.00')
+        stale.delete()
+        Order.objects.get(pk=pending).delete()
+
+        deltas = self.deltas()
+        self.assertEqual([delta['status'] for delta in deltas], ['cancelled', 'deleted'])
+        for delta in deltas:
+            snapshot = apply_delta(snapshot, delta)
+        self.assertEqual(normalized(snapshot), normalized(build_dashboard_summary()))
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'REPEATABLE READ needs PostgreSQL')
+    def test_snapshot_ignores_orders_committed_while_reading(self):
+        def order_commits_between_statements(**kwargs):
+            def create():
+                try:
+                    self.create_order('completed', [(self.cap, 2)])
+                finally:
+                    connections.close_all()
+
+            thread = threading.Thread(target=create)
+            thread.start()
+            thread.join()
+            return build_dashboard_summary(**kwargs)
+
+        with mock.patch('orders.consumers.build_dashboard_summary', side_effect=order_commits_between_statements):
+            event_id, data = _snapshot()
+        # Neither the order nor its delta: the delta will be sent after ``event_id``.
+        self.assertIsNone(event_id)
+        self.assertEqual(data['stats']['today_sales'], 0.0)
+
+        event_id, data = _snapshot()
+        self.assertGreaterEqual(event_id, self.deltas()[0]['event_id'])
+        self.assertEqual(data['stats']['today_sales'], 10.0)
+
+    def test_consumer_sends_snapshot_then_deltas(self):
+        seller = User.objects.create_user(username='cliente', password='password123', role='user')
+
+        async def run():
+            refused = WebsocketCommunicator(DashboardConsumer.as_asgi(), '/ws/dashboard/')
+            refused.scope['user'] = seller
+            connected, _ = await refused.connect()
+            self.assertFalse(connected)
+
+            communicator = WebsocketCommunicator(DashboardConsumer.as_asgi(), '/ws/dashboard/')
+            communicator.scope['user'] = self.admin
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            snapshot = await communicator.receive_json_from()
+            await sync_to_async(self.create_order)('completed', [(self.cap, 2)])
+            await sync_to_async(dispatch_pending)()
+            delta = await communicator.receive_json_from()
+            await communicator.send_json_to({'type': 'snapshot'})
+            refreshed = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return snapshot, delta, refreshed
+
+        snapshot, delta, refreshed = async_to_sync(run)()
+        self.assertEqual(snapshot['type'], 'dashboard.snapshot')
+        self.assertEqual(snapshot['data']['stats']['today_sales'], 0.0)
+        self.assertEqual(delta['type'], 'dashboard.delta')
+        self.assertEqual(delta['stats']['today_sales'], 10.0)
+        self.assertEqual(refreshed['data']['stats']['today_sales'], 10.0)
+        self.assertEqual(refreshed['event_id'], delta['event_id'])
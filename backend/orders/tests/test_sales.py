@@ -0,0 +1,98 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+
+from orders.models import Order, ProductMonthlySales, ProductSales
+from orders.sales import rebuild_sales_counters
+from products.models import Product
+
+User = get_user_model()
+
+
+class SalesCountersTest(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='password123', role='admin')
+        self.shirt = Product.objects.create(name='Camisa', sku='CAM-1', price=Decimal('10.00'), stock=100)
+        self.cap = Product.objects.create(name='Gorra', sku='GOR-1', price=Decimal('5.00'), stock=100)
+        self.client.force_authenticate(self.admin)
+
+    def create_order(self, status, items):
+        response = self.client.post('/api/orders/', {
+            'customer_name': 'Cliente',
+            'status': status,
+            'items': [
+                {'product': product.pk, 'quantity': quantity, 'unit_price': str(product.price)}
+                for product, quantity in items
+            ],
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return Order.objects.get(pk=response.data['id'])
+
+    def counters(self):
+        return {
+            row.product_id: (row.units_sold, row.revenue)
+            for row in ProductSales.objects.all()
+        }
+
+    def test_counters_follow_status_transitions(self):
+        order = self.create_order('completed', [(self.shirt, 2), (self.cap, 1)])
+        self.create_order('pending', [(self.shirt, 5)])
+        self.assertEqual(self.counters(), {
+            self.shirt.pk: (2, Decimal('20.00')),
+            self.cap.pk: (1, Decimal('5.00')),
+        })
+
+        self.client.patch(f'/api/orders/{order.pk}/', {'status': 'shipped'}, format='json')
+        self.assertEqual(self.counters()[self.shirt.pk], (2, Decimal('20.00')))
+
+        self.client.patch(f'/api/orders/{order.pk}/', {'status': 'cancelled'}, format='json')
+        self.assertEqual(self.counters()[self.shirt.pk], (0, Decimal('0.00')))
+        self.assertEqual(ProductMonthlySales.objects.get(product=self.shirt).units_sold, 0)
+
+    def test_deleted_sales_are_removed(self):
+        completed = self.create_order('completed', [(self.shirt, 2), (self.cap, 1)])
+        pending = self.create_order('pending', [(self.shirt, 5)])
+        self.create_order('shipped', [(self.shirt, 1)])
+
+        # Orders are deleted from the admin, or by cascade; the API does not allow it.
+        pending.delete()
+        self.assertEqual(self.counters()[self.shirt.pk], (3, Decimal('30.00')))
+
+        completed.delete()
+        self.assertEqual(self.counters(), {
+            self.shirt.pk: (1, Decimal('10.00')),
+            self.cap.pk: (0, Decimal('0.00')),
+        })
+        self.assertEqual(ProductMonthlySales.objects.get(product=self.shirt).units_sold, 1)
+
+        Order.objects.all().delete()
+        self.assertEqual(self.counters()[self.shirt.pk], (0, Decimal('0.00')))
+
+    def test_rebuild_matches_incremental_counters(self):
+        self.create_order('completed', [(self.shirt, 2), (self.cap, 1)])
+        self.create_order('completed', [(self.shirt, 3)])
+        incremental = self.counters()
+
+        ProductSales.objects.update(units_sold=999)
+        rebuild_sales_counters()
+        self.assertEqual(self.counters(), incremental)
+        self.assertEqual(ProductMonthlySales.objects.get(product=self.shirt).units_sold, 5)
+
+    def test_sales_report_reads_counters(self):
+        self.create_order('completed', [(self.shirt, 3), (self.cap, 2)])
+
+        response = self.client.get('/api/products/sales-report/')
+        self.assertEqual(
+            [(row['sku'], row['total_units_sold']) for row in response.data],
+            [('CAM-1', 3), ('GOR-1', 2)],
+        )
+
+        month = Order.objects.first().created_at.strftime('%Y-%m')
+        response = self.client.get('/api/products/sales-report/', {'month': month, 'ordering': 'total_revenue'})
+        self.assertEqual(
+            [(row['sku'], row['total_revenue']) for row in response.data],
+            [('GOR-1', '10.00'), ('CAM-1', '30.00')],
+        )
+        response = self.client.get('/api/products/sales-report/', {'month': '1999-01'})
+        self.assertEqual({row['total_units_sold'] for row in response.data}, {0})
@@ -0,0 +1,46 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from notifications.models import BroadcastNotification, Notification
+from orders.models import Order, OrderItem, ProductSales
+from orders.sales import SALES_STATUSES
+from orders.seed import DEFAULT_END
+from products.models import InventoryMovement, Product
+
+SMALL = dict(
+    products=30, categories=3, users=8, staff=2, months=1, orders_per_day=4,
+    movements=100, notifications_per_user=2, seed=7, stdout=StringIO(),
+)
+
+
+def fingerprint():
+    return (
+        list(Product.objects.order_by('sku').values_list('sku', 'price', 'stock')),
+        list(Order.objects.order_by('number').values_list('number', 'status', 'total_amount', 'created_at')),
+        list(OrderItem.objects.order_by('order__number', 'product__sku').values_list('product__sku', 'quantity')),
+    )
+
+
+class SeedBenchTest(TestCase):
+    def test_seed_is_deterministic_and_consistent(self):
+        call_command('seed_bench', **SMALL)
+        first = fingerprint()
+        self.assertEqual(Product.objects.count(), 30)
+        self.assertTrue(Order.objects.exists())
+        self.assertTrue(Notification.objects.exists())
+        self.assertFalse(Notification.objects.filter(notification_type__in=['new_order', 'low_stock']).exists())
+        self.assertEqual(BroadcastNotification.objects.filter(notification_type='new_order').count(), Order.objects.count())
+        self.assertLess(Order.objects.latest('created_at').created_at.date(), DEFAULT_END)
+        self.assertEqual(InventoryMovement.objects.count(), 100)
+        self.assertFalse(Product.objects.filter(stock__lt=0).exists())
+
+        sold = sum(
+            OrderItem.objects.filter(order__status__in=SALES_STATUSES).values_list('quantity', flat=True)
+        )
+        self.assertEqual(sum(ProductSales.objects.values_list('units_sold', flat=True)), sold)
+
+        call_command('seed_bench', flush=True, **SMALL)
+        self.assertEqual(fingerprint(), first)
+        self.assertEqual(BroadcastNotification.objects.filter(notification_type='new_order').count(), Order.objects.count())
@@ -2,7 +2,7 @@ from datetime import timedelta
 from decimal import Decimal
 
 from django.db.models import Count, Sum, F, Value, DecimalField, ExpressionWrapper
-from django.db.models.functions import Coalesce, TruncDay, TruncMonth
+from django.db.models.functions import Coalesce, TruncMonth
 from django.utils import timezone
 from rest_framework import viewsets
 from rest_framework.decorators import action
@@ -11,8 +11,10 @@ from rest_framework.response import Response
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
 
+from config.permissions import IsAdminUser
+from notifications.sendqueue import metrics as send_queue_metrics
 from products.models import Product
-from users.models import User
+from .dashboard import build_dashboard_summary
 from .models import Order, OrderItem
 import io
 import openpyxl
@@ -58,90 +60,16 @@ class OrderViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(status=status_param)
         return queryset
 
+    @action(detail=False, methods=["get"], url_path="ws-metrics", permission_classes=[IsAdminUser])
+    def ws_metrics(self, request):
+        """
+        WebSocket send queue metrics of this process (closed sockets, dropped frames, queue lag)
+        """
+        return Response(send_queue_metrics.snapshot())
+
     @action(detail=False, methods=["get"], url_path="dashboard-summary")
     def dashboard_summary(self, request):
-        today = timezone.localdate()
-        start_week = today - timedelta(days=6)
-
-        completed_orders = Order.objects.filter(status=Order.Status.COMPLETED)
-        decimal_zero = Value(0, output_field=DecimalField(max_digits=12, decimal_places=2))
-
-        total_products = Product.objects.count()
-        total_customers = User.objects.filter(role="user").count()
-        today_sales = completed_orders.filter(created_at__date=today).aggregate(
-            total=Coalesce(Sum("total_amount"), decimal_zero)
-        )["total"]
-        month_sales = completed_orders.filter(
-            created_at__year=today.year, created_at__month=today.month
-        ).aggregate(total=Coalesce(Sum("total_amount"), decimal_zero))["total"]
-
-        # Ventas de la semana
-        weekly_sales_qs = (
-            completed_orders.filter(created_at__date__gte=start_week)
-            .annotate(day=TruncDay("created_at"))
-            .values("day")
-            .annotate(total=Coalesce(Sum("total_amount"), decimal_zero))
-            .order_by("day")
-        )
-        weekly_sales = [
-            {
-                "day": record["day"].strftime("%a"),
-                "date": record["day"].strftime("%Y-%m-%d"),
-                "total": float(record["total"]),
-            }
-            for record in weekly_sales_qs
-        ]
-
-        # Ventas por categoría
-        category_sales_qs = (
-            OrderItem.objects.filter(order__status=Order.Status.COMPLETED)
-            .values(name=Coalesce("product__category__name", Value("Sin categoría")))
-            .annotate(
-                value=Coalesce(Sum("quantity"), 0),
-                amount=Coalesce(Sum("total_price"), decimal_zero),
-            )
-            .order_by("-amount")
-        )
-        category_sales = [
-            {
-                "name": record["name"],
-                "units": int(record["value"]),
-                "amount": float(record["amount"]),
-            }
-            for record in category_sales_qs
-        ]
-
-        # Productos más vendidos
-        top_products_qs = (
-            OrderItem.objects.filter(order__status=Order.Status.COMPLETED)
-            .values("product__name")
-            .annotate(
-                units=Coalesce(Sum("quantity"), 0),
-                amount=Coalesce(Sum("total_price"), decimal_zero),
-            )
-            .order_by("-units")[:5]
-        )
-        top_products = [
-            {
-                "name": record["product__name"],
-                "units": int(record["units"]),
-                "amount": float(record["amount"]),
-            }
-            for record in top_products_qs
-        ]
-
-        data = {
-            "stats": {
-                "total_products": total_products,
-                "total_customers": total_customers,
-                "today_sales": float(today_sales),
-                "month_sales": float(month_sales),
-            },
-            "weekly_sales": weekly_sales,
-            "category_sales": category_sales,
-            "top_products": top_products,
-        }
-        return Response(data)
+        return Response(build_dashboard_summary())
 
     def _get_report_data(self, period: str = "month"):
         today = timezone.localdate()
@@ -274,9 +202,9 @@ class OrderViewSet(viewsets.ModelViewSet):
             {
                 "product": product.name,
                 "stock": product.stock,
-                "status": "ok" if product.stock >= 20 else "low",
+                "status": "low" if product.is_low_stock else "ok",
             }
-            for product in Product.objects.order_by("stock")[:20]
+            for product in Product.objects.only("name", "stock", "reorder_point").order_by("stock")[:20]
         ]
 
         return {
@@ -641,7 +569,7 @@ class OrderViewSet(viewsets.ModelViewSet):
                     response_data = {"message": f"Error al procesar 'clientes frecuentes': {e}"}
             elif "productos" in command_text and ("bajo stock" in command_text or "stock bajo" in command_text): # More flexible check
                 try:
-                    low_stock_products_qs = Product.objects.filter(stock__lt=20).values("name", "stock").order_by("stock")
+                    low_stock_products_qs = Product.objects.filter(stock__lt=F("reorder_point")).values("name", "stock").order_by("stock")
                     low_stock_products = [
                         {"name": product["name"], "stock": product["stock"]}
                         for product in low_stock_products_qs
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Category, Product, InventoryMovement
+from django.db import transaction
+from .models import Category, Product, InventoryMovement, StockSnapshot
+from .stock import adjust_stock, save_without_stock
 
 
 @admin.register(Category)
@@ -11,11 +13,20 @@ class CategoryAdmin(admin.ModelAdmin):
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
-    list_display = ['name', 'sku', 'category', 'price', 'stock', 'status', 'created_at']
+    list_display = ['name', 'sku', 'category', 'price', 'stock', 'reorder_point', 'status', 'created_at']
     list_filter = ['category', 'status', 'size', 'color']
     search_fields = ['name', 'sku', 'brand', 'description']
     list_editable = ['price', 'stock', 'status']
 
+    def save_model(self, request, obj, form, change):
+        if not change:
+            return super().save_model(request, obj, form, change)
+        # Stock edits are recorded as adjustments, like any other change.
+        with transaction.atomic():
+            save_without_stock(obj)
+            if 'stock' in form.changed_data:
+                adjust_stock(obj.pk, obj.stock, user=request.user)
+
 
 @admin.register(InventoryMovement)
 class InventoryMovementAdmin(admin.ModelAdmin):
@@ -23,3 +34,11 @@ class InventoryMovementAdmin(admin.ModelAdmin):
     list_filter = ['movement_type', 'reason', 'created_at']
     search_fields = ['product__name', 'notes']
     readonly_fields = ['stock_before', 'stock_after', 'created_by', 'created_at']
+
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['product', 'taken_at', 'stock', 'period']
+    list_filter = ['period', 'taken_at']
+    search_fields = ['product__name', 'product__sku']
+    raw_id_fields = ['product']
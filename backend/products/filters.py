@@ -1,3 +1,4 @@
+from django.db.models import F
 from django_filters import rest_framework as filters
 from .models import Product
 
@@ -10,6 +11,6 @@ class ProductFilter(filters.FilterSet):
 
     def filter_low_stock(self, queryset, name, value):
         if value:
-            # Define your low stock threshold here, e.g., 10
-            return queryset.filter(stock__lt=10)
+            # Matches the partial index on products below their reorder point.
+            return queryset.filter(stock__lt=F('reorder_point'))
         return queryset
@@ -0,0 +1,327 @@
+"""
+Bulk product import from CSV or XLSX files.
+
+Rows are streamed from the file and written in chunks: each chunk resolves its
+categories and existing SKUs with one query each and is written with a single
+``INSERT ... ON CONFLICT (sku) DO UPDATE``. Only the columns present in the
+file are updated on existing products. Their ``stock`` is not part of that
+statement: a new level goes through the stock ledger
+(``products.stock.apply_movements``) as an 'ajuste' movement, so history,
+snapshots and reorder alerts see it like any other stock change.
+"""
+import csv
+import io
+import os
+from decimal import Decimal
+
+import openpyxl
+from django.db import transaction
+
+from .models import Category, InventoryMovement, Product
+from .stock import apply_movements
+
+# Columns a file may provide, besides the mandatory ``sku``.
+IMPORT_FIELDS = ['name', 'description', 'price', 'cost', 'category', 'stock', 'size', 'color', 'brand', 'status']
+
+DEFAULT_CHUNK_SIZE = 1000
+
+STATUS_VALUES = {value for value, _ in Product._meta.get_field('status').choices}
+
+# Range of an ``IntegerField`` column (PostgreSQL ``integer``).
+MIN_INTEGER, MAX_INTEGER = -2 ** 31, 2 ** 31 - 1
+
+# Text columns longer than their database column are rejected; ``name`` is truncated.
+LENGTH_LIMITS = {
+    'sku': Product._meta.get_field('sku').max_length,
+    'category': Category._meta.get_field('name').max_length,
+    'size': Product._meta.get_field('size').max_length,
+    'color': Product._meta.get_field('color').max_length,
+    'brand': Product._meta.get_field('brand').max_length,
+}
+
+
+class ProductImportError(Exception):
+    pass
+
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.errors = []
+
+    def add_error(self, row_number, sku, errors):
+        self.errors.append({'row': row_number, 'sku': sku, 'errors': errors})
+
+    def to_dict(self):
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'failed': len(self.errors),
+            'errors': self.errors,
+        }
+
+
+def _normalize_header(header):
+    return [str(column or '').strip().lower() for column in header]
+
+
+def _check_header(header):
+    if 'sku' not in header:
+        raise ProductImportError("El archivo debe incluir una columna 'sku'.")
+
+
+def _read_csv(fileobj):
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    first_line = text.readline()
+    # The sales report exports with ';', spreadsheets usually save with ','.
+    delimiter = ';' if first_line.count(';') > first_line.count(',') else ','
+    header = _normalize_header(next(csv.reader([first_line], delimiter=delimiter), []))
+    _check_header(header)
+    return header, csv.reader(text, delimiter=delimiter)
+
+
+def _read_xlsx(fileobj):
+    workbook = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    rows = workbook.active.iter_rows(values_only=True)
+    header = _normalize_header(next(rows, []))
+    try:
+        _check_header(header)
+    except ProductImportError:
+        workbook.close()
+        raise
+
+    def values():
+        try:
+            yield from rows
+        finally:
+            workbook.close()
+
+    return header, values()
+
+
+def read_rows(fileobj, filename):
+    """
+    Return ``(header, rows)`` for a CSV or XLSX file. ``rows`` yields
+    ``(row_number, row_dict)`` for every non-empty data row; row numbers match
+    what a spreadsheet shows (header is row 1).
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.xlsx':
+        header, source = _read_xlsx(fileobj)
+    elif extension in ('.csv', '.txt'):
+        header, source = _read_csv(fileobj)
+    else:
+        raise ProductImportError(f"Formato no soportado: '{extension}'. Use CSV o XLSX.")
+
+    def rows():
+        for row_number, values in enumerate(source, start=2):
+            row = {
+                column: ('' if value is None else str(value).strip())
+                for column, value in zip(header, values)
+                if column
+            }
+            if any(row.values()):
+                yield row_number, row
+
+    return header, rows()
+
+
+def _parse_number(value, message):
+    try:
+        number = Decimal(value.replace(',', '.'))
+    except ArithmeticError:
+        raise ValueError(message)
+    # NaN and infinity parse, but no column can store them.
+    if not number.is_finite():
+        raise ValueError(message)
+    return number
+
+
+def _parse_decimal(value, field):
+    number = _parse_number(value, 'debe ser un número')
+    if number < 0:
+        raise ValueError('no puede ser negativo')
+    if number >= 10 ** (field.max_digits - field.decimal_places):
+        raise ValueError(f'admite como máximo {field.max_digits - field.decimal_places} dígitos enteros')
+    return number.quantize(Decimal(1).scaleb(-field.decimal_places))
+
+
+def _parse_int(value):
+    number = _parse_number(value, 'debe ser un número entero')
+    if number != number.to_integral_value():
+        raise ValueError('debe ser un número entero')
+    number = int(number)
+    if not MIN_INTEGER <= number <= MAX_INTEGER:
+        raise ValueError(f'debe estar entre {MIN_INTEGER} y {MAX_INTEGER}')
+    return number
+
+
+def _check_length(value, column):
+    max_length = LENGTH_LIMITS[column]
+    if len(value) > max_length:
+        raise ValueError(f'admite como máximo {max_length} caracteres')
+    return value
+
+
+def clean_row(row, columns):
+    """Validate a raw row. Returns ``(data, errors)``."""
+    data = {'sku': row.get('sku', '')}
+    errors = {}
+    if not data['sku']:
+        errors['sku'] = 'es obligatorio'
+    elif len(data['sku']) > LENGTH_LIMITS['sku']:
+        errors['sku'] = f"admite como máximo {LENGTH_LIMITS['sku']} caracteres"
+
+    for column in columns:
+        value = row.get(column, '')
+        try:
+            if column == 'price':
+                if not value:
+                    raise ValueError('es obligatorio')
+                data[column] = _parse_decimal(value, Product._meta.get_field(column))
+            elif column == 'cost':
+                data[column] = _parse_decimal(value, Product._meta.get_field(column)) if value else None
+            elif column == 'stock':
+                data[column] = _parse_int(value) if value else 0
+                if data[column] < 0:
+                    raise ValueError('no puede ser negativo')
+            elif column == 'status':
+                value = value.lower() or 'active'
+                if value not in STATUS_VALUES:
+                    raise ValueError(f"debe ser uno de {sorted(STATUS_VALUES)}")
+                data[column] = value
+            elif column == 'name':
+                if not value:
+                    raise ValueError('es obligatorio')
+                data[column] = value[:Product._meta.get_field('name').max_length]
+            elif column in LENGTH_LIMITS:
+                data[column] = _check_length(value, column)
+            else:
+                data[column] = value
+        except ValueError as e:
+            errors[column] = str(e)
+    return data, errors
+
+
+class ProductImporter:
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False, user=None):
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        # Recorded as ``created_by`` of the stock adjustments.
+        self.user = user
+        self.report = ImportReport()
+        self._categories = {}
+
+    def run(self, header, rows):
+        """
+        Import ``(row_number, row_dict)`` pairs and return the report. The
+        columns written are the ones named in ``header``.
+        """
+        columns = [column for column in IMPORT_FIELDS if column in header]
+        chunk = []
+        for row_number, row in rows:
+            chunk.append((row_number, row))
+            if len(chunk) >= self.chunk_size:
+                self._import_chunk(chunk, columns)
+                chunk = []
+        if chunk:
+            self._import_chunk(chunk, columns)
+        return self.report
+
+    def _resolve_categories(self, names):
+        missing = [name for name in names if name not in self._categories]
+        if not missing:
+            return
+        for category in Category.objects.filter(name__in=missing).order_by('id'):
+            self._categories.setdefault(category.name, category.pk)
+        to_create = [Category(name=name) for name in missing if name not in self._categories]
+        for category in Category.objects.bulk_create(to_create):
+            self._categories[category.name] = category.pk
+
+    def _import_chunk(self, chunk, columns):
+        cleaned = {}
+        for row_number, row in chunk:
+            data, errors = clean_row(row, columns)
+            if not errors and data['sku'] in cleaned:
+                errors = {'sku': f"duplicado en la fila {cleaned[data['sku']][0]}"}
+            if errors:
+                self.report.add_error(row_number, data['sku'], errors)
+                continue
+            cleaned[data['sku']] = (row_number, data)
+
+        if not cleaned:
+            return
+
+        with transaction.atomic():
+            existing = dict(
+                Product.objects.filter(sku__in=list(cleaned)).values_list('sku', 'pk')
+            )
+
+            # New products need the fields the model cannot default.
+            for sku in list(cleaned):
+                row_number, data = cleaned[sku]
+                if sku in existing:
+                    continue
+                missing = [field for field in ('name', 'price') if field not in data]
+                if missing:
+                    self.report.add_error(
+                        row_number, sku, {field: 'es obligatorio para productos nuevos' for field in missing}
+                    )
+                    del cleaned[sku]
+
+            if 'category' in columns:
+                self._resolve_categories({data['category'] for _, data in cleaned.values() if data['category']})
+
+            products = []
+            for _, data in cleaned.values():
+                data = dict(data)
+                if 'category' in data:
+                    category_name = data.pop('category')
+                    data['category_id'] = self._categories.get(category_name) if category_name else None
+                # Rows for existing products may omit required columns. The
+                # placeholder only satisfies NOT NULL on the proposed row; it is
+                # never written because the column is not in update_fields.
+                data.setdefault('price', Decimal('0'))
+                products.append(Product(**data))
+
+            if products:
+                Product.objects.bulk_create(
+                    products,
+                    update_conflicts=True,
+                    unique_fields=['sku'],
+                    update_fields=[column for column in columns if column != 'stock'] + ['updated_at'],
+                )
+            if 'stock' in columns:
+                self._adjust_stock([
+                    (existing[sku], data['stock']) for sku, (_, data) in cleaned.items() if sku in existing
+                ])
+
+            updated = len(existing)
+            self.report.updated += updated
+            self.report.created += len(products) - updated
+
+            if self.dry_run:
+                transaction.set_rollback(True)
+                self._categories = {}
+
+
+    def _adjust_stock(self, levels):
+        """Set ``(product_id, stock)`` levels of existing products through the ledger."""
+        if not levels:
+            return
+        results = apply_movements([(product_id, 'ajuste', stock) for product_id, stock in levels])
+        InventoryMovement.objects.bulk_create([
+            InventoryMovement(
+                product_id=product_id, movement_type='ajuste', quantity=stock, reason='inventario_fisico',
+                notes='Importación de productos', created_by=self.user,
+                stock_before=stock_before, stock_after=stock_after,
+            )
+            for (product_id, stock), (stock_before, stock_after) in zip(levels, results)
+            if stock_before != stock_after
+        ])
+
+
+def import_products(fileobj, filename, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False, user=None):
+    importer = ProductImporter(chunk_size=chunk_size, dry_run=dry_run, user=user)
+    return importer.run(*read_rows(fileobj, filename))
@@ -0,0 +1,58 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from config.images import generate_renditions, is_remote
+from products.models import Product
+
+User = get_user_model()
+
+
+def _render_one(name, force):
+    # Runs in a worker process; only touches storage, never the database.
+    return name, generate_renditions(name, force=force)
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnail, medium and WebP renditions for existing product images and avatars'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+        parser.add_argument('--force', action='store_true', help='Rebuild renditions that already exist')
+
+    def handle(self, *args, **options):
+        names = set(
+            Product.objects.exclude(image='').exclude(image__isnull=True).values_list('image', flat=True)
+        )
+        names.update(
+            User.objects.exclude(avatar='').exclude(avatar__isnull=True).values_list('avatar', flat=True)
+        )
+        names = sorted(name for name in names if not is_remote(name))
+        if not names:
+            self.stdout.write('No images to process.')
+            return
+
+        # Forked workers must not share the parent's database sockets.
+        connections.close_all()
+
+        written = failed = 0
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=options['workers'], mp_context=context) as pool:
+            futures = {pool.submit(_render_one, name, options['force']): name for name in names}
+            for future in as_completed(futures):
+                try:
+                    _, renditions = future.result()
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f'Error processing {futures[future]}: {e}')
+                    continue
+                written += len(renditions)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Processed {len(names)} images: {written} renditions written, {failed} failed'
+            )
+        )
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from products.importers import DEFAULT_CHUNK_SIZE, ProductImportError, import_products
+
+
+class Command(BaseCommand):
+    help = 'Create or update products in bulk from a CSV or XLSX file (matched by SKU)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help='CSV or XLSX file to import')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows written per statement')
+        parser.add_argument('--dry-run', action='store_true', help='Validate the file without saving anything')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            with open(path, 'rb') as fileobj:
+                report = import_products(
+                    fileobj, path, chunk_size=options['chunk_size'], dry_run=options['dry_run']
+                )
+        except OSError as e:
+            raise CommandError(f'Cannot read {path}: {e}')
+        except ProductImportError as e:
+            raise CommandError(str(e))
+
+        for error in report.errors:
+            details = ', '.join(f'{field}: {message}' for field, message in error['errors'].items())
+            self.stderr.write(f"Row {error['row']} ({error['sku'] or 'sin SKU'}): {details}")
+
+        prefix = '[dry run] ' if options['dry_run'] else ''
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{prefix}{report.created} created, {report.updated} updated, {len(report.errors)} failed'
+            )
+        )
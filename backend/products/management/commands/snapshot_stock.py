@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from products.snapshots import prune_daily_snapshots, take_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Record the current stock of every product (run daily or monthly from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--period', choices=['daily', 'monthly'], default='daily', help='Snapshot period label')
+        parser.add_argument(
+            '--keep-daily-days', type=int, default=None,
+            help='Also delete daily snapshots older than this many days (monthly ones are kept)',
+        )
+
+    def handle(self, *args, **options):
+        created = take_snapshots(period=options['period'])
+        self.stdout.write(self.style.SUCCESS(f"Recorded {created} {options['period']} stock snapshots"))
+
+        if options['keep_daily_days'] is not None:
+            deleted = prune_daily_snapshots(options['keep_daily_days'])
+            self.stdout.write(f'Deleted {deleted} old daily snapshots')
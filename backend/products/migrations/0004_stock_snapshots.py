@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_alter_category_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taken_at', models.DateTimeField()),
+                ('stock', models.IntegerField()),
+                ('period', models.CharField(choices=[('daily', 'Diario'), ('monthly', 'Mensual')], default='daily', max_length=20)),
+            ],
+            options={
+                'ordering': ['-taken_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='inventorymovement',
+            index=models.Index(fields=['product', 'created_at'], name='products_in_product_af8b5f_idx'),
+        ),
+        migrations.AddField(
+            model_name='stocksnapshot',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='products.product'),
+        ),
+        migrations.AddIndex(
+            model_name='stocksnapshot',
+            index=models.Index(fields=['taken_at'], name='products_st_taken_a_00ea05_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='stocksnapshot',
+            constraint=models.UniqueConstraint(fields=('product', 'taken_at'), name='unique_product_snapshot'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_stock_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='reorder_point',
+            field=models.PositiveIntegerField(default=10, help_text='Stock below this level is reported as low stock'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('stock__lt', models.F('reorder_point'))), fields=['stock'], name='product_below_reorder_idx'),
+        ),
+    ]
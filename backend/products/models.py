@@ -1,4 +1,9 @@
 from django.db import models
+from django.db.models import F, Q
+
+# Stock level below which a product needs restocking, unless the product
+# defines its own ``reorder_point``.
+DEFAULT_REORDER_POINT = 10
 
 class Category(models.Model):
     name = models.CharField(max_length=100)
@@ -22,6 +27,10 @@ class Product(models.Model):
     cost = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='products')
     stock = models.IntegerField(default=0)
+    reorder_point = models.PositiveIntegerField(
+        default=DEFAULT_REORDER_POINT,
+        help_text='Stock below this level is reported as low stock'
+    )
     size = models.CharField(max_length=20, blank=True)
     color = models.CharField(max_length=50, blank=True)
     brand = models.CharField(max_length=100, blank=True)
@@ -30,9 +39,23 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Small index containing only the products that need restocking.
+            models.Index(
+                fields=['stock'],
+                name='product_below_reorder_idx',
+                condition=Q(stock__lt=F('reorder_point')),
+            ),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.sku}"
 
+    @property
+    def is_low_stock(self):
+        return self.stock < self.reorder_point
+
 
 class InventoryMovement(models.Model):
     MOVEMENT_TYPES = [
@@ -72,3 +95,34 @@ class InventoryMovement(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['product', 'created_at']),
+        ]
+
+
+class StockSnapshot(models.Model):
+    """
+    Stock of a product at a point in time. Historical stock is answered from
+    the nearest snapshot plus the movements recorded after it.
+    """
+    PERIOD_CHOICES = [
+        ('daily', 'Diario'),
+        ('monthly', 'Mensual'),
+    ]
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_snapshots')
+    taken_at = models.DateTimeField()
+    stock = models.IntegerField()
+    period = models.CharField(max_length=20, choices=PERIOD_CHOICES, default='daily')
+
+    class Meta:
+        ordering = ['-taken_at']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'taken_at'], name='unique_product_snapshot'),
+        ]
+        indexes = [
+            models.Index(fields=['taken_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} @ {self.taken_at:%Y-%m-%d %H:%M}: {self.stock}"
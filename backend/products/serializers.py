@@ -1,5 +1,8 @@
+from django.db import transaction
 from rest_framework import serializers
+from config.images import rendition_urls
 from .models import Category, Product, InventoryMovement
+from .stock import InsufficientStock, adjust_stock, apply_movement, apply_movements, save_without_stock
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -11,13 +14,14 @@ class CategorySerializer(serializers.ModelSerializer):
 class ProductSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     image = serializers.SerializerMethodField()
+    image_renditions = serializers.SerializerMethodField()
     
     class Meta:
         model = Product
         fields = [
             'id', 'name', 'description', 'sku', 'price', 'cost', 
-            'category', 'category_name', 'stock', 'size', 'color', 
-            'brand', 'image', 'status', 'created_at', 'updated_at'
+            'category', 'category_name', 'stock', 'reorder_point', 'size', 'color', 
+            'brand', 'image', 'image_renditions', 'status', 'created_at', 'updated_at'
         ]
 
     def get_image(self, obj):
@@ -31,6 +35,54 @@ class ProductSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(obj.image.url)
         return None
 
+    def get_image_renditions(self, obj):
+        return rendition_urls(obj.image, self.context.get('request'))
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        # A new stock level is recorded as an adjustment instead of being
+        # written with the other fields, so the ledger stays complete.
+        stock = validated_data.pop('stock', None)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        save_without_stock(instance)
+        if stock is not None:
+            request = self.context.get('request')
+            adjust_stock(instance.pk, stock, user=getattr(request, 'user', None))
+            instance.refresh_from_db(fields=['stock', 'updated_at'])
+        return instance
+
+
+class InventoryMovementListSerializer(serializers.ListSerializer):
+    """
+    Creates a batch of movements with a constant number of queries: one
+    locking read and one write for the affected products, one bulk insert for
+    the movements.
+    """
+
+    @transaction.atomic
+    def create(self, validated_data):
+        try:
+            results = apply_movements([
+                (data['product'].pk, data['movement_type'], data['quantity'])
+                for data in validated_data
+            ])
+        except InsufficientStock as e:
+            errors = [{} for _ in validated_data]
+            errors[e.index] = {'quantity': [insufficient_stock_message(e)]}
+            raise serializers.ValidationError(errors)
+
+        movements = []
+        for data, (stock_before, stock_after) in zip(validated_data, results):
+            movements.append(InventoryMovement(stock_before=stock_before, stock_after=stock_after, **data))
+        return InventoryMovement.objects.bulk_create(movements)
+
+
+def insufficient_stock_message(error):
+    if error.available is None:
+        return 'Stock insuficiente para registrar la salida.'
+    return f'Stock insuficiente: disponible {error.available}, solicitado {error.requested}.'
+
 
 class InventoryMovementSerializer(serializers.ModelSerializer):
     product_name = serializers.CharField(source='product.name', read_only=True)
@@ -44,26 +96,31 @@ class InventoryMovementSerializer(serializers.ModelSerializer):
             'stock_before', 'stock_after', 'created_at'
         ]
         read_only_fields = ['created_by', 'stock_before', 'stock_after']
+        list_serializer_class = InventoryMovementListSerializer
+
+    def validate(self, data):
+        quantity = data.get('quantity')
+        movement_type = data.get('movement_type')
+        if quantity is not None and quantity < 0:
+            raise serializers.ValidationError({'quantity': 'La cantidad no puede ser negativa.'})
+        if quantity == 0 and movement_type in ('entrada', 'salida'):
+            raise serializers.ValidationError({'quantity': 'La cantidad debe ser mayor a cero.'})
+        return data
 
+    @transaction.atomic
     def create(self, validated_data):
         product = validated_data['product']
-        quantity = validated_data['quantity']
-        movement_type = validated_data['movement_type']
-        
-        # Guardar stock anterior
-        validated_data['stock_before'] = product.stock
-        
-        # Actualizar stock según el tipo de movimiento
-        if movement_type == 'entrada':
-            product.stock += quantity
-        elif movement_type == 'salida':
-            product.stock -= quantity
-        elif movement_type == 'ajuste':
-            product.stock = quantity
-        
-        product.save()
-        validated_data['stock_after'] = product.stock
-        
+        try:
+            stock_before, stock_after = apply_movement(
+                product.pk, validated_data['movement_type'], validated_data['quantity']
+            )
+        except InsufficientStock as e:
+            raise serializers.ValidationError({'quantity': insufficient_stock_message(e)})
+
+        # Keep the in-memory instance in line with the row we just updated.
+        product.stock = stock_after
+        validated_data['stock_before'] = stock_before
+        validated_data['stock_after'] = stock_after
         return super().create(validated_data)
 
 
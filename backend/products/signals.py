@@ -0,0 +1,23 @@
+from django.db.models.signals import post_init, post_save
+from django.dispatch import Signal, receiver
+
+from config.images import image_saved, track_image
+from .models import Product
+
+# Sent once when a stock change takes a product below its reorder point.
+# Arguments: product_id, stock, reorder_point.
+stock_below_reorder_point = Signal()
+
+
+@receiver(post_init, sender=Product)
+def track_product_image(sender, instance, **kwargs):
+    track_image(instance, 'image')
+
+
+@receiver(post_save, sender=Product)
+def generate_product_image_renditions(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Builds the thumbnail/medium/webp copies of a new or replaced product image,
+    and deletes those of the replaced one.
+    """
+    image_saved(instance, 'image', created, update_fields)
@@ -0,0 +1,151 @@
+"""
+Point-in-time inventory queries.
+
+``StockSnapshot`` rows are written for every product by the ``snapshot_stock``
+command. Stock at a date is the ``stock_after`` of the last movement recorded
+between the nearest snapshot at or before it and that date, or the snapshot
+itself when nothing moved, so the cost depends on the movements since the last
+snapshot rather than on the whole history. Movements are not recomputed:
+``stock_after`` is what the ledger recorded, including clamping at zero.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import F, Min, OuterRef, Q, Subquery
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import InventoryMovement, Product, StockSnapshot
+
+SNAPSHOT_BATCH_SIZE = 2000
+
+
+def parse_point_in_time(value):
+    """
+    Parse ``YYYY-MM-DD`` (end of that local day) or an ISO datetime.
+    Returns ``None`` when the value cannot be parsed or is not a real date.
+    """
+    if not value:
+        return None
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                return None
+            moment = datetime.combine(day, time.max)
+    except ValueError:
+        # Well formed but out of range, e.g. 2026-02-30 or 25:00.
+        return None
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+@transaction.atomic
+def take_snapshots(period='daily', taken_at=None):
+    """Record the current stock of every product. Returns the row count."""
+    taken_at = taken_at or timezone.now()
+    batch = []
+    created = 0
+    for product_id, stock in Product.objects.values_list('id', 'stock').iterator(chunk_size=SNAPSHOT_BATCH_SIZE):
+        batch.append(StockSnapshot(product_id=product_id, taken_at=taken_at, stock=stock, period=period))
+        if len(batch) >= SNAPSHOT_BATCH_SIZE:
+            StockSnapshot.objects.bulk_create(batch, ignore_conflicts=True)
+            created += len(batch)
+            batch = []
+    if batch:
+        StockSnapshot.objects.bulk_create(batch, ignore_conflicts=True)
+        created += len(batch)
+    return created
+
+
+def prune_daily_snapshots(keep_days):
+    """Delete daily snapshots older than ``keep_days``; monthly ones are kept."""
+    cutoff = timezone.now() - timedelta(days=keep_days)
+    deleted, _ = StockSnapshot.objects.filter(period='daily', taken_at__lt=cutoff).delete()
+    return deleted
+
+
+def _last_stock_after(movements):
+    return movements.order_by('-created_at', '-id').values_list('stock_after', flat=True).first()
+
+
+def stock_at(product, when):
+    """Stock of ``product`` at ``when``, or ``None`` if it did not exist yet."""
+    snapshot = (
+        StockSnapshot.objects.filter(product=product, taken_at__lte=when)
+        .order_by('-taken_at')
+        .values_list('taken_at', 'stock')
+        .first()
+    )
+    movements = InventoryMovement.objects.filter(product=product, created_at__lte=when)
+    if snapshot:
+        taken_at, stock = snapshot
+        last = _last_stock_after(movements.filter(created_at__gt=taken_at))
+        return stock if last is None else last
+
+    if product.created_at > when:
+        return None
+    last = _last_stock_after(movements)
+    if last is not None:
+        return last
+    # Nothing happened before ``when``: the stock then is what the next
+    # movement started from, or the current stock if there is none.
+    later = (
+        InventoryMovement.objects.filter(product=product, created_at__gt=when)
+        .order_by('created_at', 'id')
+        .values_list('stock_before', flat=True)
+        .first()
+    )
+    return product.stock if later is None else later
+
+
+def stock_levels_at(when, products=None):
+    """
+    Stock of every product (or of the ``products`` queryset) at ``when``, as a
+    ``{product_id: stock}`` dict, using a fixed number of queries.
+    """
+    products = products if products is not None else Product.objects.all()
+    products = products.filter(created_at__lte=when)
+
+    # Each product starts from its own latest snapshot at or before ``when``:
+    # a product can be missing from a later snapshot run.
+    snapshot_time = Subquery(
+        StockSnapshot.objects.filter(product=OuterRef('product'), taken_at__lte=when)
+        .order_by('-taken_at')
+        .values('taken_at')[:1]
+    )
+    levels = dict(
+        StockSnapshot.objects.filter(product__in=products, taken_at=snapshot_time)
+        .values_list('product_id', 'stock')
+    )
+
+    movements = (
+        InventoryMovement.objects.filter(product__in=products, created_at__lte=when)
+        .annotate(snapshot_time=snapshot_time)
+        .filter(Q(snapshot_time__isnull=True) | Q(created_at__gt=F('snapshot_time')))
+    )
+    for product_id, stock_after in (
+        movements.order_by('created_at', 'id').values_list('product_id', 'stock_after').iterator()
+    ):
+        levels[product_id] = stock_after
+
+    # Products with neither a snapshot nor movements before ``when`` had the
+    # stock their next movement started from, or their current stock.
+    current = dict(products.values_list('id', 'stock'))
+    missing = [product_id for product_id in current if product_id not in levels]
+    if missing:
+        next_movement_ids = (
+            InventoryMovement.objects.filter(product_id__in=missing, created_at__gt=when)
+            .values('product_id')
+            .annotate(first_id=Min('id'))
+            .values('first_id')
+        )
+        later = dict(
+            InventoryMovement.objects.filter(id__in=Subquery(next_movement_ids))
+            .values_list('product_id', 'stock_before')
+        )
+        for product_id in missing:
+            levels[product_id] = later.get(product_id, current[product_id])
+    return levels
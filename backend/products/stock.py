@@ -0,0 +1,159 @@
+"""
+Stock ledger: applies inventory movements to ``Product.stock`` atomically.
+
+Stock is never read into Python, modified and written back; concurrent
+movements for the same product therefore cannot lose updates. Callers are
+expected to run inside ``transaction.atomic()`` together with the insert of the
+matching ``InventoryMovement`` rows.
+"""
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import InventoryMovement, Product
+from .signals import stock_below_reorder_point
+
+
+class InsufficientStock(Exception):
+    def __init__(self, product_id, requested, available=None):
+        self.product_id = product_id
+        self.requested = requested
+        self.available = available
+        super().__init__(f"Insufficient stock for product {product_id}")
+
+
+def signed_quantity(movement_type, quantity):
+    """Stock delta of an 'entrada' or 'salida' movement."""
+    return quantity if movement_type == 'entrada' else -quantity
+
+
+def next_stock(movement_type, quantity, stock):
+    if movement_type == 'ajuste':
+        return quantity
+    return stock + signed_quantity(movement_type, quantity)
+
+
+def check_reorder_point(product_id, stock_before, stock_after, reorder_point):
+    """
+    Emit ``stock_below_reorder_point`` when a change takes stock from at or
+    above the reorder point to below it. Each crossing is reported once, after
+    the transaction commits; staying below the threshold emits nothing.
+    """
+    if stock_before >= reorder_point > stock_after:
+        transaction.on_commit(lambda: stock_below_reorder_point.send(
+            sender=Product,
+            product_id=product_id,
+            stock=stock_after,
+            reorder_point=reorder_point,
+        ))
+
+
+def apply_movement(product_id, movement_type, quantity):
+    """
+    Apply one movement and return ``(stock_before, stock_after)``.
+
+    'entrada' and 'salida' are a single conditional
+    ``UPDATE ... SET stock = stock + %s ... RETURNING stock``; a 'salida' that
+    would take stock below zero matches no row and raises ``InsufficientStock``.
+    'ajuste' sets an absolute value, so it locks the row to read the previous
+    stock first.
+    """
+    now = timezone.now()
+    if movement_type == 'ajuste':
+        stock_before, reorder_point = (
+            Product.objects.select_for_update()
+            .values_list('stock', 'reorder_point')
+            .get(pk=product_id)
+        )
+        Product.objects.filter(pk=product_id).update(stock=quantity, updated_at=now)
+        check_reorder_point(product_id, stock_before, quantity, reorder_point)
+        return stock_before, quantity
+
+    delta = signed_quantity(movement_type, quantity)
+    table = connection.ops.quote_name(Product._meta.db_table)
+    sql = f"UPDATE {table} SET stock = stock + %s, updated_at = %s WHERE id = %s"
+    params = [delta, connection.ops.adapt_datetimefield_value(now), product_id]
+    if delta < 0:
+        sql += " AND stock >= %s"
+        params.append(-delta)
+    sql += " RETURNING stock, reorder_point"
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    if row is None:
+        raise InsufficientStock(product_id, quantity)
+    stock_after, reorder_point = row
+    stock_before = stock_after - delta
+    check_reorder_point(product_id, stock_before, stock_after, reorder_point)
+    return stock_before, stock_after
+
+
+def apply_movements(movements):
+    """
+    Apply a batch of ``(product_id, movement_type, quantity)`` movements in
+    order and return their ``(stock_before, stock_after)`` pairs.
+
+    All affected rows are locked with one ``SELECT ... FOR UPDATE`` (in id
+    order, so concurrent batches cannot deadlock) and written back with one
+    ``UPDATE``, regardless of the batch size. Raises ``InsufficientStock`` with
+    the index of the first movement that would leave a product below zero.
+    """
+    product_ids = sorted({product_id for product_id, _, _ in movements})
+    rows = (
+        Product.objects.select_for_update()
+        .filter(pk__in=product_ids)
+        .order_by('pk')
+        .values_list('pk', 'stock', 'reorder_point')
+    )
+    stocks = {}
+    reorder_points = {}
+    for product_id, stock, reorder_point in rows:
+        stocks[product_id] = stock
+        reorder_points[product_id] = reorder_point
+    initial = dict(stocks)
+
+    results = []
+    for index, (product_id, movement_type, quantity) in enumerate(movements):
+        stock_before = stocks[product_id]
+        stock_after = next_stock(movement_type, quantity, stock_before)
+        if movement_type == 'salida' and stock_after < 0:
+            error = InsufficientStock(product_id, quantity, stock_before)
+            error.index = index
+            raise error
+        stocks[product_id] = stock_after
+        results.append((stock_before, stock_after))
+
+    now = timezone.now()
+    Product.objects.bulk_update(
+        [Product(pk=product_id, stock=stock, updated_at=now) for product_id, stock in stocks.items()],
+        ['stock', 'updated_at'],
+    )
+    for product_id, stock in stocks.items():
+        check_reorder_point(product_id, initial[product_id], stock, reorder_points[product_id])
+    return results
+
+
+@transaction.atomic
+def adjust_stock(product_id, stock, user=None, reason='correccion', notes=''):
+    """
+    Set ``stock`` as an 'ajuste' movement and record it. Returns the
+    ``InventoryMovement``, or ``None`` when the level did not change.
+    """
+    stock_before, stock_after = apply_movement(product_id, 'ajuste', stock)
+    if stock_before == stock_after:
+        return None
+    return InventoryMovement.objects.create(
+        product_id=product_id, movement_type='ajuste', quantity=stock, reason=reason,
+        notes=notes, created_by=user, stock_before=stock_before, stock_after=stock_after,
+    )
+
+
+def save_without_stock(product):
+    """
+    Save every field of an existing ``product`` except ``stock``, which only
+    changes through the ledger above.
+    """
+    product.save(update_fields=[
+        field.name for field in Product._meta.concrete_fields
+        if not field.primary_key and field.name != 'stock'
+    ])
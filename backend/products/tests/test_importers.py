@@ -0,0 +1,147 @@
+import io
+from decimal import Decimal
+
+import openpyxl
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from products.importers import import_products
+from products.models import Category, InventoryMovement, Product
+
+User = get_user_model()
+
+
+def csv_file(text):
+    return io.BytesIO(text.encode('utf-8'))
+
+
+class ProductImporterTest(APITestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Camisas')
+        self.product = Product.objects.create(
+            name='Camisa azul', sku='CAM-001', price=Decimal('50.00'), stock=3, category=self.category
+        )
+
+    def test_creates_and_updates_by_sku(self):
+        report = import_products(csv_file(
+            'sku,name,price,category,stock\n'
+            'CAM-001,Camisa azul,55.50,Camisas,7\n'
+            'PAN-001,Pantalón negro,80,Pantalones,4\n'
+        ), 'catalog.csv')
+
+        self.assertEqual((report.created, report.updated, report.errors), (1, 1, []))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.price, Decimal('55.50'))
+        self.assertEqual(self.product.stock, 7)
+        new_product = Product.objects.get(sku='PAN-001')
+        self.assertEqual(new_product.category.name, 'Pantalones')
+
+    def test_stock_of_existing_products_is_an_adjustment(self):
+        user = get_user_model().objects.create_user(username='stock-admin', password='x', role='admin')
+        import_products(csv_file('sku,stock\nCAM-001,7\n'), 'stock.csv', user=user)
+        import_products(csv_file('sku,stock\nCAM-001,7\n'), 'stock.csv', user=user)
+
+        movement = InventoryMovement.objects.get(product=self.product)
+        self.assertEqual(
+            (movement.movement_type, movement.quantity, movement.stock_before, movement.stock_after),
+            ('ajuste', 7, 3, 7),
+        )
+        self.assertEqual(movement.created_by, user)
+
+    def test_only_present_columns_are_updated(self):
+        import_products(csv_file('sku;price\nCAM-001;60\n'), 'prices.csv')
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.price, Decimal('60'))
+        self.assertEqual(self.product.name, 'Camisa azul')
+        self.assertEqual(self.product.stock, 3)
+        self.assertEqual(self.product.category, self.category)
+
+    def test_row_errors_are_reported(self):
+        report = import_products(csv_file(
+            'sku,name,price\n'
+            'A-1,Valid,10\n'
+            'A-2,Bad price,abc\n'
+            'A-1,Duplicate,12\n'
+            'A-3,,10\n'
+        ), 'catalog.csv')
+
+        self.assertEqual(report.created, 1)
+        self.assertEqual([error['row'] for error in report.errors], [3, 4, 5])
+        self.assertIn('price', report.errors[0]['errors'])
+
+    def test_out_of_range_values_are_reported(self):
+        report = import_products(csv_file(
+            'sku,name,price,stock,category\n'
+            'N-1,NaN,nan,1,\n'
+            'N-2,Signaling,sNaN,1,\n'
+            'N-3,Infinite,inf,1,\n'
+            'N-4,Huge,1e30,1,\n'
+            'N-5,Stock,10,inf,\n'
+            'N-6,Stock,10,1e12,\n'
+            f'N-7,Category,10,1,{"x" * 101}\n'
+            'N-9,Fraction,10,3.7,\n'
+            'N-10,Negative,10,-2,\n'
+            'N-8,Valid,99999999.994,1,\n'
+        ), 'catalog.csv')
+
+        self.assertEqual(report.created, 1)
+        self.assertEqual(
+            [(error['sku'], list(error['errors'])) for error in report.errors],
+            [('N-1', ['price']), ('N-2', ['price']), ('N-3', ['price']), ('N-4', ['price']),
+             ('N-5', ['stock']), ('N-6', ['stock']), ('N-7', ['category']), ('N-9', ['stock']),
+             ('N-10', ['stock'])],
+        )
+        self.assertEqual(Product.objects.get(sku='N-8').price, Decimal('99999999.99'))
+
+    def test_columns_come_from_the_header(self):
+        # The first row is short: ``stock`` is still imported for the others.
+        import_products(csv_file('sku,name,price,stock\nN-1,Nuevo,5\nCAM-001,Camisa azul,60,8\n'), 'c.csv')
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 8)
+
+    def test_new_products_require_name_and_price(self):
+        report = import_products(csv_file('sku,stock\nCAM-001,9\nNEW-1,5\n'), 'stock.csv')
+
+        self.assertEqual(report.updated, 1)
+        self.assertEqual(report.errors[0]['sku'], 'NEW-1')
+        self.assertFalse(Product.objects.filter(sku='NEW-1').exists())
+
+    def test_xlsx_in_small_chunks(self):
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(['SKU', 'Name', 'Price'])
+        for i in range(25):
+            sheet.append([f'X-{i}', f'Producto {i}', 10 + i])
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        buffer.seek(0)
+
+        report = import_products(buffer, 'catalog.xlsx', chunk_size=10)
+
+        self.assertEqual(report.created, 25)
+        self.assertEqual(Product.objects.filter(sku__startswith='X-').count(), 25)
+
+    def test_dry_run_saves_nothing(self):
+        report = import_products(csv_file('sku,name,price,category\nD-1,Demo,10,Nueva\n'), 'c.csv', dry_run=True)
+
+        self.assertEqual(report.created, 1)
+        self.assertFalse(Product.objects.filter(sku='D-1').exists())
+        self.assertFalse(Category.objects.filter(name='Nueva').exists())
+
+    def test_import_endpoint_requires_admin(self):
+        upload = SimpleUploadedFile('catalog.csv', b'sku,name,price\nE-1,Endpoint,10\n')
+        vendedor = User.objects.create_user(username='v', password='password123', role='vendedor')
+        self.client.force_authenticate(vendedor)
+        response = self.client.post('/api/products/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        admin = User.objects.create_user(username='a', password='password123', role='admin')
+        self.client.force_authenticate(admin)
+        upload.seek(0)
+        response = self.client.post('/api/products/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 1)
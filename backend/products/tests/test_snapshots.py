@@ -0,0 +1,85 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from products.models import InventoryMovement, Product, StockSnapshot
+from products.snapshots import stock_at, stock_levels_at, take_snapshots
+
+User = get_user_model()
+
+
+class StockSnapshotTest(APITestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.product = Product.objects.create(name='Camisa', sku='CAM-1', price=Decimal('10.00'), stock=10)
+        self.idle = Product.objects.create(name='Gorra', sku='GOR-1', price=Decimal('5.00'), stock=4)
+        Product.objects.update(created_at=self.now - timedelta(days=30))
+        self.product.refresh_from_db()
+
+    def move(self, movement_type, quantity, before, after, days_ago):
+        movement = InventoryMovement.objects.create(
+            product=self.product, movement_type=movement_type, quantity=quantity,
+            reason='otro', stock_before=before, stock_after=after,
+        )
+        InventoryMovement.objects.filter(pk=movement.pk).update(created_at=self.now - timedelta(days=days_ago))
+
+    def test_replays_movements_after_nearest_snapshot(self):
+        self.move('entrada', 5, 10, 15, days_ago=20)
+        take_snapshots(taken_at=self.now - timedelta(days=15))
+        StockSnapshot.objects.filter(product=self.product).update(stock=15)
+        self.move('salida', 3, 15, 12, days_ago=10)
+        self.move('ajuste', 30, 12, 30, days_ago=5)
+
+        self.assertEqual(stock_at(self.product, self.now - timedelta(days=25)), 10)
+        self.assertEqual(stock_at(self.product, self.now - timedelta(days=12)), 15)
+        self.assertEqual(stock_at(self.product, self.now - timedelta(days=7)), 12)
+        self.assertEqual(stock_at(self.product, self.now), 30)
+        self.assertIsNone(stock_at(self.product, self.now - timedelta(days=40)))
+
+    def test_uses_recorded_stock_after(self):
+        # A sale larger than the stock was clamped at zero when it was recorded.
+        self.move('salida', 15, 10, 0, days_ago=10)
+        self.move('entrada', 4, 0, 4, days_ago=5)
+
+        self.assertEqual(stock_at(self.product, self.now - timedelta(days=7)), 0)
+        self.assertEqual(stock_at(self.product, self.now), 4)
+        self.assertEqual(stock_levels_at(self.now - timedelta(days=7))[self.product.pk], 0)
+
+    def test_stock_levels_for_all_products(self):
+        take_snapshots(taken_at=self.now - timedelta(days=15))
+        self.move('salida', 3, 10, 7, days_ago=10)
+
+        levels = stock_levels_at(self.now - timedelta(days=5))
+        self.assertEqual(levels, {self.product.pk: 7, self.idle.pk: 4})
+
+    def test_each_product_starts_from_its_own_snapshot(self):
+        take_snapshots(taken_at=self.now - timedelta(days=15))
+        self.move('salida', 3, 10, 7, days_ago=10)
+        # A later snapshot run that did not cover ``self.product``.
+        StockSnapshot.objects.create(product=self.idle, taken_at=self.now - timedelta(days=8), stock=4)
+
+        levels = stock_levels_at(self.now - timedelta(days=5))
+        self.assertEqual(levels, {self.product.pk: 7, self.idle.pk: 4})
+
+    def test_stock_at_endpoint(self):
+        user = User.objects.create_user(username='bodega', password='password123', role='bodeguero')
+        self.client.force_authenticate(user)
+        self.move('salida', 2, 10, 8, days_ago=3)
+
+        day = (self.now - timedelta(days=5)).date().isoformat()
+        response = self.client.get(f'/api/products/{self.product.pk}/stock-at/', {'date': day})
+        self.assertEqual(response.data['stock'], 10)
+
+        response = self.client.get('/api/products/stock-at/', {'date': timezone.localdate().isoformat()})
+        stocks = {row['sku']: row['stock'] for row in response.data['products']}
+        self.assertEqual(stocks, {'CAM-1': 8, 'GOR-1': 4})
+
+        for invalid in ('2026-02-30', '2026-01-01T25:00:00', 'ayer'):
+            response = self.client.get('/api/products/stock-at/', {'date': invalid})
+            self.assertEqual(response.status_code, 400, invalid)
+
+        response = self.client.get('/api/products/stock-at/')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,126 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from products.models import InventoryMovement, Product
+from products.signals import stock_below_reorder_point
+from products.stock import InsufficientStock, apply_movement, apply_movements
+
+User = get_user_model()
+
+
+class StockLedgerTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='bodega', password='password123', role='bodeguero')
+        self.product = Product.objects.create(name='Camisa', sku='CAM-1', price=Decimal('10.00'), stock=10)
+        self.other = Product.objects.create(name='Pantalón', sku='PAN-1', price=Decimal('20.00'), stock=1)
+        self.client.force_authenticate(self.user)
+
+    def test_apply_movement(self):
+        self.assertEqual(apply_movement(self.product.pk, 'entrada', 5), (10, 15))
+        self.assertEqual(apply_movement(self.product.pk, 'salida', 3), (15, 12))
+        self.assertEqual(apply_movement(self.product.pk, 'ajuste', 40), (12, 40))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 40)
+
+    def test_salida_cannot_go_below_zero(self):
+        with self.assertRaises(InsufficientStock):
+            apply_movement(self.product.pk, 'salida', 11)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 10)
+
+    def test_apply_movements_sequences_per_product(self):
+        results = apply_movements([
+            (self.product.pk, 'salida', 4),
+            (self.other.pk, 'entrada', 2),
+            (self.product.pk, 'ajuste', 7),
+            (self.product.pk, 'entrada', 1),
+        ])
+        self.assertEqual(results, [(10, 6), (1, 3), (6, 7), (7, 8)])
+        self.product.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual((self.product.stock, self.other.stock), (8, 3))
+
+    def test_create_movement_records_before_and_after(self):
+        response = self.client.post('/api/inventory-movements/', {
+            'product': self.product.pk, 'movement_type': 'salida', 'quantity': 4, 'reason': 'merma',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data['stock_before'], response.data['stock_after']), (10, 6))
+
+    def test_create_movement_rejects_insufficient_stock(self):
+        response = self.client.post('/api/inventory-movements/', {
+            'product': self.other.pk, 'movement_type': 'salida', 'quantity': 2, 'reason': 'merma',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(InventoryMovement.objects.exists())
+
+    def test_product_stock_edit_is_an_adjustment(self):
+        response = self.client.patch(f'/api/products/{self.product.pk}/', {'stock': 4, 'price': '12.00'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['stock'], 4)
+        movement = InventoryMovement.objects.get(product=self.product)
+        self.assertEqual(
+            (movement.movement_type, movement.stock_before, movement.stock_after, movement.created_by),
+            ('ajuste', 10, 4, self.user),
+        )
+
+        self.client.patch(f'/api/products/{self.product.pk}/', {'stock': 4, 'name': 'Camisa blanca'}, format='json')
+        self.assertEqual(InventoryMovement.objects.filter(product=self.product).count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.name, self.product.price, self.product.stock), ('Camisa blanca', Decimal('12.00'), 4))
+
+    def test_bulk_endpoint_is_all_or_nothing(self):
+        payload = [
+            {'product': self.product.pk, 'movement_type': 'entrada', 'quantity': 5, 'reason': 'compra'},
+            {'product': self.other.pk, 'movement_type': 'salida', 'quantity': 3, 'reason': 'venta'},
+        ]
+        response = self.client.post('/api/inventory-movements/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('quantity', response.data[1])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 10)
+
+        payload[1]['quantity'] = 1
+        response = self.client.post('/api/inventory-movements/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([m['stock_after'] for m in response.data], [15, 0])
+        self.assertEqual(InventoryMovement.objects.filter(created_by=self.user).count(), 2)
+
+
+class ReorderPointTest(APITestCase):
+    def setUp(self):
+        self.product = Product.objects.create(
+            name='Camisa', sku='CAM-1', price=Decimal('10.00'), stock=12, reorder_point=10
+        )
+        self.crossings = []
+        stock_below_reorder_point.connect(self.record, dispatch_uid='test-reorder')
+        self.addCleanup(stock_below_reorder_point.disconnect, dispatch_uid='test-reorder')
+
+    def record(self, sender, **kwargs):
+        self.crossings.append((kwargs['product_id'], kwargs['stock']))
+
+    def test_crossing_is_emitted_once_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_movement(self.product.pk, 'salida', 1)   # 11, still above
+            apply_movement(self.product.pk, 'salida', 3)   # 8, crosses
+            apply_movement(self.product.pk, 'salida', 2)   # 6, already below
+        self.assertEqual(self.crossings, [(self.product.pk, 8)])
+
+    def test_batch_reports_net_crossing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_movements([
+                (self.product.pk, 'salida', 5),
+                (self.product.pk, 'entrada', 10),
+                (self.product.pk, 'salida', 9),
+            ])
+        # Net effect of the batch is 12 -> 8: one crossing.
+        self.assertEqual(self.crossings, [(self.product.pk, 8)])
+
+    def test_low_stock_filter_uses_reorder_point(self):
+        Product.objects.create(name='Gorra', sku='GOR-1', price=Decimal('5.00'), stock=4, reorder_point=3)
+        Product.objects.create(name='Media', sku='MED-1', price=Decimal('2.00'), stock=4, reorder_point=5)
+        response = self.client.get('/api/products/', {'low_stock': 'true'})
+        self.assertEqual([row['sku'] for row in response.data], ['MED-1'])
@@ -1,17 +1,23 @@
 from rest_framework import viewsets, filters
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
+from rest_framework import status
 from django.http import HttpResponse
 import csv
 import io # Import io module
-from django.db.models import Sum, Value, F, Q, DecimalField, IntegerField
+from django.db.models import Value, F, Q, DecimalField, IntegerField, FilteredRelation
 from django.db.models.functions import Coalesce
 from decimal import Decimal
+from django.utils.dateparse import parse_date
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Category, Product, InventoryMovement
 from .serializers import CategorySerializer, ProductSerializer, InventoryMovementSerializer, ProductSalesReportSerializer
 from .filters import ProductFilter # Import ProductFilter
+from .importers import ProductImportError, import_products
+from .snapshots import parse_point_in_time, stock_at, stock_levels_at
+from config.permissions import IsAdminUser
 
 
 class CategoryViewSet(viewsets.ModelViewSet):
@@ -39,11 +45,27 @@ class ProductViewSet(viewsets.ModelViewSet):
         """
         Generates a sales report for products, with optional CSV export.
         """
-        # Annotate products with sales data
-        sales_filter = Q(order_items__order__status__in=['completed', 'shipped'])
-        queryset = Product.objects.annotate(
-            total_units_sold=Coalesce(Sum('order_items__quantity', filter=sales_filter), Value(0), output_field=IntegerField),
-            total_revenue=Coalesce(Sum('order_items__total_price', filter=sales_filter), Value(Decimal('0.00')), output_field=DecimalField)
+        # Read the precomputed counters (see orders.sales) instead of
+        # aggregating every order item on each request.
+        month = request.query_params.get('month')
+        if month:
+            try:
+                month_start = parse_date(f'{month}-01')
+            except ValueError:
+                month_start = None
+            if month_start is None:
+                return Response({'error': 'El parámetro month debe tener el formato YYYY-MM.'}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = Product.objects.annotate(
+                counters=FilteredRelation('monthly_sales', condition=Q(monthly_sales__month=month_start)),
+            )
+            units_field, revenue_field = 'counters__units_sold', 'counters__revenue'
+        else:
+            queryset = Product.objects.all()
+            units_field, revenue_field = 'sales__units_sold', 'sales__revenue'
+
+        queryset = queryset.annotate(
+            total_units_sold=Coalesce(F(units_field), Value(0), output_field=IntegerField()),
+            total_revenue=Coalesce(F(revenue_field), Value(Decimal('0.00')), output_field=DecimalField(max_digits=14, decimal_places=2))
         )
 
         # Apply ordering
@@ -78,6 +100,61 @@ class ProductViewSet(viewsets.ModelViewSet):
         serializer = ProductSalesReportSerializer(queryset, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'], url_path='stock-at', permission_classes=[IsAuthenticated])
+    def stock_at(self, request, pk=None):
+        """
+        Stock of one product at a past date (?date=YYYY-MM-DD or an ISO datetime).
+        """
+        when = parse_point_in_time(request.query_params.get('date'))
+        if when is None:
+            return Response({'error': 'Se requiere el parámetro date (YYYY-MM-DD).'}, status=status.HTTP_400_BAD_REQUEST)
+        product = self.get_object()
+        return Response({
+            'id': product.id,
+            'sku': product.sku,
+            'name': product.name,
+            'date': when.isoformat(),
+            'stock': stock_at(product, when),
+        })
+
+    @action(detail=False, methods=['get'], url_path='stock-at', permission_classes=[IsAuthenticated])
+    def stock_levels_at(self, request):
+        """
+        Historical inventory report: stock of every (filtered) product at a past date.
+        """
+        when = parse_point_in_time(request.query_params.get('date'))
+        if when is None:
+            return Response({'error': 'Se requiere el parámetro date (YYYY-MM-DD).'}, status=status.HTTP_400_BAD_REQUEST)
+        products = self.filter_queryset(self.get_queryset())
+        levels = stock_levels_at(when, products)
+        data = [
+            {'id': product_id, 'sku': sku, 'name': name, 'stock': levels[product_id]}
+            for product_id, sku, name in products.values_list('id', 'sku', 'name')
+            if product_id in levels
+        ]
+        return Response({'date': when.isoformat(), 'products': data})
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser], permission_classes=[IsAdminUser])
+    def import_products(self, request):
+        """
+        Creates or updates products in bulk from an uploaded CSV or XLSX file.
+        Rows are matched by SKU; only the columns present in the file are updated.
+        Pass ?dry_run=true to validate the file without saving anything.
+        """
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({'error': 'Se requiere un archivo en el campo "file".'}, status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = request.query_params.get('dry_run') in ('1', 'true', 'True')
+        try:
+            report = import_products(upload.file, upload.name, dry_run=dry_run, user=request.user)
+        except ProductImportError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = report.to_dict()
+        data['dry_run'] = dry_run
+        return Response(data)
+
 
 class InventoryMovementViewSet(viewsets.ModelViewSet):
     queryset = InventoryMovement.objects.select_related('product', 'created_by').all()
@@ -90,3 +167,14 @@ class InventoryMovementViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Applies a list of movements in a single transaction. Either every
+        movement is recorded or none is.
+        """
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(created_by=request.user)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -0,0 +1,52 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .cache import aget_cached_user, get_cached_user
+
+
+def _token_user_id(validated_token):
+    try:
+        return validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError as e:
+        raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+
+def _check_user(user, validated_token):
+    if user is None:
+        raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+    if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+    if api_settings.CHECK_REVOKE_TOKEN:
+        if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+    return user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` that reads the user from ``users.cache`` instead of
+    querying the database on every request. The same checks apply: unknown
+    and inactive users are rejected, and so are tokens issued before a
+    password change when ``CHECK_REVOKE_TOKEN`` is enabled.
+    """
+
+    def get_user(self, validated_token):
+        return _check_user(get_cached_user(_token_user_id(validated_token)), validated_token)
+
+
+async def aauthenticate_token(raw_token):
+    """
+    The user of access token ``raw_token``, with the checks of
+    ``CachedJWTAuthentication``, for WebSocket handshakes. Raises
+    ``TokenError`` or ``AuthenticationFailed``.
+    """
+    validated_token = AccessToken(raw_token)
+    user = await aget_cached_user(_token_user_id(validated_token))
+    return _check_user(user, validated_token)
@@ -0,0 +1,53 @@
+"""
+Cache of authenticated users.
+
+JWT requests and WebSocket connections only carry a user id, so every one of
+them used to load the user row. Users are cached here for
+``AUTH_USER_CACHE_TIMEOUT`` seconds and the entry is dropped whenever the user
+is saved or deleted (see ``users.signals``), so deactivations and password
+changes take effect on the next request of this process. With a per-process
+cache (``LocMemCache``) other workers notice within the timeout; configure a
+shared cache to invalidate them immediately.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+
+User = get_user_model()
+
+
+def _cache():
+    return caches[settings.AUTH_USER_CACHE_ALIAS]
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def get_cached_user(user_id):
+    """The user with ``user_id``, or ``None`` if it does not exist."""
+    key = user_cache_key(user_id)
+    user = _cache().get(key)
+    if user is None:
+        user = User.objects.filter(pk=user_id).first()
+        if user is not None:
+            _cache().set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+    return user
+
+
+async def aget_cached_user(user_id):
+    key = user_cache_key(user_id)
+    user = await _cache().aget(key)
+    if user is None:
+        user = await User.objects.filter(pk=user_id).afirst()
+        if user is not None:
+            await _cache().aset(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+    return user
+
+
+def invalidate_user(user_id):
+    _cache().delete(user_cache_key(user_id))
+
+
+def invalidate_users(user_ids):
+    _cache().delete_many([user_cache_key(user_id) for user_id in user_ids])
@@ -0,0 +1,91 @@
+"""
+Deferred ``last_login`` updates.
+
+Logins only record the timestamp in memory. A background thread writes the
+buffered timestamps every ``LAST_LOGIN_FLUSH_INTERVAL`` seconds with one
+batched ``UPDATE`` per ``LAST_LOGIN_BATCH_SIZE`` users, so the login request
+does no write of its own and no ``post_save`` work. Timestamps still
+buffered when the process exits are flushed at exit; a crash loses at most
+one interval of them.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+
+class LastLoginBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._thread = None
+
+    def record(self, user_id, when=None):
+        when = when or timezone.now()
+        with self._lock:
+            previous = self._pending.get(user_id)
+            if previous is None or when > previous:
+                self._pending[user_id] = when
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='last-login-flush', daemon=True)
+                self._thread.start()
+
+    def pending(self):
+        with self._lock:
+            return dict(self._pending)
+
+    def flush(self):
+        """Write every buffered timestamp. Returns the number of users updated."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        try:
+            User.objects.bulk_update(
+                [User(pk=user_id, last_login=when) for user_id, when in pending.items()],
+                ['last_login'],
+                batch_size=settings.LAST_LOGIN_BATCH_SIZE,
+            )
+        except Exception:
+            # Put them back (unless a newer login arrived) for the next attempt.
+            with self._lock:
+                for user_id, when in pending.items():
+                    if user_id not in self._pending:
+                        self._pending[user_id] = when
+            raise
+        return len(pending)
+
+    def _run(self):
+        while True:
+            time.sleep(settings.LAST_LOGIN_FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Could not flush last_login timestamps')
+            finally:
+                # This thread is not a request: close its connection explicitly.
+                connections.close_all()
+
+
+buffer = LastLoginBuffer()
+
+
+def record_login(user):
+    buffer.record(user.pk)
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        buffer.flush()
+    except Exception:
+        logger.exception('Could not flush last_login timestamps at exit')
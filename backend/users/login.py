@@ -0,0 +1,180 @@
+"""
+Password checks for the login endpoint.
+
+PBKDF2 is deliberately expensive. Run on the request thread, a burst of
+logins can take every worker and stall unrelated API calls. Here the hash
+runs in a small dedicated thread pool (``LOGIN_HASH_WORKERS``), and at most
+``LOGIN_QUEUE_SIZE`` further logins may wait for it. Anything beyond that
+is rejected at once with ``LoginBusy``, which the view turns into a 429.
+The database lookups stay on the request thread. Only the hash is
+offloaded.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+User = get_user_model()
+
+
+class LoginBusy(Exception):
+    pass
+
+
+class LoginMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.accepted = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.running = 0
+        self.max_queue_depth = 0
+        self.hash_count = 0
+        self.hash_seconds = 0.0
+        self.max_hash_seconds = 0.0
+
+    def enqueue(self):
+        with self._lock:
+            self.accepted += 1
+            self.in_flight += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.in_flight - self.running)
+
+    def reject(self):
+        with self._lock:
+            self.rejected += 1
+
+    def cancel(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def start(self):
+        with self._lock:
+            self.running += 1
+
+    def finish(self, seconds):
+        with self._lock:
+            self.running -= 1
+            self.in_flight -= 1
+            self.hash_count += 1
+            self.hash_seconds += seconds
+            self.max_hash_seconds = max(self.max_hash_seconds, seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'workers': settings.LOGIN_HASH_WORKERS,
+                'queue_size': settings.LOGIN_QUEUE_SIZE,
+                'queue_depth': self.in_flight - self.running,
+                'running': self.running,
+                'max_queue_depth': self.max_queue_depth,
+                'accepted': self.accepted,
+                'rejected': self.rejected,
+                'hash_count': self.hash_count,
+                'avg_hash_ms': round(self.hash_seconds / self.hash_count * 1000, 1) if self.hash_count else 0,
+                'max_hash_ms': round(self.max_hash_seconds * 1000, 1),
+            }
+
+
+metrics = LoginMetrics()
+
+_executor = None
+_slots = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor, _slots
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.LOGIN_HASH_WORKERS, thread_name_prefix='login-hash'
+            )
+            _slots = threading.BoundedSemaphore(settings.LOGIN_HASH_WORKERS + settings.LOGIN_QUEUE_SIZE)
+        return _executor, _slots
+
+
+def _timed(fn, *args):
+    metrics.start()
+    started = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        metrics.finish(time.perf_counter() - started)
+
+
+def run_hash(fn, *args):
+    """Run ``fn(*args)`` in the hashing pool, or raise ``LoginBusy`` if it is full."""
+    executor, slots = _get_executor()
+    if not slots.acquire(blocking=False):
+        metrics.reject()
+        raise LoginBusy()
+    metrics.enqueue()
+    try:
+        future = executor.submit(_timed, fn, *args)
+    except BaseException:
+        slots.release()
+        metrics.cancel()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    return future.result()
+
+
+def _verify(password, encoded):
+    """Returns ``(valid, needs_rehash)``; pure CPU, safe to run off-thread."""
+    rehash = []
+    valid = check_password(password, encoded, setter=lambda raw: rehash.append(True))
+    return valid, bool(rehash)
+
+
+def authenticate_login(username, password):
+    """
+    Equivalent of ``authenticate()`` with ``ModelBackend``: returns the active
+    user whose credentials match, or ``None``.
+    """
+    try:
+        user = User._default_manager.get_by_natural_key(username)
+    except User.DoesNotExist:
+        # Hash anyway so unknown usernames take as long as wrong passwords.
+        run_hash(make_password, password)
+        return None
+
+    valid, needs_rehash = run_hash(_verify, password, user.password)
+    if not valid or not user.is_active:
+        return None
+    if needs_rehash:
+        user.set_password(password)
+        user.save(update_fields=['password'])
+    return user
+
+
+class LoginRateThrottle(SimpleRateThrottle):
+    """Throttle state lives in the per-process cache: it is checked before any hashing."""
+
+    def __init__(self):
+        self.cache = caches[settings.LOGIN_THROTTLE_CACHE_ALIAS]
+        super().__init__()
+
+
+class LoginIPThrottle(LoginRateThrottle):
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LoginUsernameThrottle(LoginRateThrottle):
+    scope = 'login_user'
+
+    def get_cache_key(self, request, view):
+        username = request.data.get('username') if hasattr(request.data, 'get') else None
+        if not username:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': str(username).strip().lower()}
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from users.tokens import PRUNE_BATCH_SIZE, prune_expired_tokens
+
+
+class Command(BaseCommand):
+    help = 'Delete expired outstanding and blacklisted JWT refresh tokens in batches (run daily from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=PRUNE_BATCH_SIZE, help='Tokens deleted per statement')
+
+    def handle(self, *args, **options):
+        deleted = prune_expired_tokens(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired tokens'))
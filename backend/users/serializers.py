@@ -1,5 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from config.images import rendition_urls
+from .tokens import CachedRefreshToken
 
 User = get_user_model()
 
@@ -8,15 +11,19 @@ class UserSerializer(serializers.ModelSerializer):
     """Serializer for User model with full details"""
     password = serializers.CharField(write_only=True, required=False, min_length=8)
     role_display = serializers.CharField(source='get_role_display', read_only=True)
+    avatar_renditions = serializers.SerializerMethodField()
     
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name', 
                   'role', 'role_display', 'phone', 'address', 'avatar', 
-                  'hired_date', 'is_active', 'is_staff', 'is_superuser',
-                  'created_at', 'updated_at', 'password']
+                  'avatar_renditions', 'hired_date', 'is_active', 'is_staff',
+                  'is_superuser', 'created_at', 'updated_at', 'password']
         read_only_fields = ['id', 'created_at', 'updated_at']
     
+    def get_avatar_renditions(self, obj):
+        return rendition_urls(obj.avatar, self.context.get('request'))
+    
     def create(self, validated_data):
         password = validated_data.pop('password', None)
         user = User(**validated_data)
@@ -75,3 +82,8 @@ class LoginSerializer(serializers.Serializer):
     """Serializer for user login"""
     username = serializers.CharField()
     password = serializers.CharField(write_only=True)
+
+
+class CachedTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refresh serializer whose blacklist checks use the in-process cache."""
+    token_class = CachedRefreshToken
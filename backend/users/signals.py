@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from config.images import image_saved, track_image
+
+from .cache import invalidate_user
+
+
+@receiver(post_init, sender=settings.AUTH_USER_MODEL)
+def track_avatar(sender, instance, **kwargs):
+    track_image(instance, 'avatar')
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def generate_avatar_renditions(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Builds the thumbnail/medium/webp copies of a new or replaced avatar,
+    and deletes those of the replaced one.
+    """
+    image_saved(instance, 'avatar', created, update_fields)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Drops the cached copy used for token authentication. It is dropped again
+    after commit so a request racing the transaction cannot re-cache the old row.
+    """
+    invalidate_user(instance.pk)
+    transaction.on_commit(lambda: invalidate_user(instance.pk))
@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.cache import get_cached_user, user_cache_key
+
+User = get_user_model()
+
+
+class CachedJWTAuthenticationTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='password123', role='admin')
+        self.seller = User.objects.create_user(username='vendedor', password='password123', role='vendedor')
+
+    def authenticate(self, user):
+        token = RefreshToken.for_user(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def user_queries(self, queries):
+        table = User._meta.db_table
+        return [q['sql'] for q in queries.captured_queries if f'FROM "{table}"' in q['sql']]
+
+    def test_user_is_loaded_once(self):
+        self.authenticate(self.seller)
+        self.assertEqual(self.client.get('/api/auth/me/').status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get('/api/auth/me/').status_code, 200)
+        self.assertEqual(self.user_queries(queries), [])
+
+    def test_deactivated_user_is_rejected(self):
+        self.authenticate(self.seller)
+        self.assertEqual(self.client.get('/api/auth/me/').status_code, 200)
+
+        self.client.force_authenticate(self.admin)
+        self.client.post(f'/api/auth/users/{self.seller.pk}/toggle_active/')
+        self.client.force_authenticate(None)
+
+        self.authenticate(self.seller)
+        self.assertEqual(self.client.get('/api/auth/me/').status_code, 401)
+
+    def test_password_change_invalidates_entry(self):
+        get_cached_user(self.seller.pk)
+        self.assertIsNotNone(cache.get(user_cache_key(self.seller.pk)))
+
+        self.authenticate(self.admin)
+        response = self.client.post(
+            f'/api/auth/users/{self.seller.pk}/change_password/', {'new_password': 'nueva-clave-123'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(cache.get(user_cache_key(self.seller.pk)))
+        self.assertTrue(get_cached_user(self.seller.pk).check_password('nueva-clave-123'))
@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from users.last_login import buffer
+
+User = get_user_model()
+
+
+class LastLoginTest(APITestCase):
+    def setUp(self):
+        caches['local'].clear()
+        buffer.flush()
+        self.users = [
+            User.objects.create_user(username=f'vendedor{index}', password='password123', role='vendedor')
+            for index in range(3)
+        ]
+
+    def test_login_defers_the_write(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/auth/login/', {'username': 'vendedor0', 'password': 'password123'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q for q in queries.captured_queries if q['sql'].startswith('UPDATE')])
+        self.assertIsNone(User.objects.get(pk=self.users[0].pk).last_login)
+        self.assertIn(self.users[0].pk, buffer.pending())
+
+        self.assertEqual(buffer.flush(), 1)
+        self.assertIsNotNone(User.objects.get(pk=self.users[0].pk).last_login)
+
+    def test_flush_writes_one_batch(self):
+        now = timezone.now()
+        for user in self.users:
+            buffer.record(user.pk, now - timedelta(minutes=5))
+            buffer.record(user.pk, now)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(buffer.flush(), 3)
+        self.assertEqual(len([q for q in queries.captured_queries if q['sql'].startswith('UPDATE')]), 1)
+        self.assertEqual(set(User.objects.values_list('last_login', flat=True)), {now})
+        self.assertEqual(buffer.flush(), 0)
@@ -0,0 +1,67 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from rest_framework.test import APITestCase
+
+from users import login
+from users.login import LoginUsernameThrottle, run_hash
+
+User = get_user_model()
+
+
+class LoginTest(APITestCase):
+    def setUp(self):
+        caches['local'].clear()
+        login.metrics.reset()
+        self.user = User.objects.create_user(username='cajero', password='password123', role='cajero')
+
+    def post_login(self, password='password123', username='cajero'):
+        return self.client.post('/api/auth/login/', {'username': username, 'password': password})
+
+    def test_login(self):
+        response = self.post_login()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user']['username'], 'cajero')
+        self.assertEqual(self.post_login('wrong').status_code, 401)
+        self.assertEqual(self.post_login(username='nobody').status_code, 401)
+        self.assertEqual(login.metrics.snapshot()['hash_count'], 3)
+
+    def test_inactive_user_cannot_log_in(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.post_login().status_code, 401)
+
+    def test_username_throttle(self):
+        with mock.patch.object(LoginUsernameThrottle, 'THROTTLE_RATES', {'login_user': '2/min', 'login_ip': '100/min'}):
+            self.assertEqual(self.post_login('wrong').status_code, 401)
+            self.assertEqual(self.post_login('wrong').status_code, 401)
+            self.assertEqual(self.post_login().status_code, 429)
+            self.assertEqual(login.metrics.snapshot()['hash_count'], 2)
+
+    def test_full_queue_is_rejected(self):
+        release = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=1)
+        with mock.patch.multiple(login, _executor=executor, _slots=threading.BoundedSemaphore(1)):
+            blocker = threading.Thread(target=run_hash, args=(release.wait,))
+            blocker.start()
+            try:
+                response = self.post_login()
+                self.assertEqual(response.status_code, 429)
+                self.assertEqual(response['Retry-After'], '1')
+            finally:
+                release.set()
+                blocker.join()
+                executor.shutdown()
+        self.assertEqual(login.metrics.snapshot()['rejected'], 1)
+
+    def test_metrics_endpoint_is_admin_only(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get('/api/auth/login-metrics/').status_code, 403)
+        admin = User.objects.create_user(username='admin', password='password123', role='admin')
+        self.client.force_authenticate(admin)
+        response = self.client.get('/api/auth/login-metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('queue_depth', response.data)
@@ -0,0 +1,89 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.tokens import CachedRefreshToken, blacklist_cache, outstanding_cache
+
+User = get_user_model()
+
+
+class TokenBlacklistTest(APITestCase):
+    def setUp(self):
+        blacklist_cache.clear()
+        outstanding_cache.clear()
+        self.user = User.objects.create_user(username='vendedor', password='password123', role='vendedor')
+
+    def refresh(self, token):
+        return self.client.post('/api/auth/token/refresh/', {'refresh': str(token)})
+
+    def test_rotated_token_cannot_be_reused(self):
+        token = RefreshToken.for_user(self.user)
+        response = self.refresh(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('refresh', response.data)
+
+        self.assertEqual(self.refresh(token).status_code, 401)
+        self.assertEqual(self.refresh(response.data['refresh']).status_code, 200)
+
+    def test_blacklist_written_elsewhere_is_seen(self):
+        token = RefreshToken.for_user(self.user)
+        other = RefreshToken.for_user(self.user)
+        self.assertEqual(self.refresh(other).status_code, 200)
+
+        # Blacklisted by another process: only the new row is fetched.
+        token.blacklist()
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+    def test_logout_blacklists(self):
+        token = RefreshToken.for_user(self.user)
+        self.assertEqual(self.client.post('/api/auth/logout/', {'refresh': str(token)}).status_code, 200)
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+    def test_blacklist_lookup_does_not_scan_tables(self):
+        self.assertEqual(self.refresh(RefreshToken.for_user(self.user)).status_code, 200)
+        token = RefreshToken.for_user(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            blacklist_cache.contains(token['jti'])
+        self.assertEqual(len(queries), 1)
+        self.assertIn('."id" >', queries[0]['sql'])
+
+    def test_rotation_reuses_the_outstanding_row(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.refresh(RefreshToken.for_user(self.user))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.refresh(response.data['refresh']).status_code, 200)
+        lookups = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT') and 'FROM "token_blacklist_outstandingtoken"' in query['sql']
+        ]
+        self.assertEqual(lookups, [])
+        self.assertEqual(BlacklistedToken.objects.count(), 2)
+
+    def test_blacklist_token_of_deleted_user(self):
+        token = RefreshToken.for_user(self.user)
+        OutstandingToken.objects.all().delete()
+        self.user.delete()
+
+        CachedRefreshToken(str(token)).blacklist()
+        self.assertIsNone(OutstandingToken.objects.get(jti=token['jti']).user)
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+
+    def test_prune_tokens(self):
+        expired = OutstandingToken.objects.create(
+            user=self.user, jti='old', token='x', expires_at=timezone.now() - timedelta(days=1)
+        )
+        BlacklistedToken.objects.create(token=expired)
+        RefreshToken.for_user(self.user)
+
+        call_command('prune_tokens', batch_size=1, stdout=StringIO())
+        self.assertFalse(OutstandingToken.objects.filter(jti='old').exists())
+        self.assertFalse(BlacklistedToken.objects.exists())
+        self.assertEqual(OutstandingToken.objects.count(), 1)
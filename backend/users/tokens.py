@@ -0,0 +1,221 @@
+"""
+Refresh tokens with an in-process blacklist.
+
+simplejwt checks the blacklist with a join on ``BlacklistedToken`` and
+``OutstandingToken`` for every refresh. Both tables grow with every
+rotation, so the lookup is replaced by ``BlacklistCache``, which holds
+the jti of every blacklisted token that has not expired yet. Before each
+check it is synced with a primary-key range query that returns only the
+rows added since the last sync. Expired tokens are rejected by their ``exp``
+claim anyway, so they are dropped from memory and deleted from the tables
+by ``prune_tokens``.
+
+Blacklisting a token needs its ``OutstandingToken`` row. The row of every
+token issued by a rotation in this process is remembered in
+``outstanding_cache``, so rotating it again does not look it up or write it a
+second time.
+"""
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+# Ids below the watermark that were not visible yet (rows of transactions
+# still in progress) are looked up again for this many seconds.
+GAP_TIMEOUT = 60
+
+# How often entries of expired tokens are dropped from memory.
+PURGE_INTERVAL = 300
+
+PRUNE_BATCH_SIZE = 1000
+
+
+class BlacklistCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._expiries = {}
+        self._watermark = None
+        self._gaps = {}
+        self._next_purge = 0
+
+    def _load(self):
+        self._watermark = BlacklistedToken.objects.aggregate(last=Max('id'))['last'] or 0
+        rows = (
+            BlacklistedToken.objects.filter(id__lte=self._watermark, token__expires_at__gt=timezone.now())
+            .values_list('token__jti', 'token__expires_at')
+        )
+        self._expiries = dict(rows.iterator())
+
+    def _sync(self):
+        if self._watermark is None:
+            self._load()
+            return
+
+        now = time.monotonic()
+        if now >= self._next_purge:
+            self._purge_expired()
+            self._next_purge = now + PURGE_INTERVAL
+        self._gaps = {pk: seen for pk, seen in self._gaps.items() if now - seen < GAP_TIMEOUT}
+        queryset = BlacklistedToken.objects.filter(id__gt=self._watermark)
+        if self._gaps:
+            queryset = queryset | BlacklistedToken.objects.filter(id__in=list(self._gaps))
+        rows = list(queryset.order_by('id').values_list('id', 'token__jti', 'token__expires_at'))
+
+        for pk, jti, expires_at in rows:
+            self._expiries[jti] = expires_at
+            self._gaps.pop(pk, None)
+        new_ids = [row[0] for row in rows if row[0] > self._watermark]
+        if new_ids:
+            seen = set(new_ids)
+            for pk in range(self._watermark + 1, new_ids[-1]):
+                if pk not in seen:
+                    self._gaps[pk] = now
+            self._watermark = new_ids[-1]
+
+    def _purge_expired(self):
+        now = timezone.now()
+        self._expiries = {jti: expires for jti, expires in self._expiries.items() if expires > now}
+
+    def purge_expired(self):
+        with self._lock:
+            self._purge_expired()
+
+    def add(self, jti, expires_at):
+        with self._lock:
+            self._expiries[jti] = expires_at
+
+    def contains(self, jti):
+        with self._lock:
+            if jti in self._expiries:
+                return True
+            self._sync()
+            return jti in self._expiries
+
+    def clear(self):
+        with self._lock:
+            self._expiries = {}
+            self._watermark = None
+            self._gaps = {}
+
+
+blacklist_cache = BlacklistCache()
+
+
+class OutstandingTokenCache:
+    """Ids of committed ``OutstandingToken`` rows by jti, until they expire."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens = {}
+        self._next_purge = 0
+
+    def get(self, jti):
+        with self._lock:
+            token_id, expires_at = self._tokens.get(jti, (None, None))
+            if token_id is not None and expires_at <= timezone.now():
+                return None
+            return token_id
+
+    def add(self, jti, token_id, expires_at):
+        with self._lock:
+            now = time.monotonic()
+            if now >= self._next_purge:
+                self._purge_expired()
+                self._next_purge = now + PURGE_INTERVAL
+            self._tokens[jti] = (token_id, expires_at)
+
+    def _purge_expired(self):
+        now = timezone.now()
+        self._tokens = {jti: entry for jti, entry in self._tokens.items() if entry[1] > now}
+
+    def purge_expired(self):
+        with self._lock:
+            self._purge_expired()
+
+    def clear(self):
+        with self._lock:
+            self._tokens = {}
+
+
+outstanding_cache = OutstandingTokenCache()
+
+
+class CachedRefreshToken(RefreshToken):
+    """``RefreshToken`` that checks the blacklist through ``blacklist_cache``."""
+
+    def check_blacklist(self):
+        if blacklist_cache.contains(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def _outstanding_token_id(self, new=False):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        token_id = outstanding_cache.get(jti)
+        if token_id is not None:
+            return token_id
+
+        # Like simplejwt, a token of a deleted user is stored without one. A
+        # new token was just issued by the refresh serializer, which has
+        # already loaded its user.
+        user_id = self.payload.get(api_settings.USER_ID_CLAIM)
+        if user_id is not None and not new:
+            user_id = (
+                get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+                .values_list('pk', flat=True)
+                .first()
+            )
+        expires_at = datetime_from_epoch(self.payload["exp"])
+        fields = {
+            "user_id": user_id,
+            "created_at": self.current_time,
+            "token": str(self),
+            "expires_at": expires_at,
+        }
+        if new:
+            token = OutstandingToken.objects.create(jti=jti, **fields)
+        else:
+            token, _ = OutstandingToken.objects.get_or_create(jti=jti, defaults=fields)
+        # Only a committed row may be referenced by later requests.
+        transaction.on_commit(lambda: outstanding_cache.add(jti, token.pk, expires_at))
+        return token.pk
+
+    def blacklist(self):
+        result = BlacklistedToken.objects.get_or_create(token_id=self._outstanding_token_id())
+        blacklist_cache.add(self.payload[api_settings.JTI_CLAIM], datetime_from_epoch(self.payload["exp"]))
+        return result
+
+    def outstand(self):
+        # Called by the refresh serializer right after ``set_jti()``, so the
+        # row cannot exist yet.
+        self._outstanding_token_id(new=True)
+
+
+def prune_expired_tokens(batch_size=PRUNE_BATCH_SIZE):
+    """
+    Delete expired outstanding tokens (and, by cascade, their blacklist rows)
+    in batches of ``batch_size`` so no single statement locks a large part of
+    the tables. Returns the number of outstanding tokens deleted.
+    """
+    now = timezone.now()
+    deleted = 0
+    while True:
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lte=now)
+            .order_by('id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        OutstandingToken.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+    blacklist_cache.purge_expired()
+    outstanding_cache.purge_expired()
+    return deleted
@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenRefreshView, TokenVerifyView
-from .views import UserViewSet, CustomTokenObtainPairView, RegisterView, current_user, logout
+from .views import UserViewSet, CustomTokenObtainPairView, RegisterView, current_user, logout, login_metrics
 
 router = DefaultRouter()
 router.register(r'', UserViewSet, basename='user')
@@ -16,4 +16,5 @@ urlpatterns = [
     path('token/verify/', TokenVerifyView.as_view(), name='token_verify'),
     path('me/', current_user, name='current_user'),
     path('logout/', logout, name='logout'),
+    path('login-metrics/', login_metrics, name='login_metrics'),
 ]
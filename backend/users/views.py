@@ -3,8 +3,13 @@ from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
+from .tokens import CachedRefreshToken
+from .last_login import record_login
+from .login import LoginBusy, LoginIPThrottle, LoginUsernameThrottle, authenticate_login, metrics as login_pool_metrics
+from config.permissions import IsAdminUser
+from notifications.push import register_device
 from rest_framework_simplejwt.views import TokenObtainPairView
-from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth import get_user_model
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from .serializers import UserSerializer, UserListSerializer, RegisterSerializer, LoginSerializer
@@ -61,7 +66,7 @@ class UserViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
     def update_fcm_token(self, request):
         """
-        Update the FCM token for the authenticated user.
+        Register the FCM token of one of the authenticated user's devices.
         """
         fcm_token = request.data.get('fcm_token')
         if not fcm_token:
@@ -70,8 +75,7 @@ class UserViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        request.user.fcm_token = fcm_token
-        request.user.save(update_fields=['fcm_token'])
+        register_device(request.user, fcm_token, platform=request.data.get('platform', ''))
         
         return Response({'message': 'FCM token updated successfully.'}, status=status.HTTP_200_OK)
 
@@ -81,15 +85,23 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     Custom token view that returns user data along with tokens
     """
     permission_classes = (AllowAny,)
+    throttle_classes = (LoginIPThrottle, LoginUsernameThrottle)
     
     def post(self, request, *args, **kwargs):
         serializer = LoginSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        user = authenticate(
-            username=serializer.validated_data['username'],
-            password=serializer.validated_data['password']
-        )
+        try:
+            user = authenticate_login(
+                username=serializer.validated_data['username'],
+                password=serializer.validated_data['password']
+            )
+        except LoginBusy:
+            return Response(
+                {'error': 'Too many logins in progress, try again shortly'},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={'Retry-After': '1'}
+            )
         
         if not user:
             return Response(
@@ -103,6 +115,8 @@ class CustomTokenObtainPairView(TokenObtainPairView):
                 status=status.HTTP_401_UNAUTHORIZED
             )
         
+        record_login(user)
+
         # Generate tokens
         refresh = RefreshToken.for_user(user)
         
@@ -161,7 +175,7 @@ def logout(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        token = RefreshToken(refresh_token)
+        token = CachedRefreshToken(refresh_token)
         token.blacklist()
         
         return Response(
@@ -172,3 +186,12 @@ def logout(request):
         # This can happen if the token is already invalid/blacklisted
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def login_metrics(request):
+    """
+    Login hashing pool metrics of this process (queue depth, rejections, hash time)
+    """
+    return Response(login_pool_metrics.snapshot())
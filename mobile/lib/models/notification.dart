@@ -1,5 +1,8 @@
 class BoutiqueNotification {
+  // Personal and broadcast notifications can share an id; [key] is unique.
   final int id;
+  final String kind;
+  final String key;
   final String message;
   final String notificationType;
   bool isRead;
@@ -7,6 +10,8 @@ class BoutiqueNotification {
 
   BoutiqueNotification({
     required this.id,
+    required this.kind,
+    required this.key,
     required this.message,
     required this.notificationType,
     required this.isRead,
@@ -14,8 +19,11 @@ class BoutiqueNotification {
   });
 
   factory BoutiqueNotification.fromJson(Map<String, dynamic> json) {
+    final String kind = json['kind'] ?? 'personal';
     return BoutiqueNotification(
       id: json['id'],
+      kind: kind,
+      key: json['key'] ?? '$kind:${json['id']}',
       message: json['message'],
       notificationType: json['notification_type'],
       isRead: json['is_read'],
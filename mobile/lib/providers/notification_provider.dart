@@ -57,7 +57,7 @@ class NotificationProvider extends ChangeNotifier {
     if (_authProvider.accessToken == null) return;
 
     try {
-      await _notificationService.markAllAsRead(_authProvider.accessToken!);
+      await _notificationService.markAllAsRead(_authProvider.accessToken!, _notifications);
       // Optimistically update the UI
       _notifications = _notifications.map((n) => n..isRead = true).toList();
       notifyListeners();
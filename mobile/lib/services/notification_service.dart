@@ -22,7 +22,13 @@ class NotificationService {
     }
   }
 
-  Future<void> markAllAsRead(String token) async {
+  // Marks read everything up to the newest notifications the user has seen,
+  // so ones that arrive meanwhile stay unread.
+  Future<void> markAllAsRead(String token, List<BoutiqueNotification> seen) async {
+    int newest(String kind) => seen
+        .where((n) => n.kind == kind)
+        .fold(0, (latest, n) => n.id > latest ? n.id : latest);
+
     final uri = Uri.parse('$kApiBaseUrl/notifications/mark_all_as_read/');
     final response = await http.post(
       uri,
@@ -30,6 +36,10 @@ class NotificationService {
         'Content-Type': 'application/json',
         'Authorization': 'Bearer $token',
       },
+      body: json.encode({
+        'personal_through': newest('personal'),
+        'broadcasts_through': newest('broadcast'),
+      }),
     );
 
     if (response.statusCode != 200) {
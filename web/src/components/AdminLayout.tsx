@@ -299,9 +299,9 @@ export default function AdminLayout({ children }: AdminLayoutProps) {
               ) : (
                 notifications.map((notification) => (
                   <MenuItem
-                    key={notification.id}
+                    key={notification.key}
                     onClick={() => {
-                      markAsRead(notification.id);
+                      markAsRead(notification.key);
                       if (notification.notification_type === 'new_order') {
                         router.push('/ordenes');
                       }
@@ -4,7 +4,9 @@ import { createContext, useContext, useEffect, useState, useCallback } from 'rea
 import { useAuth } from './AuthContext';
 
 interface Notification {
-  id: number; // From backend Notification model PK
+  id: number; // PK of a Notification or a BroadcastNotification; the two can collide
+  key: string; // Unique across both kinds: 'personal:<id>' or 'broadcast:<id>'
+  kind: 'personal' | 'broadcast';
   notification_type: 'new_order' | 'order_status_update' | 'generic'; // Matches backend field
   message: string;
   created_at: Date; // Matches backend field
@@ -15,7 +17,7 @@ interface Notification {
 interface NotificationContextType {
   notifications: Notification[];
   unreadCount: number;
-  markAsRead: (id: number) => void; // ID is now a number
+  markAsRead: (key: string) => void; // Notification key, not the bare id
   clearNotifications: () => void;
 }
 
@@ -49,8 +51,11 @@ export const NotificationProvider = ({ children }: { children: React.ReactNode }
         const eventData = JSON.parse(event.data);
         
         if (eventData.type === 'notification') {
+          const kind = eventData.kind ?? 'personal';
           const newNotification: Notification = {
             id: eventData.id,
+            key: eventData.key ?? `${kind}:${eventData.id}`,
+            kind,
             notification_type: eventData.notification_type,
             message: eventData.message,
             created_at: new Date(eventData.created_at),
@@ -76,9 +81,9 @@ export const NotificationProvider = ({ children }: { children: React.ReactNode }
     }
   }, [isAuthenticated, accessToken]);
 
-  const markAsRead = useCallback((id: number) => {
+  const markAsRead = useCallback((key: string) => {
     setNotifications(prev =>
-      prev.map(n => (n.id === id ? { ...n, is_read: true } : n))
+      prev.map(n => (n.key === key ? { ...n, is_read: true } : n))
     );
   }, []);
 